@@ -0,0 +1,153 @@
+"""
+Timing, statistics and baselines for the dsn-sync benchmark suite.
+
+A benchmark case is a callable taking the iteration number. ``measure``
+calls it repeatedly for a time budget, timing every call, and reports
+throughput and latency percentiles. Results are keyed by case name, so a
+run can be saved as a JSON baseline and later runs compared against it.
+"""
+
+import datetime
+import json
+import math
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+Result = Dict[str, Any]  # {"ops_per_sec", "p50_us", "p99_us", "iterations"}
+
+
+def percentile(sorted_samples: List[int], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    index = max(0, math.ceil(fraction * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+
+def measure(func: Callable[[int], Any], seconds: float = 1.0, warmup: float = 0.2,
+            batch: int = 1, min_iterations: int = 5) -> Result:
+    """
+    Time ``func(i)`` calls for ``seconds`` after a ``warmup``.
+
+    ``batch`` is the number of operations one call performs (rows of a
+    bulk write, packets of a batch), so ops/sec counts operations while
+    latencies stay per call.
+    """
+    clock = time.perf_counter_ns
+    i = 0
+    deadline = clock() + int(warmup * 1e9)
+    while clock() < deadline:
+        func(i)
+        i += 1
+
+    samples: List[int] = []
+    append = samples.append
+    start = clock()
+    deadline = start + int(seconds * 1e9)
+    while True:
+        before = clock()
+        func(i)
+        after = clock()
+        append(after - before)
+        i += 1
+        if after >= deadline and len(samples) >= min_iterations:
+            break
+    elapsed = clock() - start
+
+    samples.sort()
+    return {
+        "ops_per_sec": len(samples) * batch / (elapsed / 1e9),
+        "p50_us": percentile(samples, 0.50) / 1000,
+        "p99_us": percentile(samples, 0.99) / 1000,
+        "iterations": len(samples),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Describe where the benchmarks ran (stored with baselines)."""
+    import dsn_sync
+    return {
+        "dsn_sync": dsn_sync.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def save_baseline(path: str, results: Dict[str, Result]) -> None:
+    """Write results and the environment to a JSON baseline."""
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    """Read a baseline written by ``save_baseline``."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _change(current: Optional[float], base: Optional[float]) -> Optional[float]:
+    if current is None or not base:
+        return None
+    return current / base - 1
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, Result],
+            threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    Compare results with a baseline case by case.
+
+    A case regresses when its ops/sec drops, or its p50 latency grows,
+    by more than ``threshold`` (a fraction). p99 changes are reported but
+    do not decide the status, as tails are noisy on shared machines.
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        row = {"name": name, "result": result, "base": base, "status": "new",
+               "ops_change": None, "p50_change": None, "p99_change": None}
+        if base is not None:
+            row["ops_change"] = _change(result["ops_per_sec"], base["ops_per_sec"])
+            row["p50_change"] = _change(result.get("p50_us"), base.get("p50_us"))
+            row["p99_change"] = _change(result.get("p99_us"), base.get("p99_us"))
+            slower = ((row["ops_change"] is not None and row["ops_change"] < -threshold)
+                      or (row["p50_change"] is not None and row["p50_change"] > threshold))
+            faster = row["ops_change"] is not None and row["ops_change"] > threshold
+            row["status"] = "REGRESSION" if slower else "faster" if faster else "ok"
+        rows.append(row)
+    return rows
+
+
+def _number(value: Optional[float], digits: int = 1) -> str:
+    return "-" if value is None else f"{value:,.{digits}f}"
+
+
+def _percent(value: Optional[float]) -> str:
+    return "" if value is None else f"{value:+.1%}"
+
+
+def format_result(name: str, result: Result, width: int) -> str:
+    """One report line: name, ops/sec, p50 and p99 (microseconds)."""
+    return (f"{name:<{width}} {_number(result['ops_per_sec'], 0):>14} "
+            f"{_number(result.get('p50_us')):>11} {_number(result.get('p99_us')):>11}")
+
+
+def format_header(width: int) -> str:
+    return f"{'benchmark':<{width}} {'ops/sec':>14} {'p50 us':>11} {'p99 us':>11}"
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """Render ``compare`` rows as a text table."""
+    width = max([len(row["name"]) for row in rows] + [9])
+    lines = [f"{'benchmark':<{width}} {'base ops/sec':>14} {'ops/sec':>14} {'ops':>8} "
+             f"{'p50':>8} {'p99':>8}  status"]
+    for row in rows:
+        base, result = row["base"] or {}, row["result"] or {}
+        lines.append(
+            f"{row['name']:<{width}} {_number(base.get('ops_per_sec'), 0):>14} "
+            f"{_number(result.get('ops_per_sec'), 0):>14} {_percent(row['ops_change']):>8} "
+            f"{_percent(row['p50_change']):>8} {_percent(row['p99_change']):>8}  {row['status']}"
+        )
+    return "\n".join(lines)
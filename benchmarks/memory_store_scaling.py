@@ -0,0 +1,95 @@
+"""
+Microbenchmark: MemoryStore throughput as reader/writer threads are added.
+
+Each worker thread runs single-key reads (90%) and writes (10%) against its
+own table while one background thread keeps reading a large table with
+``get_data(table)``. The same workload runs against a store serialized by
+one global lock that copies the table on every full read (the design before
+per-table locks and copy-on-write snapshots) for comparison.
+
+Usage:
+    python benchmarks/memory_store_scaling.py [--seconds 2] [--rows 200000]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dsn_sync.core.memory_store import MemoryStore  # noqa: E402
+
+
+class GlobalLockStore(MemoryStore):
+    """MemoryStore with every operation behind one lock, copying full-table reads (baseline)."""
+
+    def __init__(self):
+        super().__init__()
+        self._global = threading.Lock()
+
+    def get_data(self, table_name, key=None):
+        with self._global:
+            result = super().get_data(table_name, key)
+            return result if key else dict(result)  # Copy while holding the lock
+
+    def apply_change(self, operation, table_name=None, key=None, data=None):
+        with self._global:
+            return super().apply_change(operation, table_name, key, data)
+
+
+def run(store_class, threads: int, seconds: float, rows: int) -> float:
+    """Return single-key operations per second across worker threads."""
+    store = store_class()
+    store.load_from_dict({"big": {str(i): {"id": i} for i in range(rows)}})
+    for t in range(threads):
+        for i in range(1000):
+            store.store_data(f"t{t}", str(i), {"id": i})
+
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def worker(index: int) -> None:
+        table = f"t{index}"
+        n = 0
+        while not stop.is_set():
+            key = str(n % 1000)
+            if n % 10 == 0:
+                store.store_data(table, key, {"id": n})
+            else:
+                store.get_data(table, key)
+            n += 1
+        counts[index] = n
+
+    def full_reader() -> None:
+        while not stop.is_set():
+            store.get_data("big")
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    pool.append(threading.Thread(target=full_reader))
+    for thread in pool:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in pool:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--threads", default="1,2,4,8")
+    args = parser.parse_args()
+
+    print(f"{'threads':>7} {'global lock ops/s':>18} {'per-table ops/s':>16}")
+    for threads in [int(n) for n in args.threads.split(",")]:
+        baseline = run(GlobalLockStore, threads, args.seconds, args.rows)
+        striped = run(MemoryStore, threads, args.seconds, args.rows)
+        print(f"{threads:>7} {baseline:>18,.0f} {striped:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
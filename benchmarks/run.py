@@ -0,0 +1,323 @@
+"""
+Benchmark suite for the dsn-sync pipeline.
+
+Measures ops/sec and p50/p99 latency of:
+
+    memory_store  MemoryStore reads, writes, deltas, pages and queries
+    encryption    EncryptionManager encrypt/decrypt (token and frame) and signatures
+    tokens        TokenManager generate/validate (json and compact formats)
+    receiver      Receiver dispatch (inline, threads, asyncio)
+    http          Round trips against EmbeddedServer on localhost
+    scaling       MemoryStore throughput as threads are added (memory_store_scaling.py)
+
+for several table and payload sizes. Save a run as a baseline and compare
+later runs against it; comparison exits with status 1 on regressions.
+
+Usage:
+    python benchmarks/run.py [--suite memory_store,http] [--filter get_row]
+                             [--seconds 1] [--quick]
+                             [--save baseline.json] [--compare baseline.json]
+                             [--threshold 0.10]
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dsn_sync import DSNSync  # noqa: E402
+from dsn_sync.core.memory_store import MemoryStore  # noqa: E402
+from dsn_sync.core.receiver import Receiver  # noqa: E402
+from dsn_sync.security.encryption import EncryptionManager  # noqa: E402
+from dsn_sync.security.key_manager import KeyManager  # noqa: E402
+from dsn_sync.security.token_manager import TokenManager  # noqa: E402
+from harness import (  # noqa: E402
+    measure, save_baseline, load_baseline, compare, format_header, format_result,
+    format_comparison
+)
+import memory_store_scaling  # noqa: E402
+
+# A case: (name, func(i), operations per call)
+Case = Tuple[str, Callable[[int], Any], int]
+
+SIZES = {
+    "rows": (1000, 100000),
+    "payload": (100, 1024),  # Bytes per row
+    "message": (100, 10 * 1024, 1024 * 1024),  # Bytes per encrypted payload
+    "http_rows": (100, 10000),
+    "threads": (1, 2, 4, 8),
+}
+QUICK_SIZES = {
+    "rows": (1000,),
+    "payload": (100,),
+    "message": (100, 10 * 1024),
+    "http_rows": (100,),
+    "threads": (1, 4),
+}
+
+
+def make_row(i: int, size: int) -> Dict[str, Any]:
+    """A row of roughly ``size`` bytes when serialized."""
+    row = {"id": i, "name": f"user{i}", "group": i % 100, "active": i % 2 == 0}
+    padding = size - 60
+    if padding > 0:
+        row["bio"] = "x" * padding
+    return row
+
+
+def make_payload(size: int) -> Dict[str, Any]:
+    """A table payload of roughly ``size`` bytes when serialized."""
+    rows = max(1, size // 100)
+    return {"version": 1, "data": {f"k{i}": make_row(i, 100) for i in range(rows)}}
+
+
+def human(size: int) -> str:
+    for unit, scale in (("MB", 1024 * 1024), ("KB", 1024)):
+        if size >= scale:
+            return f"{size // scale}{unit}"
+    return f"{size}B"
+
+
+def suite_memory_store(sizes: Dict[str, tuple]) -> Iterator[Case]:
+    for rows in sizes["rows"]:
+        for payload in sizes["payload"]:
+            tag = f"[rows={rows},payload={human(payload)}]"
+            keys = [f"k{i}" for i in range(rows)]
+            # Writes put each key's own row back, so later cases see the same data
+            values = [make_row(i, payload) for i in range(rows)]
+            store = MemoryStore()
+            store.store_many("t", dict(zip(keys, values)))
+
+            yield "memory_store.get_row" + tag, lambda i: store.get_data("t", keys[i % rows]), 1
+            yield ("memory_store.store_row" + tag,
+                   lambda i: store.store_data("t", keys[i % rows], values[i % rows]), 1)
+            yield ("memory_store.update_row" + tag,
+                   lambda i: store.update_data("t", keys[i % rows], {"name": "x"}), 1)
+
+            batches = [{keys[j % rows]: values[j % rows] for j in range(b * 100, b * 100 + 100)}
+                       for b in range(max(1, rows // 100))]
+            yield ("memory_store.store_many_100" + tag,
+                   lambda i: store.store_many("t", batches[i % len(batches)]), 100)
+
+            def write_then_read_table(i: int) -> None:
+                store.store_data("t", keys[i % rows], values[i % rows])
+                store.get_data("t")  # Published table is copied by the next write
+            yield "memory_store.write+read_table" + tag, write_then_read_table, 1
+
+            yield ("memory_store.changes_since_100" + tag,
+                   lambda i: store.get_changes_since("t", store.get_version("t") - 100), 1)
+            yield ("memory_store.get_page_100" + tag,
+                   lambda i: store.get_page("t", keys[i % rows], 100), 1)
+
+            store.set_indexes("t", {"group": "hash"})
+            yield ("memory_store.query_indexed" + tag,
+                   lambda i: store.query("t", {"group": i % 100}), 1)
+
+
+def suite_encryption(sizes: Dict[str, tuple]) -> Iterator[Case]:
+    key_manager = KeyManager()
+    key_manager.generate_key()
+    manager = EncryptionManager(key_manager.get_key(), key_manager.get_key_hash())
+    for size in sizes["message"]:
+        tag = f"[payload={human(size)}]"
+        payload = make_payload(size)
+        encrypted = manager.encrypt_data(payload)
+        frame = manager.encrypt_frame(payload)
+        timestamp = time.time()
+        signature = manager.generate_signature(payload, timestamp)
+
+        yield "encryption.encrypt_data" + tag, lambda i: manager.encrypt_data(payload), 1
+        yield "encryption.decrypt_data" + tag, lambda i: manager.decrypt_data(encrypted), 1
+        yield "encryption.encrypt_frame" + tag, lambda i: manager.encrypt_frame(payload), 1
+        yield "encryption.decrypt_frame" + tag, lambda i: manager.decrypt_frame(frame), 1
+        yield ("encryption.sign" + tag,
+               lambda i: manager.generate_signature(payload, timestamp), 1)
+        yield ("encryption.validate_signature" + tag,
+               lambda i: manager.validate_signature(payload, timestamp, signature), 1)
+
+
+def suite_tokens(sizes: Dict[str, tuple]) -> Iterator[Case]:
+    key = KeyManager().generate_key()
+    for token_format in ("json", "compact"):
+        tag = f"[format={token_format}]"
+        cached = TokenManager(key, token_format=token_format)
+        uncached = TokenManager(key, token_format=token_format, cache_size=0)
+        token = cached.generate_token("1")
+
+        yield "tokens.generate" + tag, lambda i: cached.generate_token(str(i)), 1
+        yield "tokens.validate_cached" + tag, lambda i: cached.validate_token(token), 1
+        yield "tokens.validate_uncached" + tag, lambda i: uncached.validate_token(token), 1
+
+
+def suite_receiver(sizes: Dict[str, tuple]) -> Iterator[Case]:
+    packets = [{"operation": "create", "table": "t", "key": f"k{i}", "data": {"id": i}}
+               for i in range(100)]
+    for mode in ("inline", "threads", "asyncio"):
+        tag = f"[dispatch={mode}]"
+        receiver = Receiver(dispatch=mode)
+        receiver.on_create("t")(lambda data: True)
+        if mode == "asyncio":
+            async def io_handler(data):
+                await asyncio.sleep(0.001)
+                return True
+        else:
+            def io_handler(data):
+                time.sleep(0.001)
+                return True
+        receiver.on_create("io")(io_handler)
+        io_packets = [dict(packet, table="io") for packet in packets]
+        try:
+            yield ("receiver.process_incoming" + tag,
+                   lambda i: receiver.process_incoming("create", "t", f"k{i % 100}", {}), 1)
+            yield "receiver.batch_100" + tag, lambda i: receiver.process_batch(packets), 100
+            yield ("receiver.batch_100_io_1ms" + tag,
+                   lambda i: receiver.process_batch(io_packets), 100)
+        finally:
+            receiver.close()
+
+
+class _Client:
+    """Keep-alive HTTP client speaking the dsn-sync protocol."""
+
+    def __init__(self, sync: DSNSync):
+        self.sync = sync
+        self.connection = http.client.HTTPConnection("127.0.0.1", sync.server.port)
+        self.token = sync.get_token()
+        self.endpoint = sync.endpoint_manager.get_current_endpoint()
+
+    def request(self, method: str, path: str, body: bytes = None) -> bytes:
+        self.connection.request(method, f"/sync/{self.endpoint}{path}", body=body,
+                                headers={"Authorization": "Bearer " + self.token})
+        response = self.connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{method} {path}: HTTP {response.status}")
+        if response.getheader("X-DSN-Endpoint"):
+            self.endpoint = response.getheader("X-DSN-Endpoint")
+            self.token = response.getheader("X-DSN-Token")
+        return body
+
+    def write(self, key: str, data: Dict[str, Any]) -> bytes:
+        manager = self.sync.encryption_manager
+        packet = {"operation": "create", "table": "t", "key": key, "data": data}
+        timestamp = time.time()
+        body = json.dumps({
+            "data": manager.encrypt_data(packet),
+            "timestamp": timestamp,
+            "signature": manager.generate_signature(packet, timestamp),
+        }).encode("utf-8")
+        return self.request("POST", "", body)
+
+
+def suite_http(sizes: Dict[str, tuple]) -> Iterator[Case]:
+    for mode in ("threaded", "asyncio"):
+        for rows in sizes["http_rows"]:
+            tag = f"[server={mode},rows={rows}]"
+            sync = DSNSync(port=0, server_mode=mode)
+            sync.on_create("t")(lambda data: True)
+            values = [make_row(i, 100) for i in range(rows)]
+            sync.sync_many("t", {f"k{i}": row for i, row in enumerate(values)})
+            for i in range(100):
+                sync.sync("t", f"k{i}", values[i])  # A change log to diff from
+            if not sync.start():
+                raise RuntimeError("Server did not start")
+            try:
+                client = _Client(sync)
+
+                def get_since(i: int) -> bytes:
+                    version = sync.data_manager.get_version("t") - 100
+                    return client.request("GET", f"/t?since={version}")
+
+                yield "http.get_row" + tag, lambda i: client.request("GET", f"/t/k{i % rows}"), 1
+                yield "http.get_table" + tag, lambda i: client.request("GET", "/t"), 1
+                yield "http.get_since_100" + tag, get_since, 1
+                yield ("http.get_page_100" + tag,
+                       lambda i: client.request("GET", f"/t?page_size=100&after=k{i % rows}"), 1)
+                yield "http.stream_table" + tag, lambda i: client.request("GET", "/t?stream=1"), 1
+                yield ("http.post_write" + tag,
+                       lambda i: client.write(f"k{i % rows}", values[i % rows]), 1)
+            finally:
+                sync.stop()
+
+
+def suite_scaling(sizes: Dict[str, tuple],
+                  seconds: float) -> Iterator[Tuple[str, Callable[[], float]]]:
+    """Threaded MemoryStore throughput; each case returns ops/sec (memory_store_scaling)."""
+    for threads in sizes["threads"]:
+        yield (f"scaling.read_write_mix[threads={threads}]",
+               lambda: memory_store_scaling.run(MemoryStore, threads, seconds, sizes["rows"][-1]))
+
+
+SUITES = {
+    "memory_store": suite_memory_store,
+    "encryption": suite_encryption,
+    "tokens": suite_tokens,
+    "receiver": suite_receiver,
+    "http": suite_http,
+}
+
+
+def run(suites, name_filter: str, seconds: float, sizes: Dict[str, tuple]) -> Dict[str, Any]:
+    """Run the selected suites, printing each result as it completes."""
+    width = 72
+    print(format_header(width))
+    results = {}
+    for suite in suites:
+        if suite == "scaling":
+            for name, run_case in suite_scaling(sizes, seconds):
+                if name_filter and name_filter not in name:
+                    continue
+                results[name] = {"ops_per_sec": run_case(), "p50_us": None, "p99_us": None,
+                                 "iterations": None}
+                print(format_result(name, results[name], width), flush=True)
+            continue
+        for name, func, batch in SUITES[suite](sizes):
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = measure(func, seconds=seconds, batch=batch,
+                                    warmup=min(0.2, seconds / 5))
+            print(format_result(name, results[name], width), flush=True)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--suite", default=",".join(list(SUITES) + ["scaling"]),
+                        help="Comma-separated suites to run")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time budget per case")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes and budgets")
+    parser.add_argument("--save", help="Write results to this baseline file")
+    parser.add_argument("--compare", help="Compare results with this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Fractional slowdown reported as a regression")
+    args = parser.parse_args()
+
+    suites = [name.strip() for name in args.suite.split(",") if name.strip()]
+    unknown = [name for name in suites if name not in SUITES and name != "scaling"]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+    sizes = QUICK_SIZES if args.quick else SIZES
+    seconds = min(args.seconds, 0.25) if args.quick else args.seconds
+
+    results = run(suites, args.filter, seconds, sizes)
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"\nBaseline saved to {args.save}")
+    if args.compare:
+        baseline = load_baseline(args.compare)["results"]
+        rows = compare(results, baseline, args.threshold)
+        print("\n" + format_comparison(rows))
+        if any(row["status"] == "REGRESSION" for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
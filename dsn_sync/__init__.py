@@ -16,9 +16,22 @@ from .security.encryption import EncryptionManager
 from .security.token_manager import TokenManager
 from .server.embedded_server import EmbeddedServer
 from .server.endpoint_manager import EndpointManager
+from .server.worker_pool import WorkerPool
+from .server.sync_handler import SyncRequestHandler
+from .server.response_cache import ResponseCache
+from .core.codecs import get_codec
+from .core.persistence import StorePersistence
+from .core.read_through import ReadThroughCache
+from .core.metrics import Metrics
 from .database.connector import DatabaseConnector
 from .database.schema_updater import SchemaUpdater
-from .config.settings import DEFAULT_PORT
+from .database.write_behind import WriteBehindQueue
+from .config.settings import (
+    DEFAULT_PORT, SERVER_MODE, SERVER_MAX_WORKERS, SERVER_MAX_CONNECTIONS, SERVER_WORKERS,
+    SERIALIZATION_CODEC, PERSISTENCE_ENABLED, WAL_DURABILITY, WRITE_BEHIND_ENABLED,
+    READ_THROUGH_ENABLED, COMPACT_ROWS, PAGE_SIZE, HANDLER_DISPATCH, METRICS_ENABLED,
+    METRICS_ENDPOINT
+)
 
 
 class DSNSync:
@@ -28,35 +41,104 @@ class DSNSync:
     Provides backend-frontend data synchronization without API endpoints.
     """
     
-    def __init__(self, port: int = DEFAULT_PORT, db_connection_string: str = None):
+    def __init__(self, port: int = DEFAULT_PORT, db_connection_string: str = None,
+                 server_mode: str = SERVER_MODE, max_workers: int = SERVER_MAX_WORKERS,
+                 max_connections: int = SERVER_MAX_CONNECTIONS,
+                 workers: int = SERVER_WORKERS, codec: str = SERIALIZATION_CODEC,
+                 persistence: bool = PERSISTENCE_ENABLED, durability: str = WAL_DURABILITY,
+                 write_behind: bool = WRITE_BEHIND_ENABLED,
+                 read_through: bool = READ_THROUGH_ENABLED,
+                 handler_dispatch: str = HANDLER_DISPATCH,
+                 metrics: bool = METRICS_ENABLED,
+                 metrics_endpoint: bool = METRICS_ENDPOINT):
         """
         Initialize dsn-sync.
         
         Args:
             port: Port for embedded server (default: 3000)
-            db_connection_string: Database connection string (optional)
+            db_connection_string: Database connection string (optional),
+                e.g. "sqlite:///app.db"
+            server_mode: Server engine - "serial", "threaded" or "asyncio"
+            max_workers: Worker threads serving requests
+            max_connections: Open connections accepted before rejecting with 503
+            workers: Server processes sharing the port (POSIX only). With
+                more than one, this process becomes the single writer and
+                replicates data to the workers.
+            codec: Serialization codec - "json", or "orjson"/"msgpack" when
+                installed. Clients may negotiate another wire format per
+                request with the ``X-DSN-Codec`` header.
+            persistence: Keep a write-ahead log and snapshots of the
+                in-memory data under ``DATA_DIR`` and restore them here
+            durability: Log fsync policy - "none", "batch" (group commit
+                every ``WAL_FSYNC_INTERVAL``) or "sync" (every write)
+            write_behind: Also write accepted frontend writes to the
+                database, in batches on a background thread after the
+                request is acknowledged
+            read_through: Load single rows missing from memory from the
+                database on demand and evict cold rows beyond
+                ``READ_THROUGH_MAX_ROWS`` / ``READ_THROUGH_MAX_BYTES``
+            handler_dispatch: Where on_create/on_update/on_delete handlers
+                run - "inline" (request thread), "threads" (pool) or
+                "asyncio" (event loop); the last two run different rows in
+                parallel and keep each row's writes in order
+            metrics: Time request stages (token, decrypt, signature,
+                handler, apply, read, encrypt) and MemoryStore lock waits;
+                read them with ``get_metrics()``
+            metrics_endpoint: Also serve the metrics as Prometheus text at
+                ``METRICS_PATH`` on the embedded server (unauthenticated)
         """
+        self.codec = get_codec(codec)
+        
         # Initialize components
         self.key_manager = KeyManager()
         self.endpoint_manager = EndpointManager()
+        self.metrics = Metrics(enabled=metrics)
         self.memory_store = MemoryStore()
-        self.receiver = Receiver()
+        self.memory_store.set_metrics(self.metrics)
+        self.receiver = Receiver(dispatch=handler_dispatch)
+        self.metrics.gauge("handler_pending", self.receiver.dispatcher.pending)
         
         # Database
         self.db_connector = DatabaseConnector(db_connection_string)
         self.schema_updater = SchemaUpdater(self.db_connector)
+        if db_connection_string:
+            self.db_connector.connect()
         
         # Core managers
         self.schema_manager = SchemaManager(self.schema_updater)
-        self.data_manager = DataManager(self.memory_store)
-        self.sync_manager = SyncManager(self.key_manager, self.endpoint_manager)
+        self.data_manager = DataManager(self.memory_store, self.db_connector, self.schema_manager)
+        self.write_behind: WriteBehindQueue = None
+        if write_behind:
+            self.write_behind = WriteBehindQueue(self.db_connector,
+                                                 self.data_manager.get_key_column)
+            self.write_behind.open()
+            self.metrics.gauge("write_behind_pending",
+                               lambda: self.write_behind.get_stats()["pending"])
+        if read_through:
+            self.data_manager.read_through = ReadThroughCache(
+                self.memory_store, self.db_connector, self.data_manager.get_key_column,
+                write_behind=self.write_behind
+            )
+            self.data_manager.read_through.attach()
+        self.sync_manager = SyncManager(self.key_manager, self.endpoint_manager, self.codec)
         
         # Security
         self.encryption_manager: EncryptionManager = None
         
         # Server
-        self.server = EmbeddedServer(port=port)
+        self.server = EmbeddedServer(
+            port=port,
+            mode=server_mode,
+            max_workers=max_workers,
+            max_connections=max_connections,
+            metrics=self.metrics if metrics_endpoint else None
+        )
         self.port = port
+        self.workers = workers
+        self._worker_pool: WorkerPool = None
+        self.response_cache = ResponseCache()
+        self.response_cache.attach(self.memory_store)
+        self.request_handler = SyncRequestHandler(self)
         
         # Initialize sync system
         self.sync_manager.init_sync()
@@ -64,8 +146,18 @@ class DSNSync:
         # Setup encryption
         key = self.key_manager.get_key()
         if key:
-            self.encryption_manager = EncryptionManager(key)
-            self.token_manager = TokenManager(key)
+            self.encryption_manager = EncryptionManager(key, self.key_manager.get_key_hash(),
+                                                        codec=self.codec)
+            self.token_manager = TokenManager(key, codec=self.codec)
+        
+        # Restore persisted data and log further writes
+        self.persistence: StorePersistence = None
+        if persistence:
+            self.persistence = StorePersistence(self.memory_store, durability=durability)
+            self.persistence.open()
+            if read_through:
+                # A snapshot may hold tables with rows evicted to the database
+                self.memory_store.mark_partial()
     
     def get_url(self) -> str:
         """
@@ -82,12 +174,20 @@ class DSNSync:
         
         Args:
             table_name: Name of the table
-            schema: Schema dictionary with 'key' and 'fields'
+            schema: Schema dictionary with 'key' and 'fields', and optionally
+                'compact' to hold rows in memory as tuples in field order
+                (default: ``COMPACT_ROWS``; reads still return dicts) and
+                'indexes', a list of fields or {field: "hash" | "sorted"}
+                for ``query``
         
         Returns:
             True if successful
         """
-        return self.schema_manager.define_table(table_name, schema)
+        defined = self.schema_manager.define_table(table_name, schema)
+        if schema.get("compact", COMPACT_ROWS):
+            self.memory_store.set_layout(table_name, schema["fields"])
+        self.memory_store.set_indexes(table_name, self.schema_manager.get_indexes(table_name))
+        return defined
     
     def sync(self, table_name: str, key: str, data: dict) -> bool:
         """
@@ -103,6 +203,92 @@ class DSNSync:
         """
         return self.data_manager.sync(table_name, key, data)
     
+    def sync_many(self, table_name: str, items: dict) -> bool:
+        """
+        Sync many rows to frontend in one store operation.
+        
+        Args:
+            table_name: Name of the table
+            items: Dictionary of {key: data}
+        
+        Returns:
+            True if successful
+        """
+        return self.data_manager.sync_many(table_name, items)
+    
+    def delete_many(self, table_name: str, keys: list) -> int:
+        """
+        Delete many rows from the frontend view in one store operation.
+        
+        Args:
+            table_name: Name of the table
+            keys: Keys to delete
+        
+        Returns:
+            Number of rows deleted
+        """
+        return self.data_manager.delete_many(table_name, keys)
+    
+    def get_changes_since(self, table_name: str, version: int) -> dict:
+        """
+        Get changes to a table after a version (delta sync).
+        
+        Args:
+            table_name: Name of the table
+            version: Table version the client already has
+        
+        Returns:
+            {"version", "full": False, "changes": {key: row or None}}, or
+            {"version", "full": True, "data": table} when the change log
+            no longer reaches back to ``version``
+        """
+        return self.data_manager.get_changes_since(table_name, version)
+    
+    def get_page(self, table_name: str, after: str = None, page_size: int = PAGE_SIZE) -> dict:
+        """
+        Get a page of a table in key order (keyset pagination).
+        
+        Args:
+            table_name: Name of the table
+            after: ``next`` cursor of the previous page (None: first page)
+            page_size: Maximum rows in the page
+        
+        Returns:
+            {"version", "data": {key: row}, "next": cursor or None}
+        """
+        return self.data_manager.get_page(table_name, after, page_size)
+    
+    def iter_pages(self, table_name: str, page_size: int = PAGE_SIZE):
+        """
+        Iterate over a whole table a page at a time.
+        
+        Args:
+            table_name: Name of the table
+            page_size: Maximum rows per page
+        
+        Returns:
+            Iterator of pages as returned by ``get_page``, all from the same
+            table version
+        """
+        return self.data_manager.iter_pages(table_name, None, page_size)
+    
+    def query(self, table_name: str, filters: dict = None, order=None,
+              limit: int = None) -> list:
+        """
+        Query rows in memory, using indexes declared in the table schema.
+        
+        Args:
+            table_name: Name of the table
+            filters: {field: value} for equality, or {field: {op: value}}
+                with ops eq, ne, gt, gte, lt, lte, in
+            order: Field name, "-field" for descending, or a list of them
+            limit: Maximum rows returned
+        
+        Returns:
+            List of (key, row) pairs
+        """
+        return self.data_manager.query(table_name, filters, order, limit)
+    
     def on_create(self, table_name: str):
         """
         Decorator for create event handler.
@@ -143,7 +329,29 @@ class DSNSync:
         Returns:
             True if server started successfully
         """
-        return self.server.start_server()
+        if self.persistence is not None and not self.persistence.is_open():
+            # Closed by stop(); writes made since then go into a snapshot
+            self.persistence.open(restore=False)
+        if self.workers > 1:
+            self._worker_pool = WorkerPool(self, self.workers)
+            return self._worker_pool.start()
+        return self._start_local_server()
+    
+    def _start_local_server(self) -> bool:
+        """Start embedded server in the current process."""
+        self.data_manager.notifier.open()
+        return self.server.start_server(self.request_handler)
+    
+    def _stop_local_server(self) -> bool:
+        """Stop embedded server in the current process."""
+        # Release parked long-polls and event streams first
+        self.data_manager.notifier.close()
+        stopped = self.server.stop_server()
+        self.receiver.close()
+        # Then write what the last requests queued for the database
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        return stopped
     
     def stop(self) -> bool:
         """
@@ -152,8 +360,39 @@ class DSNSync:
         Returns:
             True if server stopped successfully
         """
-        return self.server.stop_server()
+        if self._worker_pool is not None:
+            stopped = self._worker_pool.stop()
+            self._worker_pool = None
+        else:
+            stopped = self._stop_local_server()
+        # After the server, so the last requests' writes are logged too
+        if self.persistence is not None:
+            self.persistence.close()
+        return stopped
     
+    def get_compression_stats(self) -> dict:
+        """
+        Get payload compression statistics.
+
+        Returns:
+            {algorithm: {"payloads", "compressed", "bytes_in", "bytes_out",
+            "ratio", ...}} for each enabled algorithm
+        """
+        if self.encryption_manager is None:
+            return {}
+        return self.encryption_manager.get_compression_stats()
+
+    def get_metrics(self) -> dict:
+        """
+        Get per-stage latency metrics for this process.
+
+        Returns:
+            {"enabled", "stages": {stage: {"count", "sum", "p50", "p99",
+            "max"}}, "counters", "gauges"}; durations in seconds,
+            percentiles estimated from histogram buckets
+        """
+        return self.metrics.snapshot()
+
     def get_token(self) -> str:
         """
         Get authentication token for frontend.
@@ -4,6 +4,17 @@
 DEFAULT_PORT = 3000
 SERVER_HOST = "0.0.0.0"
 
+# Server Concurrency
+SERVER_MODE = "threaded"  # "serial", "threaded" or "asyncio"
+SERVER_MAX_WORKERS = 32  # Worker threads serving requests
+SERVER_MAX_CONNECTIONS = 1024  # Open connections before new ones get 503
+SERVER_WORKERS = 1  # Server processes sharing the port (SO_REUSEPORT)
+WORKER_WRITE_TIMEOUT = 10.0  # Seconds a worker process waits for the writer to apply its write
+
+# HTTP/1.1 Keep-Alive
+SERVER_KEEPALIVE_TIMEOUT = 15  # Seconds an idle connection stays open
+SERVER_MAX_KEEPALIVE_REQUESTS = 1000  # Requests per connection before closing
+
 # Sync Key Configuration
 SYNC_KEY_FIELD_NAME = "dsn_sync_key"
 
@@ -13,13 +24,83 @@ ENDPOINT_ROTATION_COUNT = 100  # Rotate endpoint after 100 requests
 # Encryption
 ENCRYPTION_ALGORITHM = "AES-256"
 KEY_SIZE = 32  # 256 bits
+DERIVED_KEY_CACHE_SIZE = 256  # PBKDF2-derived keys cached per process
+KEYRING_SIZE = 3  # Active key plus previous keys still accepted for decryption
+
+# Serialization
+SERIALIZATION_CODEC = "json"  # "json", or "orjson"/"msgpack" when installed
+
+# Compression (before encryption, for clients sending X-DSN-Compression)
+COMPRESSION_ALGORITHMS = ("zlib", "lzma", "bz2")  # Enabled algorithms; () disables
+COMPRESSION_LEVEL = 6  # zlib/bz2 level or lzma preset
+COMPRESSION_THRESHOLD = 1024  # Payloads smaller than this many bytes are stored as-is
+COMPRESSION_MAX_SIZE = 64 * 1024 * 1024  # Largest decompressed WRITE packet accepted
 
 # Token Configuration
 TOKEN_EXPIRY_HOURS = 24
 TOKEN_SECRET_LENGTH = 32
+SIGNATURE_MAX_AGE = 300  # Seconds a signed WRITE packet stays valid
+TOKEN_FORMAT = "json"  # "json" or "compact" (fixed-layout binary) for new tokens
+TOKEN_CACHE_SIZE = 4096  # Verified tokens remembered until they expire
+
+# Handler Dispatch (on_create / on_update / on_delete)
+HANDLER_DISPATCH = "inline"  # "inline" (request thread), "threads" (pool) or "asyncio" (event loop)
+HANDLER_MAX_WORKERS = 32  # Threads running handlers for different rows at once
+HANDLER_TIMEOUT = 30.0  # Seconds a write waits for its handler before it is rejected
+
+# Metrics (per-stage latency histograms, counters and queue-depth gauges)
+METRICS_ENABLED = False  # Off: instrumented paths only check a flag
+METRICS_ENDPOINT = False  # Serve Prometheus text at METRICS_PATH on the embedded server
+METRICS_PATH = "/metrics"
+METRICS_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                   0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+
+# Delta Sync
+CHANGE_LOG_SIZE = 10000  # Changes kept per table before clients must resync
+
+# Row Storage
+COMPACT_ROWS = False  # Store rows of defined tables as tuples (schemas may set "compact")
+COMPACT_ROWS_MAX_SHAPES = 64  # Distinct field layouts packed per table; others stay dicts
+
+# Pagination
+PAGE_SIZE = 1000  # Rows per page (get_page default and each streamed chunk)
+MAX_PAGE_SIZE = 10000  # Largest page a client may request with ?page_size=
+
+# Server Push
+LONG_POLL_MAX_WAIT = 30  # Max seconds a ?since=&wait= request is parked
+SSE_HEARTBEAT_INTERVAL = 15  # Seconds between keep-alive comments on event streams
+
+# Response Cache
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Encoded table responses kept in memory (0 disables)
+
+# Persistence (write-ahead log and snapshots under DATA_DIR)
+PERSISTENCE_ENABLED = False
+WAL_DURABILITY = "batch"  # "none" (OS buffers), "batch" (group fsync) or "sync" (fsync per write)
+WAL_FSYNC_INTERVAL = 0.05  # Seconds between group commits in "batch" mode
+SNAPSHOT_WAL_SIZE = 64 * 1024 * 1024  # Compact into a snapshot once the log grows past this
+SNAPSHOT_INTERVAL = 3600  # Also compact a non-empty log at least this often, in seconds (0: never)
 
 # Database Configuration
 DB_CONNECTION_TIMEOUT = 30
+DB_POOL_SIZE = 8  # Connections kept per database
+DB_STATEMENT_CACHE_SIZE = 256  # Compiled statements cached per connection
+DB_SQLITE_WAL = True  # Put SQLite files in WAL mode (readers do not block the writer)
+
+# Write-behind (accepted frontend writes copied to the database in the background)
+WRITE_BEHIND_ENABLED = False
+WRITE_BEHIND_QUEUE_SIZE = 10000  # Pending writes before writers block
+WRITE_BEHIND_ENQUEUE_TIMEOUT = 5.0  # Seconds a writer waits on a full queue before dropping
+WRITE_BEHIND_BATCH_SIZE = 500  # Writes committed per transaction
+WRITE_BEHIND_INTERVAL = 0.05  # Seconds to gather a batch
+WRITE_BEHIND_MAX_RETRIES = 5
+WRITE_BEHIND_RETRY_DELAY = 0.1  # Seconds before the first retry (doubles each time)
+
+# Read-through (rows loaded from the database on demand, cold rows evicted)
+READ_THROUGH_ENABLED = False
+READ_THROUGH_MAX_ROWS = 1000000  # Rows kept in memory before evicting (0: no limit)
+READ_THROUGH_MAX_BYTES = 512 * 1024 * 1024  # Estimated row memory before evicting (0: no limit)
+READ_THROUGH_NEGATIVE_TTL = 30.0  # Seconds a key missing from the database is remembered
+READ_THROUGH_NEGATIVE_SIZE = 100000  # Missing keys remembered
 
 # File Paths
 DATA_DIR = ".dsn_sync"
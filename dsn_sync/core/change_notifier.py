@@ -0,0 +1,118 @@
+"""Wake waiting readers when table versions advance."""
+
+import asyncio
+import threading
+from typing import Dict, List, Callable, Optional
+from .memory_store import MemoryStore
+
+
+class ChangeNotifier:
+    """
+    Lets readers wait for a table to move past a version.
+
+    Registered as a ``MemoryStore`` listener, so every write (including
+    ``DataManager.sync()``) wakes the readers parked on that table. Waiting
+    works from threads (``wait``) and from an event loop (``wait_async``);
+    the async form parks a future, not a thread.
+    """
+
+    def __init__(self, memory_store: MemoryStore):
+        """Initialize notifier and subscribe to store writes."""
+        self.memory_store = memory_store
+        self._waiters: Dict[str, List[Callable]] = {}  # {table_name: [wake callbacks]}
+        self._lock = threading.Lock()
+        self._closed = False
+        memory_store.add_listener(self._on_write)
+
+    def wait(self, table_name: str, version: int, timeout: float) -> bool:
+        """Block until the table version exceeds ``version``; True if it did."""
+        if self.has_changed(table_name, version):
+            return True
+
+        event = threading.Event()
+        if not self._add_waiter(table_name, event.set):
+            return False
+        try:
+            # Re-check after registering so a write in between is not missed
+            if not self.has_changed(table_name, version):
+                event.wait(timeout)
+        finally:
+            self._remove_waiter(table_name, event.set)
+        return self.has_changed(table_name, version)
+
+    async def wait_async(self, table_name: str, version: int, timeout: float) -> bool:
+        """Wait on the running event loop; True if the table changed."""
+        if self.has_changed(table_name, version):
+            return True
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve():
+            if not future.done():
+                future.set_result(None)
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(resolve)
+            except RuntimeError:
+                pass  # Loop already closed
+
+        if not self._add_waiter(table_name, wake):
+            return False
+        try:
+            if not self.has_changed(table_name, version):
+                await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._remove_waiter(table_name, wake)
+        return self.has_changed(table_name, version)
+
+    def has_changed(self, table_name: str, version: int) -> bool:
+        """Check if the table has moved past ``version``."""
+        return self.memory_store.get_version(table_name) > version
+
+    def open(self) -> None:
+        """Accept waiters again after ``close``."""
+        with self._lock:
+            self._closed = False
+
+    def close(self) -> None:
+        """Wake every waiter and refuse new ones (server shutdown)."""
+        with self._lock:
+            self._closed = True
+            waiters = [wake for wakes in self._waiters.values() for wake in wakes]
+            self._waiters.clear()
+        for wake in waiters:
+            wake()
+
+    def is_closed(self) -> bool:
+        """Check if the notifier has been closed."""
+        return self._closed
+
+    def _add_waiter(self, table_name: str, wake: Callable) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            self._waiters.setdefault(table_name, []).append(wake)
+            return True
+
+    def _remove_waiter(self, table_name: str, wake: Callable) -> None:
+        with self._lock:
+            waiters = self._waiters.get(table_name)
+            if waiters and wake in waiters:
+                waiters.remove(wake)
+                if not waiters:
+                    del self._waiters[table_name]
+
+    def _on_write(self, operation: str, table_name: Optional[str], key, data) -> None:
+        """Wake readers of the written table (all tables for store-wide writes)."""
+        with self._lock:
+            if table_name is None:
+                waiters = [wake for wakes in self._waiters.values() for wake in wakes]
+                self._waiters.clear()
+            else:
+                waiters = self._waiters.pop(table_name, [])
+        for wake in waiters:
+            wake()
@@ -0,0 +1,133 @@
+"""Serialization codecs for payloads, signatures and tokens."""
+
+import json
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Codec:
+    """
+    Turns payloads into bytes and back.
+
+    ``wire`` names the format seen by clients (negotiated with the
+    ``X-DSN-Codec`` header); several codecs may share one wire format.
+    ``dumps_canonical`` is the byte-stable form that signatures and tokens
+    are computed over, identical for every codec of the same wire format.
+    """
+
+    name = ""
+    wire = ""
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize data."""
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        """Deserialize data."""
+        raise NotImplementedError
+
+    def dumps_canonical(self, data: Any) -> bytes:
+        """Serialize with sorted keys for signing."""
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """Standard library JSON."""
+
+    name = "json"
+    wire = "json"
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data.decode('utf-8') if isinstance(data, bytes) else data)
+
+    def dumps_canonical(self, data: Any) -> bytes:
+        return json.dumps(data, sort_keys=True).encode('utf-8')
+
+
+class OrjsonCodec(JsonCodec):
+    """JSON through orjson (same wire format and signatures as ``json``)."""
+
+    name = "orjson"
+
+    def dumps(self, data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack binary encoding."""
+
+    name = "msgpack"
+    wire = "msgpack"
+
+    def dumps(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+    def dumps_canonical(self, data: Any) -> bytes:
+        return msgpack.packb(_sort_keys(data), use_bin_type=True)
+
+
+def _sort_keys(data: Any) -> Any:
+    """Recursively order dict keys (msgpack keeps insertion order)."""
+    if isinstance(data, dict):
+        return {key: _sort_keys(data[key]) for key in sorted(data)}
+    if isinstance(data, (list, tuple)):
+        return [_sort_keys(item) for item in data]
+    return data
+
+
+CODECS: Dict[str, Codec] = {"json": JsonCodec()}
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec()
+if msgpack is not None:
+    CODECS["msgpack"] = MsgpackCodec()
+
+
+def get_codec(name: str) -> Codec:
+    """Get an installed codec by name; raises ValueError otherwise."""
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Codec not available: {name} (installed: {', '.join(CODECS)})")
+    return codec
+
+
+def available_codecs() -> List[str]:
+    """Get names of installed codecs."""
+    return list(CODECS)
+
+
+def negotiate_codec(requested: Optional[str], default: Codec) -> Codec:
+    """
+    Pick the codec for a client asking for wire format ``requested``.
+
+    The default codec wins when it speaks the requested format (or none was
+    asked for); otherwise the fastest installed codec for that format is
+    used, falling back to the default for unknown formats.
+    """
+    if not requested:
+        return default
+    requested = requested.strip().lower()
+    if requested in (default.wire, default.name):
+        return default
+    for name in ("orjson", "json", "msgpack"):
+        codec = CODECS.get(name)
+        if codec is not None and requested in (codec.wire, codec.name):
+            return codec
+    return default
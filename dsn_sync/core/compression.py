@@ -0,0 +1,120 @@
+"""Payload compression applied before encryption."""
+
+import bz2
+import lzma
+import threading
+import zlib
+from typing import Dict, Any, Optional, Iterable
+from ..config.settings import COMPRESSION_LEVEL, COMPRESSION_THRESHOLD, COMPRESSION_MAX_SIZE
+
+# Compressed plaintext starts with one byte naming the algorithm (0: stored).
+ALGORITHM_IDS = {"zlib": 1, "bz2": 2, "lzma": 3}
+_ALGORITHM_NAMES = {algorithm_id: name for name, algorithm_id in ALGORITHM_IDS.items()}
+STORED = 0
+
+
+def _compress(name: str, data: bytes, level: int) -> bytes:
+    if name == "zlib":
+        return zlib.compress(data, level)
+    if name == "bz2":
+        return bz2.compress(data, max(level, 1))
+    return lzma.compress(data, preset=level)
+
+
+def _decompressor(name: str):
+    if name == "zlib":
+        return zlib.decompressobj()
+    if name == "bz2":
+        return bz2.BZ2Decompressor()
+    return lzma.LZMADecompressor()
+
+
+def decompress(data: bytes, max_size: int = COMPRESSION_MAX_SIZE) -> bytes:
+    """Unpack plaintext written by any ``Compressor``; raises ValueError if invalid."""
+    if not data:
+        raise ValueError("Empty compressed payload")
+    algorithm_id, body = data[0], data[1:]
+    if algorithm_id == STORED:
+        return body
+    name = _ALGORITHM_NAMES.get(algorithm_id)
+    if name is None:
+        raise ValueError(f"Unknown compression id: {algorithm_id}")
+    try:
+        plaintext = _decompressor(name).decompress(body, max_size + 1)
+    except (zlib.error, OSError, lzma.LZMAError) as e:
+        raise ValueError(f"Invalid {name} payload") from e
+    if len(plaintext) > max_size:
+        raise ValueError("Decompressed payload too large")
+    return plaintext
+
+
+class Compressor:
+    """
+    Compresses serialized payloads above a size threshold.
+
+    Output is one algorithm byte followed by the (possibly stored) payload,
+    so small payloads skip compression without changing the format. Keeps
+    counters of payloads seen and bytes before/after for ratio stats.
+    """
+
+    def __init__(self, name: str, level: int = COMPRESSION_LEVEL,
+                 threshold: int = COMPRESSION_THRESHOLD):
+        """Initialize compressor for ``zlib``, ``bz2`` or ``lzma``."""
+        if name not in ALGORITHM_IDS:
+            raise ValueError(f"Unknown compression algorithm: {name}")
+        self.name = name
+        self.level = level
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._payloads = 0
+        self._compressed = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress ``data`` if it reaches the threshold and actually shrinks."""
+        packed = None
+        if len(data) >= self.threshold:
+            compressed = _compress(self.name, data, self.level)
+            if len(compressed) < len(data):
+                packed = bytes((ALGORITHM_IDS[self.name],)) + compressed
+        if packed is None:
+            packed = bytes((STORED,)) + data
+
+        with self._lock:
+            self._payloads += 1
+            self._bytes_in += len(data)
+            self._bytes_out += len(packed)
+            if packed[0] != STORED:
+                self._compressed += 1
+        return packed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counters and the achieved compression ratio."""
+        with self._lock:
+            return {
+                "algorithm": self.name,
+                "level": self.level,
+                "threshold": self.threshold,
+                "payloads": self._payloads,
+                "compressed": self._compressed,
+                "bytes_in": self._bytes_in,
+                "bytes_out": self._bytes_out,
+                "ratio": self._bytes_in / self._bytes_out if self._bytes_out else 1.0,
+            }
+
+
+def negotiate_compressor(requested: Optional[str],
+                         compressors: Dict[str, Compressor]) -> Optional[Compressor]:
+    """Pick the first algorithm in a client's comma-separated list that is enabled."""
+    if not requested:
+        return None
+    for name in _split(requested):
+        compressor = compressors.get(name)
+        if compressor is not None:
+            return compressor
+    return None
+
+
+def _split(value: str) -> Iterable[str]:
+    return (part.split(";")[0].strip().lower() for part in value.split(","))
@@ -1,44 +1,153 @@
 """Data synchronization manager (READ operations)."""
 
-from typing import Dict, Any, Optional
-from .memory_store import MemoryStore
+from typing import Dict, Any, Optional, List, Iterator, Tuple, Union
+from ..config.settings import SYNC_KEY_FIELD_NAME, PAGE_SIZE
+from .memory_store import MemoryStore, TableSnapshot
+from .change_notifier import ChangeNotifier
+from .indexes import run_query
 
 
 class DataManager:
-    """Manages data synchronization to frontend."""
+    """
+    Manages data synchronization to frontend.
     
-    def __init__(self, memory_store: MemoryStore):
-        """Initialize data manager."""
+    With read-through enabled, a table that has had rows loaded from or
+    evicted to the database is partial in memory; whole-table reads, full
+    resyncs, pages and queries of it are answered from the database rows
+    overlaid with the rows in memory.
+    """
+    
+    def __init__(self, memory_store: MemoryStore, db_connector=None, schema_manager=None):
+        """Initialize data manager (database and schemas enable read fallback)."""
         self.memory_store = memory_store
+        self.db_connector = db_connector
+        self.schema_manager = schema_manager
+        self.notifier = ChangeNotifier(memory_store)
+        self.read_through = None  # ReadThroughCache, when enabled
     
     def sync(self, table_name: str, key: str, data: Dict[str, Any]) -> bool:
         """Sync data to frontend (store in memory for READ operations)."""
         try:
             self.memory_store.store_data(table_name, key, data)
+            self._evict_cold_rows()
+            return True
+        except Exception:
+            return False
+    
+    def sync_many(self, table_name: str, items: Dict[str, Dict[str, Any]]) -> bool:
+        """Sync many rows at once (one store lock acquisition)."""
+        try:
+            self.memory_store.store_many(table_name, items)
+            self._evict_cold_rows()
             return True
         except Exception:
             return False
     
     def get_data(self, table_name: str, key: Optional[str] = None) -> Any:
         """Get data from memory or database."""
+        if key and self.read_through is not None and self.db_connector.is_connected():
+            return self.read_through.get(table_name, key)
+        
         # First try memory
         data = self.memory_store.get_data(table_name, key)
         if data is not None:
             return data
         
-        # If not in memory, would fetch from database
-        # This will be implemented based on user's database
-        return None
+        # Single rows fall back to the database
+        if key is None or self.db_connector is None or not self.db_connector.is_connected():
+            return None
+        return self._fetch_from_database(table_name, key)
+    
+    def get_key_column(self, table_name: str) -> str:
+        """Get the database column holding row keys (schema key, else the sync key)."""
+        schema = self.schema_manager.get_schema(table_name) if self.schema_manager else None
+        return schema["key"] if schema else SYNC_KEY_FIELD_NAME
+    
+    def _fetch_from_database(self, table_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Read one row by its key column."""
+        try:
+            return self.db_connector.fetch_row(table_name, self.get_key_column(table_name), key)
+        except Exception:
+            return None
+    
+    def _evict_cold_rows(self) -> None:
+        """Keep memory within the read-through budget after writes."""
+        if self.read_through is not None:
+            self.read_through.evict_if_needed()
     
     def update_memory(self, table_name: str, key: str, data: Dict[str, Any]) -> bool:
         """Update in-memory registry."""
         return self.memory_store.update_data(table_name, key, data)
     
     def get_all_data(self, table_name: str) -> Dict[str, Any]:
-        """Get all data for a table."""
+        """Get all data for a table (read-only snapshot, not a copy)."""
+        if self._is_partial(table_name):
+            return self._full_table(table_name)
         return self.memory_store.get_data(table_name) or {}
     
+    def query(self, table_name: str, filters: Optional[Dict[str, Any]] = None,
+              order: Union[str, List[str], None] = None,
+              limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Get [(key, row)] matching filters from memory (see ``MemoryStore.query``)."""
+        if self._is_partial(table_name):
+            return run_query(self._full_table(table_name), filters, order, limit)
+        return self.memory_store.query(table_name, filters, order, limit)
+    
+    def get_page(self, table_name: str, after: Optional[str] = None,
+                 page_size: int = PAGE_SIZE) -> Dict[str, Any]:
+        """Get one page of a table in key order (see ``MemoryStore.iter_pages``)."""
+        return next(self.iter_pages(table_name, after, page_size))
+    
+    def iter_pages(self, table_name: str, after: Optional[str] = None,
+                   page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Iterate over pages of one snapshot of a table."""
+        if self._is_partial(table_name):
+            return MemoryStore.paginate(self._full_table(table_name), after, page_size)
+        return self.memory_store.iter_pages(table_name, after, page_size)
+    
+    def get_changes_since(self, table_name: str, version: int) -> Dict[str, Any]:
+        """Get changes to a table after ``version`` (or a full resync)."""
+        changes = self.memory_store.get_changes_since(table_name, version)
+        if changes["full"] and self._is_partial(table_name):
+            table = self._full_table(table_name)
+            changes = {"version": table.version, "full": True, "data": table}
+        return changes
+    
+    def _is_partial(self, table_name: str) -> bool:
+        """Whether whole-table reads must include database rows missing from memory."""
+        return (self.read_through is not None and self.memory_store.is_partial(table_name)
+                and self.db_connector.is_connected())
+    
+    def _full_table(self, table_name: str) -> TableSnapshot:
+        """Database rows of a partial table overlaid with the rows in memory."""
+        write_behind = self.read_through.write_behind
+        if write_behind is not None:
+            write_behind.flush()  # Queued writes and deletes reach the database first
+        memory = self.memory_store.get_data(table_name)
+        version = memory.version if memory is not None else self.get_version(table_name)
+        rows = self.db_connector.fetch_all(table_name, self.get_key_column(table_name))
+        rows.update(memory or {})
+        return TableSnapshot(rows, version)
+    
+    def wait_for_changes(self, table_name: str, version: int, timeout: float) -> Dict[str, Any]:
+        """Block until the table moves past ``version`` (or timeout), then get changes."""
+        self.notifier.wait(table_name, version, timeout)
+        return self.get_changes_since(table_name, version)
+    
+    async def wait_for_changes_async(self, table_name: str, version: int,
+                                     timeout: float) -> bool:
+        """Wait on the running event loop; True if the table changed."""
+        return await self.notifier.wait_async(table_name, version, timeout)
+    
+    def get_version(self, table_name: str) -> int:
+        """Get current version of a table."""
+        return self.memory_store.get_version(table_name)
+    
     def delete_data(self, table_name: str, key: str) -> bool:
         """Delete data from memory."""
         return self.memory_store.delete_data(table_name, key)
+    
+    def delete_many(self, table_name: str, keys: List[str]) -> int:
+        """Delete many rows at once; return number deleted."""
+        return self.memory_store.delete_many(table_name, keys)
 
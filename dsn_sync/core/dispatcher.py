@@ -0,0 +1,247 @@
+"""Dispatch of receiver event handlers off the request thread."""
+
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from ..config.settings import HANDLER_DISPATCH, HANDLER_MAX_WORKERS
+
+DISPATCH_MODES = ("inline", "threads", "asyncio")
+
+
+async def _await(awaitable) -> Any:
+    return await awaitable
+
+
+class HandlerDispatcher:
+    """
+    Runs handlers in parallel across rows and in order within a row.
+
+    ``submit`` returns a ``concurrent.futures.Future`` of the handler's
+    result. Calls for the same row (``(table, key)``) run one at a time, in
+    the order they were submitted; calls for different rows run
+    concurrently. Modes:
+
+    - ``"inline"``: the submitting thread runs the handler (the previous
+      behaviour; no ordering beyond the caller's own).
+    - ``"threads"``: a pool of ``max_workers`` threads.
+    - ``"asyncio"``: an event loop on a background thread. Coroutine
+      handlers run on it concurrently; plain functions run in its pool of
+      ``max_workers`` threads.
+
+    ``async def`` handlers work in every mode; outside ``"asyncio"`` the
+    calling thread waits while they run on the dispatcher's event loop, so
+    all coroutine handlers share one loop. A ``then`` callback passed to
+    ``submit`` gets the handler's result in the same per-row slot, before
+    the row's next call starts. The pool and loop start on first use, and
+    again in a forked process.
+    """
+
+    def __init__(self, mode: str = HANDLER_DISPATCH, max_workers: int = HANDLER_MAX_WORKERS):
+        """Initialize dispatcher."""
+        if mode not in DISPATCH_MODES:
+            raise ValueError(f"Dispatch mode must be one of {DISPATCH_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._reset()
+
+    def submit(self, row: Hashable, func: Callable, *args,
+               then: Optional[Callable[[Any], Any]] = None) -> Future:
+        """Run ``func(*args)``, then ``then(result)``, after earlier calls for ``row``."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()  # Threads do not survive fork
+
+        if self.mode == "asyncio":
+            return asyncio.run_coroutine_threadsafe(self._run_async(row, func, args, then),
+                                                    self._get_loop())
+        future: Future = Future()
+        if self.mode == "inline":
+            self._call(future, func, args, then)
+            return future
+
+        with self._lock:
+            self._outstanding += 1
+            queue = self._queues.get(row)
+            if queue is not None:
+                queue.append((future, func, args, then))  # Its running drain picks it up
+                return future
+            self._queues[row] = deque([(future, func, args, then)])
+        self._get_executor().submit(self._drain, self._queues, row)
+        return future
+
+    def pending(self) -> int:
+        """Handler calls submitted and not finished yet (0 in "inline" mode)."""
+        if self.mode == "asyncio":
+            return sum(entry[1] for entry in list(self._row_locks.values()))
+        return self._outstanding
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait up to ``timeout`` seconds for submitted handlers, then stop the pool and loop.
+
+        Returns False if handlers were still running: their threads are
+        left to finish on their own and calls not started yet are cancelled.
+        """
+        if self._pid != os.getpid():
+            return True  # The pool and loop belong to the parent process
+        deadline = None if timeout is None else time.monotonic() + timeout
+        executor, loop, thread = self._executor, self._loop, self._loop_thread
+        finished = True
+        if loop is not None and self.mode == "asyncio":
+            # Handlers queued on the loop still need the pool
+            finished = self._wait(asyncio.run_coroutine_threadsafe(self._wait_tasks(), loop),
+                                  deadline)
+        if finished:
+            with self._idle:
+                finished = self._idle.wait_for(lambda: not self._outstanding,
+                                               self._remaining(deadline))
+        if executor is not None:
+            executor.shutdown(wait=finished)
+        if loop is not None:
+            if finished:
+                finished = self._wait(asyncio.run_coroutine_threadsafe(self._wait_tasks(), loop),
+                                      deadline)
+            if finished:
+                loop.call_soon_threadsafe(loop.stop)
+            else:
+                asyncio.run_coroutine_threadsafe(self._cancel_tasks(), loop)  # Then stops it
+            # The thread closes its loop on the way out, unless a handler holds it
+            thread.join(self._remaining(deadline))
+        with self._lock:
+            for queue in self._queues.values():
+                for entry in queue:
+                    entry[0].cancel()
+            self._reset()
+        return finished
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._queues: Dict[Hashable, deque] = {}  # Rows with calls queued or running
+        self._outstanding = 0  # Calls in _queues plus the ones running
+        self._idle = threading.Condition(self._lock)  # Notified when _outstanding drops to 0
+        self._row_locks: Dict[Hashable, List[Any]] = {}  # {row: [asyncio.Lock, waiting calls]}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="dsn-sync-handler")
+            return self._executor
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._run_loop, args=(self._loop,),
+                                                     name="dsn-sync-handler-loop", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def _drain(self, queues: Dict[Hashable, deque], row: Hashable) -> None:
+        """Run a row's queued calls in order (pool thread)."""
+        done = 0
+        while True:
+            with self._lock:
+                if queues is not self._queues:
+                    return  # Abandoned by close()
+                self._outstanding -= done
+                if not self._outstanding:
+                    self._idle.notify_all()
+                queue = queues[row]
+                if not queue:
+                    del queues[row]
+                    return
+                future, func, args, then = queue.popleft()
+            self._call(future, func, args, then)
+            done = 1
+
+    def _call(self, future: Future, func: Callable, args: tuple,
+              then: Optional[Callable[[Any], Any]]) -> None:
+        """Run a handler and its ``then`` in this thread and settle its future."""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args)
+            if inspect.isawaitable(result):
+                result = asyncio.run_coroutine_threadsafe(_await(result), self._get_loop()).result()
+            if then is not None:
+                then(result)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    async def _run_async(self, row: Hashable, func: Callable, args: tuple,
+                         then: Optional[Callable[[Any], Any]]) -> Any:
+        """Run a handler on the loop once earlier calls for its row are done."""
+        row_locks = self._row_locks  # close() may replace it
+        entry = row_locks.get(row)
+        if entry is None:
+            entry = row_locks[row] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:  # Waiters acquire in arrival order
+                loop = asyncio.get_running_loop()
+                if inspect.iscoroutinefunction(func):
+                    result = await func(*args)
+                else:
+                    result = await loop.run_in_executor(
+                        self._get_executor(), functools.partial(func, *args)
+                    )
+                    if inspect.isawaitable(result):
+                        result = await result
+                if then is not None:
+                    await loop.run_in_executor(self._get_executor(), then, result)
+                return result
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del row_locks[row]
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+    @classmethod
+    def _wait(cls, future: Future, deadline: Optional[float]) -> bool:
+        """Wait for ``future`` until ``deadline``; whether it finished."""
+        try:
+            future.result(cls._remaining(deadline))
+        except TimeoutError:
+            return False
+        return True
+
+    @staticmethod
+    async def _cancel_tasks() -> None:
+        """Cancel the loop's other tasks, let them unwind, then stop the loop."""
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        asyncio.get_running_loop().stop()
+
+    @staticmethod
+    async def _wait_tasks() -> None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,372 @@
+"""Secondary indexes and filtered queries over in-memory tables."""
+
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, Any, Optional, List, Iterable, Iterator, Tuple, Union
+from .row_layout import RowLayout
+
+INDEX_KINDS = ("hash", "sorted")
+
+# Filter operators: {"field": value} is equality, {"field": {"<op>": value}} the rest
+OPERATORS = ("eq", "ne", "gt", "gte", "lt", "lte", "in")
+
+# Changes to a sorted index applied as one merge-and-sort instead of one insert each
+BULK_UPDATE_THRESHOLD = 256
+
+_MISSING = object()
+
+
+class _Top:
+    """Compares greater than any key (upper bisect bound within one value)."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_TOP = _Top()
+
+
+class HashIndex:
+    """Equality index: field value -> keys of rows holding it."""
+
+    kind = "hash"
+
+    def __init__(self, field: str):
+        self.field = field
+        self._keys: Dict[Any, set] = {}
+        self.unindexed: set = set()  # Keys whose value cannot be hashed
+
+    def add(self, key: Any, value: Any) -> None:
+        try:
+            self._keys.setdefault(value, set()).add(key)
+        except TypeError:
+            self.unindexed.add(key)
+
+    def remove(self, key: Any, value: Any) -> None:
+        self.unindexed.discard(key)
+        try:
+            keys = self._keys.get(value)
+        except TypeError:
+            return
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys[value]
+
+    def update_many(self, removals: List[Tuple[Any, Any]], additions: List[Tuple[Any, Any]]) -> None:
+        """Apply (key, value) removals, then additions."""
+        for key, value in removals:
+            self.remove(key, value)
+        for key, value in additions:
+            self.add(key, value)
+
+    def lookup(self, conditions: Dict[str, Any]) -> Optional[set]:
+        """Keys matching ``eq``/``in`` conditions (None: index cannot answer)."""
+        if "eq" in conditions:
+            try:
+                return set(self._keys.get(conditions["eq"], ()))
+            except TypeError:
+                return None
+        if "in" in conditions:
+            keys: set = set()
+            for value in conditions["in"]:
+                try:
+                    keys.update(self._keys.get(value, ()))
+                except TypeError:
+                    return None
+            return keys
+        return None
+
+
+class SortedIndex:
+    """Range index: (value, key) pairs in value order."""
+
+    kind = "sorted"
+
+    def __init__(self, field: str):
+        self.field = field
+        self._entries: List[Tuple[Any, Any]] = []
+        self.unindexed: set = set()  # Keys whose value does not compare with the rest
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: Any, value: Any) -> None:
+        if value is None:
+            self.unindexed.add(key)
+            return
+        try:
+            insort(self._entries, (value, key))
+        except TypeError:
+            self.unindexed.add(key)
+
+    def remove(self, key: Any, value: Any) -> None:
+        if key in self.unindexed:
+            self.unindexed.discard(key)
+            return
+        try:
+            position = bisect_left(self._entries, (value, key))
+        except TypeError:
+            return
+        if position < len(self._entries) and self._entries[position] == (value, key):
+            del self._entries[position]
+
+    def update_many(self, removals: List[Tuple[Any, Any]], additions: List[Tuple[Any, Any]]) -> None:
+        """Apply (key, value) removals, then additions; large batches merge and sort once."""
+        if len(removals) + len(additions) < BULK_UPDATE_THRESHOLD:
+            for key, value in removals:
+                self.remove(key, value)
+            for key, value in additions:
+                self.add(key, value)
+            return
+
+        dropped = set()
+        for key, _ in removals:
+            if key in self.unindexed:
+                self.unindexed.discard(key)
+            else:
+                dropped.add(key)
+        entries = [entry for entry in self._entries if entry[1] not in dropped]
+        added = []
+        for key, value in additions:
+            if value is None:
+                self.unindexed.add(key)
+            else:
+                added.append((value, key))
+        try:
+            self._entries = sorted(entries + added)
+        except TypeError:
+            # Some values do not compare; add one by one so only those are left out
+            self._entries = entries
+            for value, key in added:
+                self.add(key, value)
+
+    def lookup(self, conditions: Dict[str, Any]) -> Optional[set]:
+        """Keys matching ``eq``/``in``/range conditions (None: index cannot answer)."""
+        try:
+            if "eq" in conditions:
+                return set(self._range(conditions["eq"], True, conditions["eq"], True))
+            if "in" in conditions:
+                keys: set = set()
+                for value in conditions["in"]:
+                    keys.update(self._range(value, True, value, True))
+                return keys
+            low = high = None
+            low_inclusive = high_inclusive = True
+            if "gt" in conditions or "gte" in conditions:
+                low_inclusive = "gt" not in conditions
+                low = conditions["gt"] if "gt" in conditions else conditions["gte"]
+            if "lt" in conditions or "lte" in conditions:
+                high_inclusive = "lt" not in conditions
+                high = conditions["lt"] if "lt" in conditions else conditions["lte"]
+            if low is None and high is None:
+                return None
+            return set(self._range(low, low_inclusive, high, high_inclusive))
+        except TypeError:
+            return None
+
+    def ordered_keys(self, descending: bool = False) -> Iterator[Any]:
+        """Keys in value order."""
+        entries = reversed(self._entries) if descending else iter(self._entries)
+        return (key for _, key in entries)
+
+    def _range(self, low: Any, low_inclusive: bool, high: Any,
+               high_inclusive: bool) -> Iterator[Any]:
+        entries = self._entries
+        if low is None:
+            start = 0
+        else:
+            start = bisect_left(entries, (low,) if low_inclusive else (low, _TOP))
+        if high is None:
+            end = len(entries)
+        else:
+            end = bisect_left(entries, (high, _TOP) if high_inclusive else (high,))
+        return (key for _, key in entries[start:end])
+
+
+INDEX_TYPES = {"hash": HashIndex, "sorted": SortedIndex}
+
+
+class TableIndexes:
+    """
+    Secondary indexes of one table, kept in step with its rows.
+
+    ``MemoryStore`` calls ``update`` under the table's write lock for every
+    changed row and ``query`` under its read lock, so a query sees the rows
+    and indexes of one table state.
+    """
+
+    def __init__(self, definitions: Dict[str, str]):
+        """Initialize from {field: "hash" | "sorted"}."""
+        self.definitions = dict(definitions)
+        self.indexes = {field: INDEX_TYPES[kind](field) for field, kind in definitions.items()}
+
+    def rebuild(self, rows: Dict[Any, Any]) -> None:
+        """Index every row of a table from scratch."""
+        self.indexes = {field: INDEX_TYPES[kind](field) for field, kind in self.definitions.items()}
+        unpack = RowLayout.unpack
+        self.update_many([(key, None, unpack(row)) for key, row in rows.items()])
+
+    def update(self, key: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Move a row from ``old`` to ``new`` values (None: absent)."""
+        for field, index in self.indexes.items():
+            old_value = old.get(field) if isinstance(old, dict) else None
+            new_value = new.get(field) if isinstance(new, dict) else None
+            if old is not None and new is not None and old_value == new_value:
+                continue
+            if old is not None:
+                index.remove(key, old_value)
+            if new is not None:
+                index.add(key, new_value)
+
+    def update_many(self, changes: List[Tuple[Any, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """Apply many (key, old, new) row changes at once."""
+        for field, index in self.indexes.items():
+            removals = []
+            additions = []
+            for key, old, new in changes:
+                old_value = old.get(field) if isinstance(old, dict) else None
+                new_value = new.get(field) if isinstance(new, dict) else None
+                if old is not None and new is not None and old_value == new_value:
+                    continue
+                if old is not None:
+                    removals.append((key, old_value))
+                if new is not None:
+                    additions.append((key, new_value))
+            index.update_many(removals, additions)
+
+    def query(self, rows: Dict[Any, Any], filters: Optional[Dict[str, Any]] = None,
+              order: Union[str, List[str], None] = None,
+              limit: Optional[int] = None) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Run a query against ``rows`` (the table the indexes describe)."""
+        return run_query(rows, filters, order, limit, self.indexes)
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Turn {field: value | {op: value}} into {field: {op: value}}; ValueError if malformed."""
+    if filters is None:
+        return {}
+    if not isinstance(filters, dict):
+        raise ValueError("Filters must be a dictionary")
+    normalized = {}
+    for field, condition in filters.items():
+        if isinstance(condition, dict) and condition and all(op in OPERATORS for op in condition):
+            if "in" in condition and not isinstance(condition["in"], (list, tuple, set)):
+                raise ValueError(f"'in' filter on {field} needs a list")
+            normalized[field] = dict(condition)
+        else:
+            normalized[field] = {"eq": condition}
+    return normalized
+
+
+def normalize_order(order: Union[str, List[str], None]) -> List[Tuple[str, bool]]:
+    """Turn "field" / "-field" (or a list of them) into [(field, descending)]."""
+    if order is None:
+        return []
+    if isinstance(order, str):
+        order = [order]
+    if not isinstance(order, (list, tuple)) or not all(isinstance(f, str) and f for f in order):
+        raise ValueError("Order must be a field name or a list of field names")
+    return [(f[1:], True) if f.startswith("-") else (f, False) for f in order]
+
+
+def run_query(rows: Dict[Any, Any], filters: Optional[Dict[str, Any]] = None,
+              order: Union[str, List[str], None] = None, limit: Optional[int] = None,
+              indexes: Optional[Dict[str, Any]] = None) -> List[Tuple[Any, Dict[str, Any]]]:
+    """
+    Filter, order and limit rows; return [(key, row)].
+
+    The most selective index that can answer a filter narrows the
+    candidates (the remaining filters are checked row by row); without
+    one the table is scanned. Without filters, ordering by a single
+    sorted-indexed field walks the index and stops at ``limit``. Rows
+    missing an order field sort last; without ``order`` results come in no
+    particular order.
+    """
+    conditions = normalize_filters(filters)
+    sort_fields = normalize_order(order)
+    if limit is not None and (not isinstance(limit, int) or limit < 0):
+        raise ValueError("Limit must be a non-negative integer")
+    indexes = indexes or {}
+
+    candidates: Optional[set] = None
+    for field, condition in conditions.items():
+        index = indexes.get(field)
+        if index is None or index.unindexed:
+            continue
+        keys = index.lookup(condition)
+        if keys is not None and (candidates is None or len(keys) < len(candidates)):
+            candidates = keys
+
+    def matching(keys: Iterable[Any]) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        unpack = RowLayout.unpack
+        for key in keys:
+            row = rows.get(key)
+            if row is None:
+                continue
+            row = unpack(row)
+            if _matches(row, conditions):
+                yield key, row
+
+    if len(sort_fields) == 1:
+        field, descending = sort_fields[0]
+        index = indexes.get(field)
+        walk = (isinstance(index, SortedIndex) and not index.unindexed
+                and len(index) == len(rows))  # Every row has a comparable value
+        if walk and candidates is None:
+            return list(islice(matching(index.ordered_keys(descending)), limit))
+
+    results = list(matching(rows if candidates is None else candidates))
+    if sort_fields:
+        _sort(results, sort_fields)
+    return results if limit is None else results[:limit]
+
+
+def _matches(row: Any, conditions: Dict[str, Dict[str, Any]]) -> bool:
+    if not isinstance(row, dict):
+        return not conditions
+    for field, condition in conditions.items():
+        value = row.get(field, _MISSING)
+        for op, operand in condition.items():
+            try:
+                if op == "eq":
+                    ok = value == operand
+                elif op == "ne":
+                    ok = value != operand
+                elif op == "in":
+                    ok = value in operand
+                elif value is _MISSING or value is None:
+                    ok = False
+                elif op == "gt":
+                    ok = value > operand
+                elif op == "gte":
+                    ok = value >= operand
+                elif op == "lt":
+                    ok = value < operand
+                else:
+                    ok = value <= operand
+            except TypeError:
+                ok = False
+            if not ok:
+                return False
+    return True
+
+
+def _sort(results: List[Tuple[Any, Dict[str, Any]]], sort_fields: List[Tuple[str, bool]]) -> None:
+    """Stable multi-field sort; missing/None values last, mixed types grouped by type."""
+    for field, descending in reversed(sort_fields):
+        def sort_key(item, field=field, descending=descending):
+            value = item[1].get(field)
+            return (value is None) != descending, value  # Missing last either way
+
+        def fallback_key(item, field=field, descending=descending):
+            value = item[1].get(field)
+            return (value is None) != descending, type(value).__name__, str(value)
+
+        try:
+            results.sort(key=sort_key, reverse=descending)
+        except TypeError:
+            results.sort(key=fallback_key, reverse=descending)
@@ -0,0 +1,87 @@
+"""Locking primitives for shared in-memory state."""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+class ReadWriteLock:
+    """
+    Lock allowing many concurrent readers or a single writer.
+    
+    Writer-preferring: once a writer is waiting, new readers queue behind
+    it so a steady stream of reads cannot starve writes. Not reentrant.
+    
+    When ``on_wait`` is set, every acquisition reports
+    ``on_wait("read" | "write", seconds_waited)``; uncontended ones report 0.
+    """
+    
+    def __init__(self):
+        """Initialize lock."""
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        self.on_wait: Optional[Callable[[str, float], None]] = None
+    
+    def acquire_read(self) -> None:
+        """Acquire shared (read) access."""
+        with self._cond:
+            waited = 0.0
+            if self._writer or self._writers_waiting:
+                started = time.perf_counter()
+                while self._writer or self._writers_waiting:
+                    self._cond.wait()
+                waited = time.perf_counter() - started
+            self._readers += 1
+        if self.on_wait is not None:
+            self.on_wait("read", waited)
+    
+    def release_read(self) -> None:
+        """Release shared (read) access."""
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+    
+    def acquire_write(self) -> None:
+        """Acquire exclusive (write) access."""
+        with self._cond:
+            waited = 0.0
+            if self._writer or self._readers:
+                started = time.perf_counter()
+                self._writers_waiting += 1
+                try:
+                    while self._writer or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                waited = time.perf_counter() - started
+            self._writer = True
+        if self.on_wait is not None:
+            self.on_wait("write", waited)
+    
+    def release_write(self) -> None:
+        """Release exclusive (write) access."""
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+    
+    @contextmanager
+    def read_locked(self):
+        """Context manager holding shared access."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @contextmanager
+    def write_locked(self):
+        """Context manager holding exclusive access."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -1,66 +1,708 @@
 """In-memory data registry."""
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List, Iterable, Iterator, Tuple, Union
+from bisect import bisect_right
+from collections import deque
+from contextlib import contextmanager
 import threading
+import weakref
+from ..config.settings import CHANGE_LOG_SIZE, PAGE_SIZE
+from .indexes import TableIndexes, run_query
+from .locks import ReadWriteLock
+from .metrics import Metrics
+from .row_layout import RowLayout, UnpackedTable
+from .snapshot_file import LazyTable
+
+
+class TableSnapshot(dict):
+    """
+    Immutable, versioned view of a table.
+    
+    Returned by ``MemoryStore.get_data(table)`` without copying. The store
+    never mutates a snapshot once it has been handed out (copy-on-write), so
+    readers can iterate or serialize it without holding any lock. Use
+    ``.copy()`` to get a mutable dict.
+    """
+    
+    def __init__(self, data=(), version: int = 0):
+        super().__init__(data)
+        self.version = version
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("TableSnapshot is read-only; use .copy() for a mutable dict")
+    
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+    
+    def __reduce__(self):
+        return (TableSnapshot, (dict(self), self.version))
 
 
 class MemoryStore:
-    """Thread-safe in-memory data storage."""
+    """
+    Thread-safe in-memory data storage.
+    
+    Each table has its own read/write lock, so reads never serialize
+    against each other and writes only block the table they touch. A
+    store-wide read/write lock is held shared by table operations and
+    exclusively by operations spanning all tables (``clear_data()`` and
+    ``load_from_dict``).
+    
+    Tables are published as versioned ``TableSnapshot`` objects. Full-table
+    reads return the current snapshot in O(1) and mark it shared; the next
+    write copies it once and mutates the copy, so a table is copied at most
+    once per published version instead of once per read. Rows are replaced,
+    never mutated in place, for the same reason.
+    
+    Every write also lands in a bounded per-table change log (deletes as
+    tombstones) so clients can fetch only what changed since the version
+    they hold; see ``get_changes_since``.
     
-    def __init__(self):
+    Tables restored from a mapped snapshot (``LazyTable``) stay undecoded:
+    single-row reads decode just that row, and the first full-table read or
+    write decodes the table into a regular snapshot.
+    
+    Tables given a ``RowLayout`` (``set_layout``) hold rows as packed
+    tuples and unpack them on read. A full-table read builds an unpacked
+    snapshot, shared by every reader of the same table state for as long
+    as any of them holds it (weak reference), so it is not kept resident.
+    
+    Tables can have secondary indexes (``set_indexes``), updated with each
+    row under the table's write lock; ``query`` filters, orders and limits
+    rows using them.
+    
+    ``iter_pages`` and ``get_page`` read a table in key order, a page at a
+    time, resuming after the last key of the previous page (keyset
+    cursor). Every page of one ``iter_pages`` call comes from the same
+    snapshot; the sorted key order is computed once per snapshot.
+    
+    ``cache_row`` and ``evict`` add and drop rows that mirror a database
+    (read-through caching) without publishing a version, logging or
+    notifying listeners: the data did not change, only what is held here.
+    """
+    
+    def __init__(self, change_log_size: int = CHANGE_LOG_SIZE):
         """Initialize memory store."""
-        self._data: Dict[str, Dict[str, Any]] = {}  # {table_name: {key: data}}
-        self._lock = threading.Lock()
+        self._data: Dict[str, TableSnapshot] = {}  # {table_name: {key: data}}
+        self._versions: Dict[str, int] = {}  # {table_name: version}
+        self._shared: set = set()  # Tables whose snapshot has been handed out
+        self._change_log_size = change_log_size
+        self._change_logs: Dict[str, deque] = {}  # {table_name: deque of (version, key, row)}
+        self._log_floors: Dict[str, int] = {}  # Oldest version the log can diff from
+        self._lazy: Dict[str, LazyTable] = {}  # Restored tables not decoded yet
+        self._lazy_lock = threading.Lock()
+        self._layouts: Dict[str, RowLayout] = {}  # Tables stored compactly
+        self._views: Dict[str, weakref.ref] = {}  # Unpacked snapshots of compact tables
+        self._indexes: Dict[str, TableIndexes] = {}
+        self._key_orders: Dict[str, Tuple[weakref.ref, List[str]]] = {}  # Sorted keys per snapshot
+        self._partial: set = set()  # Tables holding only some of their database rows
+        self._lock = ReadWriteLock()
+        self._table_locks: Dict[str, ReadWriteLock] = {}
+        self._table_locks_guard = threading.Lock()
+        self._on_lock_wait: Optional[Callable[[str, float], None]] = None
+        self._listeners: List[Callable] = []
+        self._forwarder: Optional[Callable] = None
     
     def store_data(self, table_name: str, key: str, data: Dict[str, Any]) -> None:
         """Store data in memory."""
-        with self._lock:
-            if table_name not in self._data:
-                self._data[table_name] = {}
-            self._data[table_name][key] = data
+        self._write("store", table_name, key, data)
     
     def get_data(self, table_name: str, key: Optional[str] = None) -> Any:
         """Retrieve data from memory."""
-        with self._lock:
+        with self._read_locked(table_name, materialize=not key):
+            if key:
+                lazy = self._lazy.get(table_name)
+                if lazy is not None:
+                    return lazy.get(key)
+            
             if table_name not in self._data:
-                return None if key else {}
+                return None if key else TableSnapshot(version=self._versions.get(table_name, 0))
             
             if key:
-                return self._data[table_name].get(key)
-            return self._data[table_name].copy()
+                row = self._data[table_name].get(key)
+                layout = self._layouts.get(table_name)
+                return row if layout is None else layout.unpack(row)
+            return self._publish(table_name)
     
     def get_all_tables(self) -> Dict[str, Dict[str, Any]]:
-        """Get all data from all tables."""
-        with self._lock:
-            return {table: data.copy() for table, data in self._data.items()}
+        """Get snapshots of all tables."""
+        with self._lock.read_locked():
+            tables = list(self._data) + list(self._lazy)
+        
+        result = {}
+        for table in tables:
+            with self._read_locked(table):
+                if table in self._data:
+                    result[table] = self._publish(table)
+        return result
+    
+    def get_version(self, table_name: str) -> int:
+        """Get current version of a table (0 if never written)."""
+        return self._versions.get(table_name, 0)
+    
+    def get_changes_since(self, table_name: str, version: int) -> Dict[str, Any]:
+        """
+        Get changes made to a table after ``version``.
+        
+        Returns ``{"version": v, "full": False, "changes": {key: row}}``
+        where a ``None`` row is a deletion (tombstone). When the change log
+        no longer reaches back to ``version`` (or ``version`` is unknown),
+        returns ``{"version": v, "full": True, "data": snapshot}`` and the
+        client must replace its copy of the table.
+        """
+        with self._read_locked(table_name, materialize=False):
+            current = self._versions.get(table_name, 0)
+            floor = self._log_floors.get(table_name, 0)
+            if version < floor or version > current:
+                self._materialize(table_name)
+                if table_name in self._data:
+                    table = self._publish(table_name)
+                else:
+                    table = TableSnapshot(version=current)
+                return {"version": current, "full": True, "data": table}
+            
+            changes: Dict[str, Any] = {}
+            if version < current:
+                for entry_version, key, row in self._change_logs.get(table_name, ()):
+                    if entry_version > version:
+                        changes[key] = row
+            return {"version": current, "full": False, "changes": changes}
     
     def update_data(self, table_name: str, key: str, data: Dict[str, Any]) -> bool:
         """Update existing data."""
-        with self._lock:
-            if table_name in self._data and key in self._data[table_name]:
-                self._data[table_name][key].update(data)
-                return True
-            return False
+        return self._write("update", table_name, key, data)
     
     def delete_data(self, table_name: str, key: str) -> bool:
         """Delete data from memory."""
-        with self._lock:
-            if table_name in self._data and key in self._data[table_name]:
-                del self._data[table_name][key]
-                return True
-            return False
+        return self._write("delete", table_name, key)
+    
+    def store_many(self, table_name: str, items: Dict[str, Dict[str, Any]]) -> int:
+        """Store many rows under one lock acquisition and one version."""
+        return self._write("store_many", table_name, None, dict(items))
+    
+    def delete_many(self, table_name: str, keys: List[str]) -> int:
+        """Delete many rows under one lock acquisition; return rows deleted."""
+        return self._write("delete_many", table_name, None, list(keys))
+    
+    def cache_row(self, table_name: str, key: str, data: Dict[str, Any], version: int) -> bool:
+        """
+        Hold a row loaded from the database (local only, no new version).
+        
+        Skipped (False) if the table was written since ``version`` was read,
+        so a row fetched before a concurrent write or delete never
+        overrides it.
+        """
+        with self._write_locked("cache_row", table_name):
+            if self._versions.get(table_name, 0) != version:
+                return False
+            if key in self._data.get(table_name, {}):
+                return False
+            self._put_row(self._writable_table(table_name), table_name, key, data)
+            self._partial.add(table_name)
+            return True
+    
+    def evict(self, table_name: str, keys: List[str]) -> int:
+        """
+        Drop rows from memory only (no tombstones, no new version); return rows dropped.
+        
+        The table is then partial (``is_partial``): memory no longer holds
+        all of it, so whole-table reads must come from the database.
+        """
+        with self._write_locked("evict", table_name):
+            current = self._data.get(table_name, {})
+            keys = [key for key in keys if key in current]
+            if keys:
+                self._drop_rows(self._writable_table(table_name), table_name, keys)
+                self._partial.add(table_name)
+            return len(keys)
+    
+    def is_partial(self, table_name: str) -> bool:
+        """Check if a table holds only some of its database rows (loaded or evicted)."""
+        return table_name in self._partial
+    
+    def mark_partial(self, table_name: Optional[str] = None) -> None:
+        """Mark a table (None: every table held) as holding only some database rows."""
+        with self._lock.write_locked():
+            if table_name is None:
+                self._partial.update(self._data, self._lazy)
+            else:
+                self._partial.add(table_name)
+    
+    @staticmethod
+    def paginate(table: TableSnapshot, after: Optional[str] = None,
+                 page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Yield pages of a snapshot not held by a store (see ``iter_pages``)."""
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        return MemoryStore._pages(table, sorted(table), None, after, page_size)
+    
+    def query(self, table_name: str, filters: Optional[Dict[str, Any]] = None,
+              order: Union[str, List[str], None] = None,
+              limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Get [(key, row)] of rows matching ``filters``, ordered and limited.
+        
+        ``filters`` maps fields to a value (equality) or to operators:
+        ``{"age": {"gte": 18, "lt": 65}, "status": {"in": ["new", "paid"]}}``
+        (eq, ne, gt, gte, lt, lte, in). ``order`` is a field, "-field" for
+        descending, or a list of them. Raises ValueError for malformed
+        queries. Indexed fields are answered from their index.
+        """
+        with self._read_locked(table_name):
+            indexes = self._indexes.get(table_name)
+            return run_query(self._data.get(table_name, {}), filters, order, limit,
+                             indexes.indexes if indexes is not None else None)
+    
+    def iter_pages(self, table_name: str, after: Optional[str] = None,
+                   page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Yield pages ``{"version", "data": {key: row}, "next": cursor}`` in key order.
+        
+        Starts after key ``after`` (None: the first key); ``next`` is the
+        cursor for the following page, None on the last. Always yields at
+        least one page.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        with self._read_locked(table_name):
+            table = self._data.get(table_name)
+            if table is None:
+                table = TableSnapshot(version=self._versions.get(table_name, 0))
+                keys: List[str] = []
+            else:
+                self._shared.add(table_name)  # Pages are read after the lock is released
+                keys = self._sorted_keys(table_name, table)
+            layout = self._layouts.get(table_name)
+        return self._pages(table, keys, layout, after, page_size)
+    
+    def get_page(self, table_name: str, after: Optional[str] = None,
+                 page_size: int = PAGE_SIZE) -> Dict[str, Any]:
+        """Get one page of a table (see ``iter_pages``)."""
+        return next(self.iter_pages(table_name, after, page_size))
+    
+    def set_indexes(self, table_name: str, definitions: Optional[Dict[str, str]]) -> None:
+        """Index a table's fields ({field: "hash" | "sorted"}; None removes them)."""
+        if not definitions and table_name not in self._indexes:
+            return
+        indexes = TableIndexes(definitions) if definitions else None
+        # A lazily restored table is indexed when it is decoded, not now
+        with self._write_locked("set_indexes", table_name, materialize=False):
+            if indexes is None:
+                self._indexes.pop(table_name, None)
+                return
+            self._indexes[table_name] = indexes
+            self._reindex(table_name)
     
     def clear_data(self, table_name: Optional[str] = None) -> None:
         """Clear data from memory."""
-        with self._lock:
-            if table_name:
-                if table_name in self._data:
-                    del self._data[table_name]
-            else:
-                self._data.clear()
+        self._write("clear", table_name)
     
     def load_from_dict(self, data: Dict[str, Dict[str, Any]]) -> None:
         """Load data from dictionary (for server restart)."""
-        with self._lock:
-            self._data = {table: data.copy() for table, data in data.items()}
-
+        # Copy outside the lock; only the swap blocks other operations
+        tables = {table: TableSnapshot(rows) for table, rows in data.items()}
+        self._write("load", None, None, tables)
+    
+    def restore(self, tables: Dict[str, Dict[str, Any]], versions: Dict[str, int]) -> None:
+        """
+        Replace all data with persisted tables, keeping their versions.
+        
+        Unlike ``load_from_dict`` the table versions continue where they
+        were, so clients already at a restored version stay current; older
+        clients get a full resync.
+        """
+        tables = {
+            table: rows if isinstance(rows, LazyTable) else TableSnapshot(rows)
+            for table, rows in tables.items()
+        }
+        self._write("restore", None, None, (tables, dict(versions)))
+    
+    def checkpoint(self, callback: Callable) -> Any:
+        """
+        Run ``callback(tables, versions)`` with all writes paused.
+        
+        ``tables`` maps names to the current ``TableSnapshot`` objects (or
+        ``LazyTable`` for tables not decoded yet, ``UnpackedTable`` for
+        compact tables) and stays valid after the callback returns (the
+        snapshots are marked shared), so it can be serialized without
+        holding any lock.
+        """
+        with self._lock.write_locked():
+            self._shared.update(self._data)
+            tables: Dict[str, Any] = dict(self._lazy)
+            for table_name, table in self._data.items():
+                if table_name in self._layouts:
+                    table = UnpackedTable(table, table.version)
+                tables[table_name] = table
+            return callback(tables, dict(self._versions))
+    
+    def set_layout(self, table_name: str, fields: Optional[Iterable[str]]) -> None:
+        """
+        Store a table's rows compactly, seeded with ``fields`` order (None: as dicts).
+        
+        Existing rows are repacked; the table version does not change. A
+        lazily restored table is packed when it is decoded instead.
+        """
+        layout = RowLayout(fields) if fields is not None else None
+        with self._write_locked("set_layout", table_name, materialize=False):
+            old = self._layouts.pop(table_name, None)
+            if layout is not None:
+                self._layouts[table_name] = layout
+            table = self._data.get(table_name)
+            if table is None or table_name in self._lazy or (old is None and layout is None):
+                return
+            rows = {key: RowLayout.unpack(row) for key, row in table.items()}
+            if layout is not None:
+                rows = {key: layout.pack(row) for key, row in rows.items()}
+            # A new snapshot: readers of the old one are unaffected
+            self._data[table_name] = TableSnapshot(rows, table.version)
+            self._shared.discard(table_name)
+            self._views.pop(table_name, None)
+    
+    def add_listener(self, listener: Callable) -> None:
+        """
+        Register a write listener.
+        
+        ``listener(operation, table_name, key, data)`` runs under the lock of
+        the written table after every applied write, so listeners see each
+        table's writes in order. Operations: "store", "update", "delete",
+        "clear", "load", "restore", "store_many" (data is {key: row}) and
+        "delete_many" (data is a list of keys).
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable) -> None:
+        """Unregister a write listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def set_metrics(self, metrics: Optional[Metrics]) -> None:
+        """
+        Report lock waits to ``metrics`` as ``lock_wait.read`` / ``lock_wait.write``.
+        
+        Nothing is attached unless ``metrics`` is enabled, so locking stays
+        untimed otherwise.
+        """
+        on_wait = None
+        if metrics is not None and metrics.enabled:
+            def on_wait(kind: str, seconds: float) -> None:
+                metrics.observe("lock_wait." + kind, seconds)
+        with self._table_locks_guard:
+            self._on_lock_wait = on_wait
+            for lock in [self._lock, *self._table_locks.values()]:
+                lock.on_wait = on_wait
+    
+    def set_forwarder(self, forwarder: Optional[Callable]) -> None:
+        """
+        Route writes to ``forwarder(operation, table_name, key, data)``.
+        
+        Used by replica stores (worker processes): writes are sent to the
+        single writer instead of being applied locally, and come back
+        through ``apply_change`` once the writer has applied them. The
+        forwarder returns the writer's ``apply_change`` result after this
+        replica has applied the write too (or raises if the writer failed).
+        """
+        self._forwarder = forwarder
+    
+    def apply_change(self, operation: str, table_name: Optional[str] = None,
+                     key: Optional[str] = None, data: Any = None) -> Any:
+        """Apply a write locally and notify listeners."""
+        apply = getattr(self, f"_apply_{operation}")
+        with self._write_locked(operation, table_name):
+            result = apply(table_name, key, data)
+            if result is None or result:  # False / 0 rows: nothing changed
+                for listener in self._listeners:
+                    listener(operation, table_name, key, data)
+        return result
+    
+    def _write(self, operation: str, table_name: Optional[str] = None,
+               key: Optional[str] = None, data: Any = None) -> Any:
+        """Apply a write, or forward it when running as a replica."""
+        if self._forwarder is None:
+            return self.apply_change(operation, table_name, key, data)
+        
+        return self._forwarder(operation, table_name, key, data)
+    
+    def _table_lock(self, table_name: str) -> ReadWriteLock:
+        """Get (or create) the lock for a table."""
+        lock = self._table_locks.get(table_name)
+        if lock is None:
+            with self._table_locks_guard:
+                lock = self._table_locks.get(table_name)
+                if lock is None:
+                    lock = self._table_locks[table_name] = ReadWriteLock()
+                    lock.on_wait = self._on_lock_wait
+        return lock
+    
+    @contextmanager
+    def _read_locked(self, table_name: str, materialize: bool = True):
+        """Hold shared access to one table."""
+        with self._lock.read_locked(), self._table_lock(table_name).read_locked():
+            if materialize and self._lazy:
+                self._materialize(table_name)
+            yield
+    
+    @contextmanager
+    def _write_locked(self, operation: str, table_name: Optional[str],
+                      materialize: bool = True):
+        """Hold exclusive access to what ``operation`` writes."""
+        if table_name is None:
+            with self._lock.write_locked():
+                yield
+        else:
+            with self._lock.read_locked(), self._table_lock(table_name).write_locked():
+                if materialize and self._lazy:
+                    self._materialize(table_name)
+                yield
+    
+    def _materialize(self, table_name: str) -> None:
+        """Decode a lazily restored table into a regular snapshot."""
+        if table_name not in self._lazy:
+            return
+        with self._lazy_lock:
+            lazy = self._lazy.get(table_name)
+            if lazy is not None:
+                rows = lazy.load()
+                layout = self._layouts.get(table_name)
+                if layout is not None:
+                    rows = {key: layout.pack(row) for key, row in rows.items()}
+                if table_name in self._indexes:
+                    self._indexes[table_name].rebuild(rows)
+                # Publish the decoded table before dropping the lazy one
+                self._data[table_name] = TableSnapshot(rows, lazy.version)
+                self._views.pop(table_name, None)
+                del self._lazy[table_name]
+    
+    def _publish(self, table_name: str) -> TableSnapshot:
+        """Hand out the current snapshot of a table (unpacked if compact); read lock held."""
+        table = self._data[table_name]
+        layout = self._layouts.get(table_name)
+        if layout is None:
+            self._shared.add(table_name)
+            return table
+        
+        ref = self._views.get(table_name)
+        view = ref() if ref is not None else None
+        if view is None or view.version != table.version:
+            unpack = layout.unpack
+            view = TableSnapshot(
+                {key: unpack(row) for key, row in table.items()}, table.version
+            )
+            self._views[table_name] = weakref.ref(view)
+        return view
+    
+    def _sorted_keys(self, table_name: str, table: TableSnapshot) -> List[str]:
+        """Keys of a shared snapshot in order, sorted once per snapshot; read lock held."""
+        cached = self._key_orders.get(table_name)
+        # Shared snapshots are never mutated, so the same object means the same keys
+        if cached is not None and cached[0]() is table:
+            return cached[1]
+        keys = sorted(table)
+        self._key_orders[table_name] = (weakref.ref(table), keys)
+        return keys
+    
+    @staticmethod
+    def _pages(table: TableSnapshot, keys: List[str], layout: Optional[RowLayout],
+               after: Optional[str], page_size: int) -> Iterator[Dict[str, Any]]:
+        """Slice a snapshot's sorted keys into pages."""
+        start = 0 if after is None else bisect_right(keys, after)
+        while True:
+            page_keys = keys[start:start + page_size]
+            start += page_size
+            if layout is None:
+                data = {key: table[key] for key in page_keys}
+            else:
+                data = {key: layout.unpack(table[key]) for key in page_keys}
+            yield {
+                "version": table.version,
+                "data": data,
+                "next": page_keys[-1] if start < len(keys) else None,
+            }
+            if start >= len(keys):
+                return
+    
+    def _pack(self, table_name: str, row: Any) -> Any:
+        layout = self._layouts.get(table_name)
+        return row if layout is None else layout.pack(row)
+    
+    def _put_row(self, table: TableSnapshot, table_name: str, key: str, row: Any) -> None:
+        """Set a row of a writable table, packing it and updating indexes."""
+        indexes = self._indexes.get(table_name)
+        if indexes is not None:
+            old = dict.get(table, key)
+            indexes.update(key, None if old is None else RowLayout.unpack(old), row)
+        dict.__setitem__(table, key, self._pack(table_name, row))
+    
+    def _put_rows(self, table: TableSnapshot, table_name: str, rows: Dict[str, Any]) -> None:
+        """Set many rows of a writable table (indexes updated in one batch)."""
+        indexes = self._indexes.get(table_name)
+        if indexes is not None:
+            unpack = RowLayout.unpack
+            changes = []
+            for key, row in rows.items():
+                old = dict.get(table, key)
+                changes.append((key, None if old is None else unpack(old), row))
+            indexes.update_many(changes)
+        layout = self._layouts.get(table_name)
+        for key, row in rows.items():
+            dict.__setitem__(table, key, row if layout is None else layout.pack(row))
+    
+    def _drop_rows(self, table: TableSnapshot, table_name: str, keys: List[str]) -> None:
+        """Delete many rows of a writable table (indexes updated in one batch)."""
+        indexes = self._indexes.get(table_name)
+        if indexes is not None:
+            unpack = RowLayout.unpack
+            indexes.update_many([(key, unpack(dict.__getitem__(table, key)), None) for key in keys])
+        for key in keys:
+            dict.__delitem__(table, key)
+    
+    def _drop_row(self, table: TableSnapshot, table_name: str, key: str) -> None:
+        """Delete a row of a writable table, updating indexes."""
+        indexes = self._indexes.get(table_name)
+        if indexes is not None:
+            indexes.update(key, RowLayout.unpack(dict.__getitem__(table, key)), None)
+        dict.__delitem__(table, key)
+    
+    def _reindex(self, table_name: str) -> None:
+        """Rebuild a table's indexes after its rows were replaced wholesale."""
+        indexes = self._indexes.get(table_name)
+        if indexes is not None and table_name not in self._lazy:  # Lazy: on materialize
+            indexes.rebuild(self._data.get(table_name, {}))
+    
+    def _writable_table(self, table_name: str) -> TableSnapshot:
+        """Get a table dict that no reader holds, copying it if shared."""
+        self._views.pop(table_name, None)  # Any unpacked view is about to be stale
+        self._key_orders.pop(table_name, None)
+        table = self._data.get(table_name)
+        if table is None:
+            table = TableSnapshot(version=self._versions.get(table_name, 0))
+        elif table_name in self._shared:
+            table = TableSnapshot(table, table.version)
+        else:
+            return table
+        self._data[table_name] = table
+        self._shared.discard(table_name)
+        return table
+    
+    def _bump_version(self, table_name: str) -> int:
+        """Publish a new version of a table."""
+        version = self._versions.get(table_name, 0) + 1
+        self._versions[table_name] = version
+        if table_name in self._data:
+            self._data[table_name].version = version
+        return version
+    
+    def _log_change(self, table_name: str, key: str, row: Optional[Dict[str, Any]],
+                    version: Optional[int] = None) -> None:
+        """Record a changed row (None = deleted), publishing a new version unless given."""
+        if version is None:
+            version = self._bump_version(table_name)
+        log = self._change_logs.get(table_name)
+        if log is None:
+            log = self._change_logs[table_name] = deque(maxlen=self._change_log_size)
+        if len(log) == log.maxlen:
+            # Oldest entry is about to drop out; clients older than it must resync
+            self._log_floors[table_name] = log[0][0]
+        log.append((version, key, row))
+    
+    def _reset_log(self, table_name: str) -> None:
+        """Publish a new version that can only be reached by a full resync."""
+        version = self._bump_version(table_name)
+        self._change_logs.pop(table_name, None)
+        self._log_floors[table_name] = version
+    
+    def _apply_store(self, table_name: str, key: str, data: Dict[str, Any]) -> None:
+        self._put_row(self._writable_table(table_name), table_name, key, data)
+        self._log_change(table_name, key, data)
+    
+    def _apply_update(self, table_name: str, key: str, data: Dict[str, Any]) -> bool:
+        if table_name in self._data and key in self._data[table_name]:
+            table = self._writable_table(table_name)
+            row = dict(RowLayout.unpack(table[key]))
+            row.update(data)
+            self._put_row(table, table_name, key, row)
+            self._log_change(table_name, key, row)
+            return True
+        return False
+    
+    def _apply_delete(self, table_name: str, key: str, data: Any) -> bool:
+        if table_name in self._data and key in self._data[table_name]:
+            self._drop_row(self._writable_table(table_name), table_name, key)
+            self._log_change(table_name, key, None)
+            return True
+        return False
+    
+    def _apply_store_many(self, table_name: str, key: Any, data: Dict[str, Dict[str, Any]]) -> int:
+        if not data:
+            return 0
+        table = self._writable_table(table_name)
+        version = self._bump_version(table_name)
+        self._put_rows(table, table_name, data)
+        for row_key, row in data.items():
+            self._log_change(table_name, row_key, row, version)
+        return len(data)
+    
+    def _apply_delete_many(self, table_name: str, key: Any, data: List[str]) -> int:
+        current = self._data.get(table_name, {})
+        keys = [row_key for row_key in dict.fromkeys(data) if row_key in current]
+        if not keys:
+            return 0
+        table = self._writable_table(table_name)
+        version = self._bump_version(table_name)
+        self._drop_rows(table, table_name, keys)
+        for row_key in keys:
+            self._log_change(table_name, row_key, None, version)
+        return len(keys)
+    
+    def _apply_clear(self, table_name: Optional[str], key: Any, data: Any) -> None:
+        tables = [table_name] if table_name else list(self._data) + list(self._lazy)
+        self._partial.difference_update(tables)
+        for table in tables:
+            if table in self._data or table in self._lazy:
+                self._data.pop(table, None)
+                self._lazy.pop(table, None)
+                self._views.pop(table, None)
+                self._key_orders.pop(table, None)
+                self._shared.discard(table)
+                self._reset_log(table)
+                self._reindex(table)
+    
+    def _apply_load(self, table_name: Any, key: Any, data: Dict[str, Dict[str, Any]]) -> None:
+        self._apply_clear(None, None, None)
+        for table, rows in data.items():
+            layout = self._layouts.get(table)
+            if layout is not None:
+                rows = TableSnapshot({key: layout.pack(row) for key, row in rows.items()})
+            elif not isinstance(rows, TableSnapshot):
+                rows = TableSnapshot(rows)
+            self._data[table] = rows
+            self._reset_log(table)
+            self._reindex(table)
+    
+    def _apply_restore(self, table_name: Any, key: Any, data: tuple) -> None:
+        tables, versions = data
+        self._data.clear()
+        self._lazy.clear()
+        self._views.clear()
+        self._key_orders.clear()
+        self._shared.clear()
+        self._partial.clear()
+        self._change_logs.clear()
+        self._versions.clear()
+        self._log_floors.clear()
+        for table, version in versions.items():
+            self._versions[table] = version
+            self._log_floors[table] = version
+        for table, rows in tables.items():
+            rows.version = self._versions.get(table, 0)
+            if isinstance(rows, LazyTable):
+                self._lazy[table] = rows
+            else:
+                layout = self._layouts.get(table)
+                if layout is not None:
+                    rows = TableSnapshot({key: layout.pack(row) for key, row in rows.items()},
+                                         rows.version)
+                self._data[table] = rows
+        for table in self._indexes:
+            self._reindex(table)
@@ -0,0 +1,225 @@
+"""Per-stage latency histograms, counters and gauges."""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, Tuple
+from ..config.settings import METRICS_ENABLED, METRICS_BUCKETS
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds (seconds)."""
+
+    __slots__ = ("bounds", "counts", "count", "sum", "max", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        """Initialize histogram."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot: above the largest bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record one duration."""
+        index = bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, fraction: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        with self._lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if not count:
+            return 0.0
+        rank = fraction * count
+        seen = 0
+        for index, bucket in enumerate(counts):
+            if bucket and seen + bucket >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else largest
+                return min(lower + (upper - lower) * (rank - seen) / bucket, largest)
+            seen += bucket
+        return largest
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Count, total and estimated p50/p99/max, in seconds."""
+        with self._lock:
+            count, total, largest = self.count, self.sum, self.max
+        return {"count": count, "sum": total, "p50": self.quantile(0.5),
+                "p99": self.quantile(0.99), "max": largest}
+
+
+class _Timer:
+    """Context manager recording its duration into a histogram."""
+
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self._histogram.observe(time.perf_counter() - self._started)
+        return False
+
+
+class _NullTimer:
+    """Timer used while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Registry of stage histograms, counters and sampled gauges.
+
+    Stages are named by the code timing them (``"token"``, ``"decrypt"``,
+    ``"lock_wait.write"``...) and created on first use. While ``enabled``
+    is False, ``timer`` hands out a shared no-op and ``observe`` and
+    ``increment`` return at once, so instrumented paths cost an attribute
+    check. Gauges (queue depths) are callables sampled only when a snapshot
+    or scrape asks for them. Values are per process.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED,
+                 buckets: Iterable[float] = METRICS_BUCKETS):
+        """Initialize metrics registry."""
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}  # {stage: histogram}
+        self._counters: Dict[tuple, float] = {}  # {(name, labels): value}
+        self._gauges: Dict[str, Callable[[], float]] = {}  # {name: sampler}
+
+    def timer(self, stage: str):
+        """Context manager timing a block as ``stage``."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self._histogram(stage))
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record a duration for ``stage``."""
+        if self.enabled:
+            self._histogram(stage).observe(seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Add to a counter, optionally labelled (``status="401"``)."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(self, name: str, sampler: Callable[[], float]) -> None:
+        """Register a gauge read by calling ``sampler`` at snapshot time."""
+        with self._lock:
+            self._gauges[name] = sampler
+
+    def reset(self) -> None:
+        """Drop recorded histograms and counters (gauges stay registered)."""
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get {"enabled", "stages", "counters", "gauges"}; durations in seconds."""
+        histograms, counters, gauges = self._collect()
+        return {
+            "enabled": self.enabled,
+            "stages": {stage: histogram.snapshot() for stage, histogram in histograms},
+            "counters": {_sample_name(name, labels): value
+                         for (name, labels), value in counters},
+            "gauges": self._sample_gauges(gauges),
+        }
+
+    def render_prometheus(self, prefix: str = "dsn_sync") -> str:
+        """Render everything in the Prometheus text exposition format."""
+        lines = []
+        histograms, counters_by_labels, gauges = self._collect()
+        if histograms:
+            family = f"{prefix}_stage_seconds"
+            lines.append(f"# HELP {family} Time spent in each request stage.")
+            lines.append(f"# TYPE {family} histogram")
+            for stage, histogram in histograms:
+                with histogram._lock:
+                    counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+                cumulative = 0
+                for bound, bucket in zip(histogram.bounds + (float("inf"),), counts):
+                    cumulative += bucket
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{family}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{family}_sum{{stage="{stage}"}} {total!r}')
+                lines.append(f'{family}_count{{stage="{stage}"}} {count}')
+
+        counters: Dict[str, list] = {}
+        for (name, labels), value in counters_by_labels:
+            counters.setdefault(name, []).append((labels, value))
+        for name, samples in counters.items():
+            family = f"{prefix}_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {family} counter")
+            for labels, value in samples:
+                lines.append(f"{_sample_name(family, labels)} {_number(value)}")
+
+        for name, value in self._sample_gauges(gauges).items():
+            family = f"{prefix}_{_metric_name(name)}"
+            lines.append(f"# TYPE {family} gauge")
+            lines.append(f"{family} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _histogram(self, stage: str) -> Histogram:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.buckets))
+        return histogram
+
+    def _collect(self) -> Tuple[list, list, list]:
+        """Sorted histograms, counters and gauges, copied under the lock."""
+        with self._lock:
+            return (sorted(self._histograms.items()), sorted(self._counters.items()),
+                    sorted(self._gauges.items()))
+
+    @staticmethod
+    def _sample_gauges(gauges: Iterable[Tuple[str, Callable[[], float]]]) -> Dict[str, float]:
+        values = {}
+        for name, sampler in gauges:
+            try:
+                values[name] = sampler()
+            except Exception:
+                pass  # A failing sampler must not break the scrape
+        return values
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _sample_name(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
@@ -0,0 +1,307 @@
+"""Write-ahead log and snapshots for ``MemoryStore``."""
+
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Any, Optional, List, Tuple
+from ..config.settings import (
+    DATA_DIR, WAL_DURABILITY, WAL_FSYNC_INTERVAL, SNAPSHOT_WAL_SIZE, SNAPSHOT_INTERVAL
+)
+from .codecs import CODECS
+from .memory_store import MemoryStore
+from .snapshot_file import write_snapshot, open_snapshot
+
+DURABILITY_LEVELS = ("none", "batch", "sync")
+
+# WAL record: payload length | CRC32 of payload | payload
+RECORD_HEADER = struct.Struct(">II")
+
+_SEGMENT_RE = re.compile(r"^wal-(\d+)\.log$")
+_SNAPSHOT_RE = re.compile(r"^snapshot-(\d+)\.dsnap$")
+
+
+class StorePersistence:
+    """
+    Persists a ``MemoryStore`` to disk and restores it on startup.
+
+    Every applied write is appended to a write-ahead log segment
+    (``wal-<generation>.log``). ``snapshot()`` pauses writes just long
+    enough to capture the table snapshots and switch to a new segment,
+    then writes ``snapshot-<generation>.dsnap`` (all data before that
+    segment) without blocking writers and deletes older files. On
+    ``open`` the newest snapshot is memory-mapped (rows are decoded lazily,
+    see ``snapshot_file``) and later segments replayed; a torn record at
+    the end of the log (crash mid-write) is discarded. The background
+    thread snapshots once the log passes ``snapshot_wal_size``, and at
+    least every ``snapshot_interval`` seconds while there is anything to
+    compact, so a quiet store does not replay a long log on restart.
+
+    Durability levels:
+        "none"   appends go to the OS buffers, flushed periodically
+        "batch"  a background thread fsyncs every ``WAL_FSYNC_INTERVAL``
+        "sync"   writes return only once fsynced; concurrent writers share
+                 one fsync (group commit)
+    """
+
+    def __init__(self, memory_store: MemoryStore,
+                 data_dir: str = os.path.join(DATA_DIR, "store"),
+                 durability: str = WAL_DURABILITY,
+                 fsync_interval: float = WAL_FSYNC_INTERVAL,
+                 snapshot_wal_size: int = SNAPSHOT_WAL_SIZE,
+                 snapshot_interval: float = SNAPSHOT_INTERVAL):
+        """Initialize persistence for a store (call ``open`` to start)."""
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability}")
+        self.memory_store = memory_store
+        self.data_dir = data_dir
+        self.durability = durability
+        self.fsync_interval = fsync_interval
+        self.snapshot_wal_size = snapshot_wal_size
+        self.snapshot_interval = snapshot_interval
+        self._codec = CODECS.get("orjson") or CODECS["json"]
+        self._file = None
+        self._generation = 0
+        self._lock = threading.Lock()  # Guards appends and segment switches
+        self._sync_cond = threading.Condition()
+        self._written = 0  # Records appended
+        self._synced = 0  # Records known to be on disk
+        self._syncing = False
+        self._snapshot_lock = threading.Lock()
+        self._last_snapshot = 0.0  # time.monotonic() of the last compaction
+        self._snapshot_written = 0  # Records appended before the last compaction
+        self._replayed = False  # Log segments from before open() still on disk
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self, restore: bool = True) -> int:
+        """
+        Restore persisted data into the store and start logging; return records replayed.
+
+        With ``restore=False`` (reopening after ``close``) the store keeps
+        its data and a snapshot of it replaces the files, so writes made
+        while logging was stopped are not lost.
+        """
+        if self._file is not None:
+            return 0
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        generation = self._restore_snapshot() if restore else 0
+        replayed = 0
+        segments = self._list_files(_SEGMENT_RE)
+        for segment_generation, path in segments:
+            if restore and segment_generation >= generation:
+                replayed += self._replay(path)
+        if not restore:
+            generation = max([generation] + [g for g, _ in self._list_files(_SNAPSHOT_RE)])
+
+        last = max([generation] + [g for g, _ in segments])
+        self._open_segment(last + 1)
+        self._last_snapshot = time.monotonic()
+        self._snapshot_written = self._written
+        self._replayed = replayed > 0
+        self.memory_store.add_listener(self._on_write)
+        self.resume()
+        if not restore:
+            self.snapshot()
+        return replayed
+
+    def close(self) -> None:
+        """Flush everything to disk and stop logging."""
+        if self._file is None:
+            return
+        self.memory_store.remove_listener(self._on_write)
+        self.pause()
+        with self._lock:
+            self._file.close()
+            self._file = None
+
+    def pause(self) -> None:
+        """Flush and stop the background thread, still logging writes (before forking)."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def resume(self) -> None:
+        """Restart the background thread stopped by ``pause``."""
+        if self._file is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._background, daemon=True)
+        self._thread.start()
+
+    def detach(self) -> None:
+        """Stop logging without touching files (forked replica processes)."""
+        self.memory_store.remove_listener(self._on_write)
+        self._file = None
+
+    def is_open(self) -> bool:
+        """Check if writes are being logged."""
+        return self._file is not None
+
+    def flush(self) -> None:
+        """Make every logged write durable now."""
+        self._sync(self._written)
+
+    def snapshot(self) -> Optional[str]:
+        """Compact the log into a snapshot; return the snapshot path."""
+        if self._file is None:
+            return None
+        with self._snapshot_lock:
+            self._last_snapshot = time.monotonic()
+            self._snapshot_written = self._written
+            self._replayed = False
+            generation, tables, versions = self.memory_store.checkpoint(self._rotate_segment)
+
+            path = os.path.join(self.data_dir, f"snapshot-{generation:06d}.dsnap")
+            write_snapshot(path, tables, versions)
+            self._sync_dir()
+
+            for old_generation, old_path in (self._list_files(_SEGMENT_RE)
+                                             + self._list_files(_SNAPSHOT_RE)):
+                if old_generation < generation:
+                    try:
+                        os.remove(old_path)
+                    except OSError:
+                        pass  # Still mapped on platforms that lock mapped files
+            return path
+
+    def get_wal_size(self) -> int:
+        """Get bytes in the current log segment."""
+        with self._lock:
+            return self._file.tell() if self._file is not None else 0
+
+    def _on_write(self, operation: str, table_name: Optional[str], key, data) -> None:
+        """Append an applied write (runs under the store lock)."""
+        if operation == "restore":
+            return
+        payload = self._codec.dumps([operation, table_name, key, data])
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            self._file.write(record)
+            self._written += 1
+            sequence = self._written
+        if self.durability == "sync":
+            self._sync(sequence)
+
+    def _sync(self, sequence: int) -> None:
+        """Fsync until record ``sequence`` is durable, sharing one fsync among waiters."""
+        with self._sync_cond:
+            while self._synced < sequence:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                self._syncing = True
+                self._sync_cond.release()
+                try:
+                    fileno = None
+                    with self._lock:
+                        target = self._written
+                        if self._file is not None:
+                            self._file.flush()
+                            # Own descriptor, so a segment switch cannot close it under us
+                            fileno = os.dup(self._file.fileno())
+                    if fileno is not None:
+                        try:
+                            os.fsync(fileno)
+                        finally:
+                            os.close(fileno)
+                finally:
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    self._sync_cond.notify_all()
+                self._synced = max(self._synced, target)
+
+    def _background(self) -> None:
+        """Group-commit, flush and compact on a timer."""
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                if self.durability == "batch":
+                    self._sync(self._written)
+                else:
+                    with self._lock:
+                        self._file.flush()
+                if self._snapshot_due():
+                    self.snapshot()
+            except Exception:
+                pass  # Keep logging; the next round retries
+
+    def _snapshot_due(self) -> bool:
+        """Whether the log has grown past its size limit or is due for compaction."""
+        if self.snapshot_wal_size and self.get_wal_size() > self.snapshot_wal_size:
+            return True
+        if not self.snapshot_interval:
+            return False
+        pending = self._written > self._snapshot_written or self._replayed
+        return pending and time.monotonic() - self._last_snapshot >= self.snapshot_interval
+
+    def _rotate_segment(self, tables: Dict[str, Any],
+                        versions: Dict[str, int]) -> Tuple[int, Dict[str, Any], Dict[str, int]]:
+        """Start a new segment while writes are paused (checkpoint callback)."""
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._open_segment(self._generation + 1)
+            self._synced = max(self._synced, self._written)
+            return self._generation, tables, versions
+
+    def _open_segment(self, generation: int) -> None:
+        path = os.path.join(self.data_dir, f"wal-{generation:06d}.log")
+        self._file = open(path, "ab")
+        self._generation = generation
+        self._sync_dir()
+
+    def _restore_snapshot(self) -> int:
+        """Load the newest readable snapshot; return its generation (0 if none)."""
+        for generation, path in reversed(self._list_files(_SNAPSHOT_RE)):
+            try:
+                tables, versions = open_snapshot(path)
+                self.memory_store.restore(tables, versions)
+                return generation
+            except (OSError, ValueError, KeyError, TypeError):
+                continue  # Partially written or corrupt; fall back to an older one
+        return 0
+
+    def _replay(self, path: str) -> int:
+        """Apply the records of one segment, truncating a torn tail."""
+        replayed = 0
+        with open(path, "r+b") as f:
+            data = f.read()
+            offset = 0
+            while offset + RECORD_HEADER.size <= len(data):
+                length, checksum = RECORD_HEADER.unpack_from(data, offset)
+                start = offset + RECORD_HEADER.size
+                payload = data[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    break
+                operation, table_name, key, value = self._codec.loads(payload)
+                self.memory_store.apply_change(operation, table_name, key, value)
+                replayed += 1
+                offset = start + length
+            if offset < len(data):
+                f.truncate(offset)
+        return replayed
+
+    def _list_files(self, pattern) -> List[Tuple[int, str]]:
+        """List (generation, path) of matching files, oldest first."""
+        files = []
+        for name in os.listdir(self.data_dir):
+            match = pattern.match(name)
+            if match:
+                files.append((int(match.group(1)), os.path.join(self.data_dir, name)))
+        return sorted(files)
+
+    def _sync_dir(self) -> None:
+        """Persist directory entries (new or renamed files)."""
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.data_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,206 @@
+"""Read-through caching of database rows in ``MemoryStore``."""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, List, Tuple
+from ..config.settings import (
+    READ_THROUGH_MAX_ROWS, READ_THROUGH_MAX_BYTES, READ_THROUGH_NEGATIVE_TTL,
+    READ_THROUGH_NEGATIVE_SIZE
+)
+from .memory_store import MemoryStore
+
+
+def _row_size(key: Any, row: Any) -> int:
+    """Estimate the memory a row holds (shallow sizes of the dict, key and values)."""
+    size = sys.getsizeof(key) + sys.getsizeof(row)
+    if isinstance(row, dict):
+        for value in row.values():
+            size += sys.getsizeof(value)
+    return size
+
+
+class ReadThroughCache:
+    """
+    Keeps the hot rows of database tables in a ``MemoryStore``.
+
+    Single-row reads that miss memory load the row from the database and
+    hold it in the store (``MemoryStore.cache_row``). Only rows the
+    database has are tracked (least recently used first) and may be
+    evicted: rows loaded from it, and rows whose write was queued for it
+    (``mark_persisted``). Any other write to a row pins it in memory until
+    it is written through again. Once tracked rows pass ``max_rows`` rows
+    or ``max_bytes`` (estimated) the coldest are evicted
+    (``MemoryStore.evict``), which drops them from memory without
+    tombstones or new versions and marks the table partial, so whole-table
+    reads go to the database (see ``DataManager``). Rows with writes still
+    queued in a ``WriteBehindQueue`` are never evicted.
+
+    Keys the database does not have are remembered for ``negative_ttl``
+    seconds (up to ``negative_size`` keys), so repeated reads of absent
+    rows do not reach the database; deleted keys are remembered the same
+    way and a write to the key forgets it.
+
+    Rows restored from snapshots or bulk loads are not tracked and stay.
+    """
+
+    def __init__(self, memory_store: MemoryStore, db_connector,
+                 key_column: Callable[[str], str], write_behind=None,
+                 max_rows: int = READ_THROUGH_MAX_ROWS, max_bytes: int = READ_THROUGH_MAX_BYTES,
+                 negative_ttl: float = READ_THROUGH_NEGATIVE_TTL,
+                 negative_size: int = READ_THROUGH_NEGATIVE_SIZE):
+        """Initialize cache; ``key_column(table)`` names each table's key column."""
+        self.memory_store = memory_store
+        self.db = db_connector
+        self.key_column = key_column
+        self.write_behind = write_behind
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.negative_ttl = negative_ttl
+        self.negative_size = negative_size
+        self._rows: "OrderedDict[Tuple[str, Any], int]" = OrderedDict()  # {(table, key): size}
+        self._bytes = 0
+        self._negative: "OrderedDict[Tuple[str, Any], float]" = OrderedDict()  # {(table, key): expiry}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "negative_hits": 0, "evictions": 0}
+
+    def attach(self) -> None:
+        """Track writes to the store."""
+        self.memory_store.add_listener(self._on_write)
+
+    def get(self, table_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Get a row from memory, loading it from the database on a miss."""
+        version = self.memory_store.get_version(table_name)
+        row = self.memory_store.get_data(table_name, key)
+        if row is not None:
+            self.touch(table_name, key)
+            return row
+
+        row_id = (table_name, key)
+        with self._lock:
+            self._stats["misses"] += 1
+            expiry = self._negative.get(row_id)
+            if expiry is not None:
+                if expiry > time.monotonic():
+                    self._stats["negative_hits"] += 1
+                    return None
+                del self._negative[row_id]
+
+        try:
+            row = self.db.fetch_row(table_name, self.key_column(table_name), key)
+        except Exception:
+            return None  # Database unavailable: a miss, but not proof the row is absent
+
+        if row is None:
+            with self._lock:
+                self._mark_absent(row_id)
+            return None
+        if self.memory_store.cache_row(table_name, key, row, version):
+            with self._lock:
+                self._stats["loads"] += 1
+                self._track(row_id, _row_size(key, row))
+            self.evict_if_needed()
+        return row
+
+    def mark_persisted(self, table_name: str, key: str) -> None:
+        """Make a row evictable once its current value was queued for the database."""
+        row = self.memory_store.get_data(table_name, key)
+        if row is None:
+            return
+        with self._lock:
+            self._track((table_name, key), _row_size(key, row))
+        self.evict_if_needed()
+
+    def touch(self, table_name: str, key: str) -> None:
+        """Mark a row as recently used."""
+        row_id = (table_name, key)
+        with self._lock:
+            self._stats["hits"] += 1
+            if row_id in self._rows:
+                self._rows.move_to_end(row_id)
+
+    def evict_if_needed(self) -> int:
+        """Evict the coldest rows while over budget; return rows evicted."""
+        victims: Dict[str, List[Any]] = {}
+        with self._lock:
+            checked = 0
+            while self._over_budget() and checked < len(self._rows):
+                row_id, size = self._rows.popitem(last=False)
+                if self.write_behind is not None and self.write_behind.is_pending(*row_id):
+                    self._rows[row_id] = size  # Not in the database yet; keep it
+                    checked += 1
+                    continue
+                self._bytes -= size
+                victims.setdefault(row_id[0], []).append(row_id[1])
+
+        evicted = 0
+        for table_name, keys in victims.items():
+            evicted += self.memory_store.evict(table_name, keys)
+        if evicted:
+            with self._lock:
+                self._stats["evictions"] += evicted
+        return evicted
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get counters, tracked rows and estimated bytes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["rows"] = len(self._rows)
+            stats["bytes"] = self._bytes
+            stats["negative"] = len(self._negative)
+        return stats
+
+    def _over_budget(self) -> bool:
+        return ((self.max_rows and len(self._rows) > self.max_rows)
+                or (self.max_bytes and self._bytes > self.max_bytes))
+
+    def _track(self, row_id: Tuple[str, Any], size: int) -> None:
+        """Record a row held in memory as most recently used (lock held)."""
+        previous = self._rows.pop(row_id, None)
+        if previous is not None:
+            self._bytes -= previous
+        self._rows[row_id] = size
+        self._bytes += size
+        self._negative.pop(row_id, None)
+
+    def _untrack(self, row_id: Tuple[str, Any]) -> None:
+        """Forget a row no longer in memory (lock held)."""
+        size = self._rows.pop(row_id, None)
+        if size is not None:
+            self._bytes -= size
+
+    def _mark_absent(self, row_id: Tuple[str, Any]) -> None:
+        """Remember a key as absent (lock held)."""
+        if not self.negative_size:
+            return
+        self._negative[row_id] = time.monotonic() + self.negative_ttl
+        self._negative.move_to_end(row_id)
+        while len(self._negative) > self.negative_size:
+            self._negative.popitem(last=False)
+
+    def _on_write(self, operation: str, table_name: Optional[str], key, data) -> None:
+        """Keep tracking in step with the store (runs under the store lock)."""
+        with self._lock:
+            if operation in ("store", "update"):
+                # Memory is ahead of the database: pinned until mark_persisted
+                self._untrack((table_name, key))
+                self._negative.pop((table_name, key), None)
+            elif operation == "store_many":
+                for row_key in data:
+                    self._untrack((table_name, row_key))
+                    self._negative.pop((table_name, row_key), None)
+            elif operation in ("delete", "delete_many"):
+                # Absent now, even if a queued database delete has not run yet
+                for row_key in ([key] if operation == "delete" else data):
+                    self._untrack((table_name, row_key))
+                    self._mark_absent((table_name, row_key))
+            elif operation == "clear" and table_name is not None:
+                for row_id in [row_id for row_id in self._rows if row_id[0] == table_name]:
+                    self._untrack(row_id)
+                for row_id in [row_id for row_id in self._negative if row_id[0] == table_name]:
+                    del self._negative[row_id]
+            else:  # Whole store cleared, loaded or restored
+                self._rows.clear()
+                self._bytes = 0
+                self._negative.clear()
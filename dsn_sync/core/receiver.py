@@ -1,19 +1,40 @@
 """Receive and process data from frontend (WRITE operations)."""
 
-from typing import Dict, Any, Callable, Optional
-from functools import wraps
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Dict, Any, Callable, Optional, List
+from functools import partial, wraps
+from ..config.settings import HANDLER_DISPATCH, HANDLER_MAX_WORKERS, HANDLER_TIMEOUT
+from .dispatcher import HandlerDispatcher
 
 
 class Receiver:
-    """Handles incoming data from frontend."""
+    """
+    Handles incoming data from frontend.
     
-    def __init__(self):
+    Handlers (plain or ``async def``) run through a ``HandlerDispatcher``:
+    in order for the same (table, key) and, with the "threads" or
+    "asyncio" dispatch modes, in parallel for different rows, so a batch
+    waits for its slowest row instead of the sum of its handlers. A
+    handler that does not finish within ``timeout`` seconds rejects its
+    write.
+
+    An ``on_accepted`` callback runs right after a handler accepts, in the
+    same per-row slot, so writes to one row are applied in the order their
+    handlers ran. It is skipped if the caller stopped waiting first.
+    """
+    
+    def __init__(self, dispatch: str = HANDLER_DISPATCH, max_workers: int = HANDLER_MAX_WORKERS,
+                 timeout: float = HANDLER_TIMEOUT):
         """Initialize receiver."""
         self._event_handlers: Dict[str, Dict[str, Callable]] = {
             "create": {},
             "update": {},
             "delete": {}
         }
+        self.dispatcher = HandlerDispatcher(dispatch, max_workers)
+        self.timeout = timeout
     
     def on_create(self, table_name: str):
         """Decorator for create event handler."""
@@ -36,27 +57,101 @@ class Receiver:
             return func
         return decorator
     
-    def process_incoming(self, operation: str, table_name: str, key: str, data: Dict[str, Any]) -> bool:
+    def process_incoming(self, operation: str, table_name: str, key: str, data: Dict[str, Any],
+                         on_accepted: Optional[Callable[[], Any]] = None) -> bool:
         """Process incoming data packet."""
+        apply = _Apply(on_accepted) if on_accepted is not None else None
+        return self._result(self._submit(operation, table_name, key, data, apply),
+                            self.timeout, apply)
+    
+    def submit(self, operation: str, table_name: str, key: str, data: Dict[str, Any]) -> Future:
+        """Dispatch a packet to its handler; the future holds the handler's return value."""
+        return self._submit(operation, table_name, key, data, None)
+    
+    def _submit(self, operation: str, table_name: str, key: str, data: Dict[str, Any],
+                apply: Optional["_Apply"]) -> Future:
         operation = operation.lower()
+        handler = self._event_handlers.get(operation, {}).get(table_name)
+        if handler is None:
+            future: Future = Future()
+            future.set_result(False)
+            return future
         
-        if operation not in self._event_handlers:
-            return False
-        
-        if table_name not in self._event_handlers[operation]:
-            return False
-        
-        handler = self._event_handlers[operation][table_name]
-        
+        # Call user's event handler
+        return self.dispatcher.submit((table_name, key), handler, data, then=apply)
+    
+    def close(self) -> bool:
+        """Wait up to ``timeout`` for running handlers and stop dispatch threads."""
+        return self.dispatcher.close(self.timeout)
+    
+    @staticmethod
+    def _result(future: Future, timeout: Optional[float], apply: Optional["_Apply"] = None) -> bool:
+        """Whether a dispatched handler accepted its packet."""
         try:
-            # Call user's event handler
-            result = handler(data)
-            return result is not False
+            return future.result(timeout) is not False
+        except TimeoutError:
+            if apply is None or apply.cancel():
+                return False
+            # Accepted and being applied already; that part does not block
+            return Receiver._result(future, None)
         except Exception as e:
-            # Log error in production
+            # Handler failed; log error in production
             return False
     
+    def process_batch(self, operations: List[Dict[str, Any]],
+                      on_accepted: Optional[Callable[[Dict[str, Any]], Any]] = None) -> List[bool]:
+        """
+        Process a batch of operations in order.
+        
+        Each operation is a dict with "operation", "table", "key" and
+        "data"; returns one result per operation. Every handler is
+        dispatched before waiting for any, so rows are handled in parallel
+        when the dispatch mode allows it. ``on_accepted`` is called with
+        each accepted operation.
+        """
+        submitted = []
+        for op in operations:
+            if not isinstance(op, dict):
+                submitted.append((None, None))
+                continue
+            apply = None
+            if on_accepted is not None:
+                apply = _Apply(partial(on_accepted, op))
+            submitted.append((self._submit(
+                str(op.get("operation", "")),
+                op.get("table"),
+                op.get("key"),
+                op.get("data") or {},
+                apply
+            ), apply))
+        
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        results = []
+        for future, apply in submitted:
+            if future is None:
+                results.append(False)
+                continue
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            results.append(self._result(future, remaining, apply))
+        return results
+    
     def has_handler(self, operation: str, table_name: str) -> bool:
         """Check if handler exists for operation."""
         return table_name in self._event_handlers.get(operation.lower(), {})
 
+
+
+class _Apply:
+    """An ``on_accepted`` callback that runs once, unless cancelled first."""
+
+    def __init__(self, on_accepted: Callable[[], Any]):
+        self._on_accepted = on_accepted
+        self._claim = threading.Lock()
+
+    def __call__(self, result: Any) -> None:
+        if result is not False and self._claim.acquire(blocking=False):
+            self._on_accepted()
+
+    def cancel(self) -> bool:
+        """Stop the callback from running; False if it has started."""
+        return self._claim.acquire(blocking=False)
@@ -0,0 +1,60 @@
+"""Compact tuple storage for rows of tables with a known schema."""
+
+from typing import Dict, Any, Iterable, Iterator, Tuple
+from ..config.settings import COMPACT_ROWS_MAX_SHAPES
+
+
+class RowLayout:
+    """
+    Packs row dicts into tuples.
+
+    A packed row is ``(value, ..., shape)`` where ``shape`` is a tuple of
+    field names shared by every row with the same fields in the same order
+    (the schema's field order is known up front), so per-row cost is one
+    tuple instead of a dict with its own hash table. ``unpack`` rebuilds
+    an equal dict, field order included. Rows with more than
+    ``max_shapes`` distinct field layouts, and non-dict rows, are kept as
+    they are.
+    """
+
+    def __init__(self, fields: Iterable[str], max_shapes: int = COMPACT_ROWS_MAX_SHAPES):
+        """Initialize layout seeded with the schema field order."""
+        self.fields = tuple(fields)
+        self.max_shapes = max_shapes
+        self._shapes: Dict[Tuple[str, ...], Tuple[str, ...]] = {self.fields: self.fields}
+
+    def pack(self, row: Any) -> Any:
+        """Pack a row dict (other values are returned unchanged)."""
+        if type(row) is not dict:
+            return row
+        names = tuple(row)
+        shape = self._shapes.get(names)
+        if shape is None:
+            if len(self._shapes) >= self.max_shapes:
+                return row
+            shape = self._shapes.setdefault(names, names)
+        return (*row.values(), shape)
+
+    @staticmethod
+    def unpack(packed: Any) -> Any:
+        """Rebuild the row dict (unpacked rows are returned unchanged)."""
+        if type(packed) is tuple:
+            # zip stops at the shape's length, before the shape itself
+            return dict(zip(packed[-1], packed))
+        return packed
+
+
+class UnpackedTable:
+    """Read-only view yielding unpacked rows of a packed table (for snapshot writers)."""
+
+    def __init__(self, rows: Dict[str, Any], version: int = 0):
+        self._rows = rows
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        unpack = RowLayout.unpack
+        for key, row in self._rows.items():
+            yield key, unpack(row)
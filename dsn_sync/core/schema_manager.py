@@ -3,6 +3,7 @@
 from typing import Dict, Any, Optional
 from ..config.settings import SYNC_KEY_FIELD_NAME
 from ..database.schema_updater import SchemaUpdater
+from .indexes import INDEX_KINDS
 
 
 class SchemaManager:
@@ -46,12 +47,33 @@ class SchemaManager:
         if "fields" not in schema or not isinstance(schema["fields"], list):
             raise ValueError("Schema must have 'fields' as a list")
         
+        for field, kind in self._index_definitions(schema).items():
+            if field not in schema["fields"] and field != schema["key"]:
+                raise ValueError(f"Index field '{field}' is not in the schema")
+            if kind not in INDEX_KINDS:
+                raise ValueError(f"Index kind must be one of {INDEX_KINDS}")
+        
         return True
     
     def get_schema(self, table_name: str) -> Optional[Dict[str, Any]]:
         """Get schema for table."""
         return self._schemas.get(table_name)
     
+    def get_indexes(self, table_name: str) -> Dict[str, str]:
+        """Get {field: "hash" | "sorted"} indexes declared for a table."""
+        schema = self._schemas.get(table_name)
+        return self._index_definitions(schema) if schema else {}
+    
+    @staticmethod
+    def _index_definitions(schema: Dict[str, Any]) -> Dict[str, str]:
+        """Read 'indexes' as a list of fields (hash indexes) or {field: kind}."""
+        indexes = schema.get("indexes") or {}
+        if isinstance(indexes, list):
+            return {field: "hash" for field in indexes}
+        if not isinstance(indexes, dict):
+            raise ValueError("Schema 'indexes' must be a list or a dictionary")
+        return dict(indexes)
+    
     def get_all_schemas(self) -> Dict[str, Dict[str, Any]]:
         """Get all schemas."""
         return self._schemas.copy()
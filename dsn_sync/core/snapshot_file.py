@@ -0,0 +1,169 @@
+"""Memory-mapped binary snapshot format with lazily decoded rows."""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Any, Optional, Iterator, Tuple
+from .codecs import CODECS
+
+# File layout:
+#   header   magic | format version
+#   rows     one encoded row after another
+#   offsets  per table, count + 1 little-endian u64 row boundaries (8-aligned)
+#   index    encoded {"versions": {...}, "tables": {name: {"version", "keys",
+#            "offsets", "count"}}}
+#   footer   index offset | index length | magic
+SNAPSHOT_MAGIC = b"DSNS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct(">4sB")
+SNAPSHOT_FOOTER = struct.Struct(">QQ4s")
+
+_codec = CODECS.get("orjson") or CODECS["json"]
+
+
+class LazyTable:
+    """
+    Read-only table backed by a mapped snapshot file.
+
+    Only keys and row offsets are read when the snapshot is opened; a row
+    is decoded the first time it is requested, and ``load`` decodes the
+    whole table. Holds the mapping open for as long as it is referenced.
+    """
+
+    def __init__(self, buffer: mmap.mmap, version: int, keys: list, offsets):
+        self._buffer = buffer
+        self.version = version
+        self._keys = keys
+        self._offsets = offsets
+        self._positions: Optional[Dict[str, int]] = None
+        self._rows: Dict[str, Any] = {}  # Decoded rows
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index()
+
+    def keys(self):
+        return list(self._keys)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a row, decoding it on first access."""
+        row = self._rows.get(key)
+        if row is not None:
+            return row
+        position = self._index().get(key)
+        if position is None:
+            return default
+        row = self._rows[key] = _codec.loads(self._raw(position))
+        return row
+
+    def load(self) -> Dict[str, Any]:
+        """Decode every row."""
+        loads = _codec.loads
+        rows = self._rows
+        return {
+            key: rows[key] if key in rows else loads(self._raw(position))
+            for position, key in enumerate(self._keys)
+        }
+
+    def raw_items(self) -> Iterator[Tuple[str, bytes]]:
+        """Yield (key, encoded row) without decoding (for compaction)."""
+        for position, key in enumerate(self._keys):
+            yield key, self._raw(position)
+
+    def _raw(self, position: int) -> bytes:
+        return self._buffer[self._offsets[position]:self._offsets[position + 1]]
+
+    def _index(self) -> Dict[str, int]:
+        if self._positions is None:
+            self._positions = {key: position for position, key in enumerate(self._keys)}
+        return self._positions
+
+
+def write_snapshot(path: str, tables: Dict[str, Any], versions: Dict[str, int]) -> None:
+    """
+    Write tables to ``path`` atomically (temp file, fsync, rename).
+
+    ``tables`` values are dicts of rows or ``LazyTable`` objects, whose
+    encoded rows are copied without decoding.
+    """
+    temp_path = path + ".tmp"
+    index: Dict[str, Any] = {"versions": versions, "tables": {}}
+    with open(temp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+        position = SNAPSHOT_HEADER.size
+        boundaries: Dict[str, list] = {}
+        for table_name, rows in tables.items():
+            if isinstance(rows, LazyTable):
+                items = rows.raw_items()
+            else:
+                items = ((key, _codec.dumps(row)) for key, row in rows.items())
+            keys = []
+            offsets = [position]
+            for key, encoded in items:
+                f.write(encoded)
+                position += len(encoded)
+                keys.append(key)
+                offsets.append(position)
+            boundaries[table_name] = offsets
+            index["tables"][table_name] = {
+                "version": versions.get(table_name, getattr(rows, "version", 0)),
+                "keys": keys,
+                "count": len(keys),
+            }
+
+        for table_name, offsets in boundaries.items():
+            padding = -position % 8
+            f.write(b"\0" * padding)
+            position += padding
+            index["tables"][table_name]["offsets"] = position
+            encoded = array("Q", offsets)
+            if sys.byteorder != "little":
+                encoded.byteswap()
+            encoded = encoded.tobytes()
+            f.write(encoded)
+            position += len(encoded)
+
+        encoded_index = _codec.dumps(index)
+        f.write(encoded_index)
+        f.write(SNAPSHOT_FOOTER.pack(position, len(encoded_index), SNAPSHOT_MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def open_snapshot(path: str) -> Tuple[Dict[str, LazyTable], Dict[str, int]]:
+    """Map a snapshot file; raises ValueError if it is not a valid snapshot."""
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            raise ValueError("Empty snapshot file") from e
+
+    size = len(buffer)
+    if size < SNAPSHOT_HEADER.size + SNAPSHOT_FOOTER.size:
+        raise ValueError("Snapshot file too short")
+    magic, version = SNAPSHOT_HEADER.unpack_from(buffer, 0)
+    index_offset, index_length, footer_magic = SNAPSHOT_FOOTER.unpack_from(
+        buffer, size - SNAPSHOT_FOOTER.size
+    )
+    if magic != SNAPSHOT_MAGIC or footer_magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("Not a snapshot file")
+    if index_offset + index_length + SNAPSHOT_FOOTER.size != size:
+        raise ValueError("Snapshot file truncated")
+
+    index = _codec.loads(buffer[index_offset:index_offset + index_length])
+    view = memoryview(buffer)
+    tables = {}
+    for table_name, entry in index["tables"].items():
+        start = entry["offsets"]
+        raw_offsets = view[start:start + 8 * (entry["count"] + 1)]
+        if sys.byteorder == "little":
+            offsets = raw_offsets.cast("Q")  # Zero-copy
+        else:
+            offsets = struct.unpack(f"<{entry['count'] + 1}Q", raw_offsets)
+        tables[table_name] = LazyTable(buffer, entry["version"], entry["keys"], offsets)
+    return tables, {table: int(version) for table, version in index["versions"].items()}
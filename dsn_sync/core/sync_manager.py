@@ -3,16 +3,19 @@
 from typing import Optional
 from ..security.key_manager import KeyManager
 from ..security.token_manager import TokenManager
+from .codecs import Codec
 from ..server.endpoint_manager import EndpointManager
 
 
 class SyncManager:
     """Main synchronization manager."""
     
-    def __init__(self, key_manager: KeyManager, endpoint_manager: EndpointManager):
+    def __init__(self, key_manager: KeyManager, endpoint_manager: EndpointManager,
+                 codec: Optional[Codec] = None):
         """Initialize sync manager."""
         self.key_manager = key_manager
         self.endpoint_manager = endpoint_manager
+        self.codec = codec
         self.token_manager: Optional[TokenManager] = None
         self._initialized = False
     
@@ -23,7 +26,7 @@ class SyncManager:
         
         key = self.key_manager.get_key()
         if key:
-            self.token_manager = TokenManager(key)
+            self.token_manager = TokenManager(key, codec=self.codec)
             self._initialized = True
             return True
         return False
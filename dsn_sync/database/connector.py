@@ -1,43 +1,225 @@
 """Direct database connection handler."""
 
-from typing import Optional, Dict, Any, List
-from ..config.settings import SYNC_KEY_FIELD_NAME
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Sequence, Iterable
+from ..config.settings import SYNC_KEY_FIELD_NAME, DB_POOL_SIZE
+from .drivers import DatabaseDriver, parse_connection_string
+from .pool import ConnectionPool
 
 
 class DatabaseConnector:
-    """Handles direct database connections."""
-    
-    def __init__(self, connection_string: Optional[str] = None):
+    """
+    Handles direct database connections.
+
+    Connections come from a thread-safe ``ConnectionPool``; each keeps a
+    cache of compiled statements, and the SQL this class generates is
+    built once per table and reused, so repeated reads and bulk writes
+    skip re-parsing. Backends are ``DatabaseDriver`` objects chosen by the
+    connection string scheme (``sqlite://`` is built in).
+    """
+
+    def __init__(self, connection_string: Optional[str] = None, pool_size: int = DB_POOL_SIZE):
         """Initialize database connector."""
         self.connection_string = connection_string
-        self.connection = None
-    
+        self.pool_size = pool_size
+        self.driver: Optional[DatabaseDriver] = None
+        self.pool: Optional[ConnectionPool] = None
+        self._sql: Dict[tuple, str] = {}  # Generated statements
+        self._lock = threading.Lock()
+
     def connect(self, connection_string: Optional[str] = None) -> bool:
         """Connect to database."""
-        # Placeholder for database connection
-        # User will provide actual connection logic
         if connection_string:
             self.connection_string = connection_string
-        # Connection logic will be implemented based on user's database
+        if not self.connection_string:
+            return False
+        try:
+            driver, target = parse_connection_string(self.connection_string)
+            size = min(self.pool_size, driver.max_connections(target) or self.pool_size)
+            pool = ConnectionPool(lambda: driver.connect(target), size)
+            # Open the first connection now so a bad target fails here
+            with pool.connection():
+                pass
+        except Exception:
+            return False
+        with self._lock:
+            old_pool = self.pool
+            self.driver, self.pool = driver, pool
+            self._sql.clear()
+        if old_pool is not None:
+            old_pool.close()
         return True
-    
-    def execute_query(self, query: str, params: Optional[Dict] = None) -> Any:
-        """Execute SQL query."""
-        # Placeholder - user will implement based on their database
-        pass
-    
+
+    def is_connected(self) -> bool:
+        """Check if a database is connected."""
+        return self.pool is not None
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        with self._lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.close()
+
+    def execute_query(self, query: str, params: Optional[Sequence] = None) -> Any:
+        """Execute SQL query; rows (as dicts) for queries, else affected row count."""
+        with self._connection() as connection:
+            cursor = connection.execute(query, params or ())
+            if cursor.description is not None:
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            connection.commit()
+            return cursor.rowcount
+
+    def execute_many(self, query: str, params_seq: Iterable[Sequence]) -> int:
+        """Execute one statement for many parameter sets in one transaction."""
+        with self._connection() as connection:
+            cursor = connection.executemany(query, params_seq)
+            connection.commit()
+            return cursor.rowcount
+
+    @contextmanager
+    def transaction(self):
+        """Borrow a connection for several statements, committed together."""
+        with self._connection() as connection:
+            yield connection
+            connection.commit()
+
     def add_sync_key_column(self, table_name: str) -> bool:
         """Add sync key column to table."""
-        # Placeholder - user will implement based on their database
-        # Example: ALTER TABLE {table_name} ADD COLUMN {SYNC_KEY_FIELD_NAME} VARCHAR(255)
-        return True
-    
+        if not self.table_exists(table_name):
+            return False
+        if self.column_exists(table_name, SYNC_KEY_FIELD_NAME):
+            return True
+        try:
+            self.execute_query(
+                f"ALTER TABLE {self._quote(table_name)} "
+                f"ADD COLUMN {self._quote(SYNC_KEY_FIELD_NAME)} VARCHAR(255)"
+            )
+            return True
+        except Exception:
+            return False
+
     def table_exists(self, table_name: str) -> bool:
         """Check if table exists."""
-        # Placeholder
-        return False
-    
+        if self.pool is None:
+            return False
+        with self._connection() as connection:
+            return self.driver.table_exists(connection, table_name)
+
+    def get_columns(self, table_name: str) -> List[str]:
+        """Get column names of a table."""
+        if self.pool is None:
+            return []
+        with self._connection() as connection:
+            return self.driver.get_columns(connection, table_name)
+
+    def column_exists(self, table_name: str, column_name: str) -> bool:
+        """Check if a column exists in a table."""
+        return column_name in self.get_columns(table_name)
+
+    def fetch_row(self, table_name: str, key_column: str, key: Any) -> Optional[Dict[str, Any]]:
+        """Get the row whose ``key_column`` equals ``key``."""
+        sql = self._statement("select", table_name, key_column)
+        rows = self.execute_query(sql, (key,))
+        return rows[0] if rows else None
+
+    def fetch_all(self, table_name: str, key_column: str) -> Dict[str, Dict[str, Any]]:
+        """Get every row of a table as {str(key): row}."""
+        sql = self._statement("select_all", table_name, key_column)
+        return {str(row[key_column]): row for row in self.execute_query(sql)}
+
+    def upsert_many(self, table_name: str, key_column: str,
+                    rows: Dict[Any, Dict[str, Any]], connection=None) -> int:
+        """
+        Insert or update rows ({key: row}) with batched statements; return rows written.
+
+        Runs in its own transaction, or in ``connection``'s when given
+        (see ``transaction``).
+        """
+        # Rows with the same columns share one UPDATE and one INSERT statement
+        groups: Dict[tuple, list] = {}
+        for key, row in rows.items():
+            columns = tuple(column for column in row if column != key_column)
+            groups.setdefault(columns, []).append((key, row))
+
+        with self._transaction(connection) as connection:
+            for columns, items in groups.items():
+                if columns:
+                    connection.executemany(
+                        self._statement("update", table_name, key_column, columns),
+                        [tuple(row[column] for column in columns) + (key,) for key, row in items]
+                    )
+                # Inserts only the keys the update did not find
+                connection.executemany(
+                    self._statement("insert", table_name, key_column, columns),
+                    [(key,) + tuple(row[column] for column in columns) + (key,)
+                     for key, row in items]
+                )
+        return len(rows)
+
+    def delete_many(self, table_name: str, key_column: str, keys: Iterable[Any],
+                    connection=None) -> int:
+        """Delete rows by key in one batched statement; return rows deleted."""
+        with self._transaction(connection) as connection:
+            cursor = connection.executemany(
+                self._statement("delete", table_name, key_column),
+                [(key,) for key in keys]
+            )
+            return cursor.rowcount
+
     def get_connection(self):
-        """Get database connection object."""
-        return self.connection
+        """Get database connection pool (``with pool.connection() as conn``)."""
+        return self.pool
+
+    @contextmanager
+    def _connection(self):
+        pool = self.pool
+        if pool is None:
+            raise RuntimeError("Database not connected")
+        with pool.connection() as connection:
+            yield connection
+
+    @contextmanager
+    def _transaction(self, connection=None):
+        """Use the caller's transaction, or run a new one."""
+        if connection is not None:
+            yield connection
+        else:
+            with self.transaction() as connection:
+                yield connection
+
+    def _quote(self, identifier: str) -> str:
+        if self.driver is None:
+            raise RuntimeError("Database not connected")
+        return self.driver.quote(identifier)
+
+    def _statement(self, kind: str, table_name: str, key_column: str, columns: tuple = ()) -> str:
+        """Build (once) the SQL for a generated statement."""
+        cache_key = (kind, table_name, key_column, columns)
+        sql = self._sql.get(cache_key)
+        if sql is not None:
+            return sql
 
+        quote = self._quote
+        mark = self.driver.placeholder
+        table, key = quote(table_name), quote(key_column)
+        if kind == "select":
+            sql = f"SELECT * FROM {table} WHERE {key} = {mark}"
+        elif kind == "select_all":
+            sql = f"SELECT * FROM {table}"
+        elif kind == "update":
+            assignments = ", ".join(f"{quote(column)} = {mark}" for column in columns)
+            sql = f"UPDATE {table} SET {assignments} WHERE {key} = {mark}"
+        elif kind == "insert":
+            names = ", ".join(quote(column) for column in (key_column,) + columns)
+            marks = ", ".join([mark] * (len(columns) + 1))
+            sql = (f"INSERT INTO {table} ({names}) SELECT {marks} "
+                   f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {key} = {mark})")
+        elif kind == "delete":
+            sql = f"DELETE FROM {table} WHERE {key} = {mark}"
+        else:
+            raise ValueError(f"Unknown statement kind: {kind}")
+        self._sql[cache_key] = sql
+        return sql
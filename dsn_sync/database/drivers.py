@@ -0,0 +1,102 @@
+"""Database drivers for ``DatabaseConnector``."""
+
+import sqlite3
+from typing import Dict, Optional, Tuple
+from ..config.settings import DB_CONNECTION_TIMEOUT, DB_STATEMENT_CACHE_SIZE, DB_SQLITE_WAL
+
+
+class DatabaseDriver:
+    """
+    Interface a database backend implements.
+
+    Drivers open DB-API 2.0 connections and answer introspection
+    questions; SQL generated by ``DatabaseConnector`` uses ``placeholder``
+    and ``quote``. Register new backends with ``register_driver``.
+    """
+
+    name = ""
+    placeholder = "?"
+
+    def max_connections(self, target: str) -> Optional[int]:
+        """Cap on pooled connections for ``target`` (None: no limit)."""
+        return None
+
+    def connect(self, target: str):
+        """Open a new DB-API connection to ``target``."""
+        raise NotImplementedError
+
+    def quote(self, identifier: str) -> str:
+        """Quote a table or column name."""
+        return '"' + identifier.replace('"', '""') + '"'
+
+    def table_exists(self, connection, table_name: str) -> bool:
+        """Check if a table exists."""
+        raise NotImplementedError
+
+    def get_columns(self, connection, table_name: str) -> list:
+        """Get column names of a table (empty if it does not exist)."""
+        raise NotImplementedError
+
+
+class SQLiteDriver(DatabaseDriver):
+    """Built-in SQLite backend (``sqlite:///path.db`` or ``sqlite://:memory:``)."""
+
+    name = "sqlite"
+
+    def max_connections(self, target: str) -> Optional[int]:
+        # Each connection to ":memory:" is a separate database
+        return 1 if self._is_memory(target) else None
+
+    def connect(self, target: str):
+        uri = target.startswith("file:")
+        connection = sqlite3.connect(
+            target,
+            timeout=DB_CONNECTION_TIMEOUT,
+            check_same_thread=False,  # The pool hands connections to one thread at a time
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+            uri=uri,
+        )
+        if DB_SQLITE_WAL and not self._is_memory(target):
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def table_exists(self, connection, table_name: str) -> bool:
+        row = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).fetchone()
+        return row is not None
+
+    def get_columns(self, connection, table_name: str) -> list:
+        rows = connection.execute(f"PRAGMA table_info({self.quote(table_name)})").fetchall()
+        return [row[1] for row in rows]
+
+    @staticmethod
+    def _is_memory(target: str) -> bool:
+        return target in ("", ":memory:") or "mode=memory" in target
+
+
+DRIVERS: Dict[str, DatabaseDriver] = {"sqlite": SQLiteDriver()}
+
+
+def register_driver(scheme: str, driver: DatabaseDriver) -> None:
+    """Make ``scheme://...`` connection strings use ``driver``."""
+    DRIVERS[scheme] = driver
+
+
+def parse_connection_string(connection_string: str) -> Tuple[DatabaseDriver, str]:
+    """
+    Split a connection string into driver and target.
+
+    ``sqlite:///relative.db``, ``sqlite:////absolute.db`` and
+    ``sqlite://:memory:`` are understood; a string without a scheme is
+    treated as an SQLite file path. Raises ValueError for unknown schemes.
+    """
+    scheme, separator, target = connection_string.partition("://")
+    if not separator:
+        return DRIVERS["sqlite"], connection_string
+    driver = DRIVERS.get(scheme.lower())
+    if driver is None:
+        raise ValueError(f"No database driver for scheme: {scheme}")
+    if target.startswith("/"):
+        target = target[1:]  # sqlite:///x.db -> x.db, sqlite:////abs.db -> /abs.db
+    return driver, target
@@ -0,0 +1,109 @@
+"""Thread-safe database connection pool."""
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, List
+from ..config.settings import DB_CONNECTION_TIMEOUT, DB_POOL_SIZE
+
+
+class ConnectionPool:
+    """
+    Hands out up to ``size`` connections, one thread at a time each.
+
+    Connections are opened on demand and reused most-recently-used first,
+    so a lightly loaded pool keeps few connections warm (with their
+    statement caches). Callers block up to ``timeout`` seconds when all
+    connections are busy.
+    """
+
+    def __init__(self, factory: Callable, size: int = DB_POOL_SIZE,
+                 timeout: float = DB_CONNECTION_TIMEOUT):
+        """Initialize pool with a connection factory."""
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._factory = factory
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._all: List = []  # Every open connection
+        self._created = 0  # Connections opened or being opened
+        self._lock = threading.Lock()
+        self._closed = False
+        self._pid = os.getpid()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; rolled back if the block raises."""
+        connection = self._acquire()
+        try:
+            yield connection
+        except BaseException:
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            self._release(connection)
+
+    def close(self) -> None:
+        """Close every connection."""
+        with self._lock:
+            self._closed = True
+            connections, self._all = self._all, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _acquire(self):
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1  # Reserve the slot before connecting
+        if create:
+            try:
+                connection = self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            with self._lock:
+                self._all.append(connection)
+            return connection
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("No database connection available") from None
+
+    def _reset_after_fork(self) -> None:
+        """Forget connections inherited from the parent process (never share them)."""
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _release(self, connection) -> None:
+        if self._pid != os.getpid():
+            return  # Borrowed before a fork
+        if self._closed:
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return
+        self._idle.put(connection)
@@ -23,11 +23,15 @@ class SchemaUpdater:
     
     def check_column_exists(self, table_name: str, column_name: str) -> bool:
         """Check if column exists in table."""
-        # Placeholder - implementation depends on database type
-        return False
+        try:
+            return self.db.column_exists(table_name, column_name)
+        except Exception:
+            return False
     
     def add_sync_key_column(self, table_name: str) -> bool:
         """Add sync key field to table."""
+        if not self.db.table_exists(table_name):
+            return False
         if not self.check_column_exists(table_name, SYNC_KEY_FIELD_NAME):
             return self.add_column(table_name, SYNC_KEY_FIELD_NAME)
         return True
@@ -0,0 +1,226 @@
+"""Background write-behind of accepted writes to the database."""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, List, Callable, Tuple
+from ..config.settings import (
+    WRITE_BEHIND_QUEUE_SIZE, WRITE_BEHIND_ENQUEUE_TIMEOUT, WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_INTERVAL, WRITE_BEHIND_MAX_RETRIES, WRITE_BEHIND_RETRY_DELAY
+)
+from .connector import DatabaseConnector
+
+
+class WriteBehindQueue:
+    """
+    Copies writes to the database after they are acknowledged.
+
+    ``enqueue`` only appends to a bounded in-memory queue, so request
+    latency does not include the database. A background thread gathers up
+    to ``batch_size`` writes (waiting at most ``interval``), merges writes
+    to the same row, and commits the batch in one transaction with batched
+    statements (group commit). Failed batches are retried with exponential
+    backoff; once retries run out, each table's writes are tried on their
+    own and only the failing ones are dropped.
+
+    When the queue is full, writers block (backpressure) for up to
+    ``enqueue_timeout`` seconds before the write is dropped and counted.
+    """
+
+    def __init__(self, db_connector: DatabaseConnector, key_column: Callable[[str], str],
+                 max_size: int = WRITE_BEHIND_QUEUE_SIZE,
+                 enqueue_timeout: float = WRITE_BEHIND_ENQUEUE_TIMEOUT,
+                 batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 interval: float = WRITE_BEHIND_INTERVAL,
+                 max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+                 retry_delay: float = WRITE_BEHIND_RETRY_DELAY):
+        """Initialize queue; ``key_column(table)`` names each table's key column."""
+        self.db = db_connector
+        self.key_column = key_column
+        self.max_size = max_size
+        self.enqueue_timeout = enqueue_timeout
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._thread: Optional[threading.Thread] = None
+        self._reset()
+
+    def open(self) -> None:
+        """Start the background writer (again, in a forked process)."""
+        if self._pid != os.getpid():
+            self._reset()  # The parent process writes what it queued
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued, then stop; False if writes were still pending."""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        return flushed
+
+    def enqueue(self, operation: str, table_name: str, key: str, data: Any = None) -> bool:
+        """Queue a "create", "update" or "delete"; False if dropped."""
+        if not self.db.is_connected():
+            return False
+        with self._cond:
+            if len(self._queue) >= self.max_size:
+                deadline = time.monotonic() + self.enqueue_timeout
+                while len(self._queue) >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["dropped"] += 1
+                        return False
+                    self._cond.wait(remaining)
+            self._queue.append((operation, table_name, key, data))
+            self._pending[(table_name, key)] = self._pending.get((table_name, key), 0) + 1
+            self._stats["queued"] += 1
+            if len(self._queue) == 1 or len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued write is committed or dropped; False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return not self._queue
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                while self._queue or self._in_flight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def is_pending(self, table_name: str, key: str) -> bool:
+        """Check if a row has writes not yet committed (or dropped)."""
+        return (table_name, key) in self._pending
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get counters (queued, written, batches, retries, failed, dropped, pending)."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._queue) + self._in_flight
+        return stats
+
+    def _reset(self) -> None:
+        self._queue: deque = deque()
+        self._pending: Dict[tuple, int] = {}  # {(table, key): writes queued or in flight}
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._flushing = 0
+        self._stop = False
+        self._thread = None
+        self._pid = os.getpid()
+        self._stats = {"queued": 0, "written": 0, "batches": 0, "retries": 0,
+                       "failed": 0, "dropped": 0}
+
+    def _run(self) -> None:
+        """Writer thread: take batches and commit them until stopped."""
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            try:
+                self._write(self._merge(batch))
+            finally:
+                with self._cond:
+                    for _, table_name, key, _ in batch:
+                        row = (table_name, key)
+                        if self._pending[row] > 1:
+                            self._pending[row] -= 1
+                        else:
+                            del self._pending[row]
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def _take(self) -> Optional[List[tuple]]:
+        """Wait for writes and take up to one batch (None once stopped and drained)."""
+        with self._cond:
+            while not self._queue:
+                if self._stop:
+                    return None
+                self._cond.wait()
+            if len(self._queue) < self.batch_size and not self._flushing and not self._stop:
+                self._cond.wait(self.interval)  # Let the batch fill up
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            self._in_flight = count
+            self._cond.notify_all()  # Room for blocked writers
+        return batch
+
+    @staticmethod
+    def _merge(batch: List[tuple]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Group writes into ordered runs of (kind, table, {key: row or None}).
+
+        Consecutive upserts (or deletes) of a table share one run; writes
+        to the same row within a run are merged. A run ends when the
+        table's next write is of the other kind, so order is preserved.
+        """
+        runs: List[Tuple[str, str, Dict[str, Any]]] = []
+        current: Dict[str, int] = {}  # {table: index of its open run}
+        for operation, table_name, key, data in batch:
+            kind = "delete" if operation == "delete" else "upsert"
+            index = current.get(table_name)
+            if index is None or runs[index][0] != kind:
+                runs.append((kind, table_name, {}))
+                index = current[table_name] = len(runs) - 1
+            rows = runs[index][2]
+            if kind == "delete":
+                rows[key] = None
+            elif key in rows:
+                rows[key].update(data or {})
+            else:
+                rows[key] = dict(data or {})
+        return runs
+
+    def _write(self, runs: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Commit runs in one transaction, retrying; then salvage run by run."""
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._commit(runs)
+                self._count("written", sum(len(rows) for _, _, rows in runs), batches=1)
+                return
+            except Exception:
+                if attempt == self.max_retries:
+                    break
+                self._count("retries", 1)
+                time.sleep(delay)
+                delay *= 2
+
+        for run in runs:
+            try:
+                self._commit([run])
+                self._count("written", len(run[2]), batches=1)
+            except Exception:
+                self._count("failed", len(run[2]))
+
+    def _commit(self, runs: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        with self.db.transaction() as connection:
+            for kind, table_name, rows in runs:
+                key_column = self.key_column(table_name)
+                if kind == "upsert":
+                    self.db.upsert_many(table_name, key_column, rows, connection)
+                else:
+                    self.db.delete_many(table_name, key_column, list(rows), connection)
+
+    def _count(self, name: str, amount: int, batches: int = 0) -> None:
+        with self._cond:
+            self._stats[name] += amount
+            self._stats["batches"] += batches
@@ -1,60 +1,216 @@
 """Encryption and decryption utilities."""
 
-import json
+import os
+import struct
 import hashlib
 import hmac
-from typing import Dict, Any, Optional
-from cryptography.fernet import Fernet
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
 import base64
+from ..config.settings import (
+    DERIVED_KEY_CACHE_SIZE, KEYRING_SIZE, SERIALIZATION_CODEC, COMPRESSION_ALGORITHMS
+)
+from ..core.codecs import Codec, get_codec
+from ..core.compression import Compressor, decompress, negotiate_compressor
 
+# Binary frame: magic | version | key id | nonce | AES-256-GCM ciphertext+tag.
+# The header (magic, version, key id) is authenticated as associated data.
+FRAME_MAGIC = b"DF"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct(">2sB8s")
+FRAME_NONCE_SIZE = 12
+FRAME_CONTENT_TYPE = "application/octet-stream"
 
-class EncryptionManager:
-    """Handles encryption and decryption of data."""
+_derived_keys: "OrderedDict[str, bytes]" = OrderedDict()  # {key hash: derived key}
+_derived_keys_lock = threading.Lock()
+
+
+def derive_key(key: bytes, key_hash: Optional[str] = None) -> bytes:
+    """
+    Derive the 32-byte cipher key from a raw key with PBKDF2.
     
-    def __init__(self, key: bytes):
-        """Initialize with encryption key."""
-        self.key = key
-        self._fernet = self._create_fernet(key)
+    Results are cached by key hash (``KeyManager.get_key_hash()`` format,
+    SHA-256 hex), so each key pays the 100,000 iterations once per process.
+    """
+    key_hash = key_hash or hashlib.sha256(key).hexdigest()
+    with _derived_keys_lock:
+        derived = _derived_keys.get(key_hash)
+        if derived is not None:
+            _derived_keys.move_to_end(key_hash)
+            return derived
+    
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=b'dsn_sync_salt',
+        iterations=100000,
+        backend=default_backend()
+    )
+    derived = kdf.derive(key)
+    
+    with _derived_keys_lock:
+        _derived_keys[key_hash] = derived
+        while len(_derived_keys) > DERIVED_KEY_CACHE_SIZE:
+            _derived_keys.popitem(last=False)
+    return derived
+
+
+class _KeyEntry:
+    """Ciphers derived from one raw key."""
     
-    def _create_fernet(self, key: bytes) -> Fernet:
-        """Create Fernet cipher from key."""
-        kdf = PBKDF2HMAC(
+    __slots__ = ("key", "key_id", "fernet", "aead")
+    
+    def __init__(self, key: bytes, key_hash: Optional[str] = None):
+        key_hash = key_hash or hashlib.sha256(key).hexdigest()
+        derived = derive_key(key, key_hash)
+        self.key = key
+        self.key_id = bytes.fromhex(key_hash[:16])
+        self.fernet = Fernet(base64.urlsafe_b64encode(derived))
+        frame_key = HKDF(
             algorithm=hashes.SHA256(),
             length=32,
-            salt=b'dsn_sync_salt',
-            iterations=100000,
+            salt=None,
+            info=b'dsn_sync frame v1',
             backend=default_backend()
-        )
-        key_bytes = kdf.derive(key)
-        return Fernet(base64.urlsafe_b64encode(key_bytes))
+        ).derive(derived)
+        self.aead = AESGCM(frame_key)
+
+
+class EncryptionManager:
+    """
+    Handles encryption and decryption of data.
+    
+    Keeps a keyring of the active key plus the most recent previous ones:
+    data is encrypted and signed with the active key, while decryption and
+    signature checks accept any key on the ring, so clients holding data
+    from before a ``rotate_key`` keep working.
+    
+    Two wire formats are supported: the original text format (JSON, Fernet,
+    then base64) from ``encrypt_data``, and a compact binary AES-GCM frame
+    from ``encrypt_frame`` carrying a key id and format version.
+    
+    Payloads and signatures are serialized with ``codec`` unless a call
+    passes the codec negotiated with a client. Clients that negotiated
+    compression get payloads compressed between serialization and
+    encryption (see ``compression.Compressor``).
+    """
+    
+    def __init__(self, key: bytes, key_hash: Optional[str] = None,
+                 codec: Optional[Codec] = None):
+        """Initialize with encryption key."""
+        self.key = key
+        self.codec = codec or get_codec(SERIALIZATION_CODEC)
+        self.compressors: Dict[str, Compressor] = {
+            name: Compressor(name) for name in COMPRESSION_ALGORITHMS
+        }
+        self._keyring: List[_KeyEntry] = [_KeyEntry(key, key_hash)]
+        self._update_ciphers()
+    
+    def _update_ciphers(self) -> None:
+        """Refresh cipher shortcuts after the keyring changed."""
+        self._fernet = self._keyring[0].fernet
+        self._multi_fernet = MultiFernet([entry.fernet for entry in self._keyring])
+        self._keys: List[bytes] = [entry.key for entry in self._keyring]
+        self._entries_by_id = {entry.key_id: entry for entry in self._keyring}
+    
+    def rotate_key(self, key: bytes, key_hash: Optional[str] = None) -> None:
+        """Make ``key`` active, keeping recent keys for decryption."""
+        entry = _KeyEntry(key, key_hash)
+        self._keyring = ([entry] + self._keyring)[:KEYRING_SIZE]
+        self.key = key
+        self._update_ciphers()
+    
+    def get_key_id(self) -> str:
+        """Get hex id of the active key (as carried in binary frames)."""
+        return self._keyring[0].key_id.hex()
+    
+    def negotiate_compression(self, requested: Optional[str]) -> Optional[Compressor]:
+        """Pick an enabled compressor from a client's ``X-DSN-Compression`` list."""
+        return negotiate_compressor(requested, self.compressors)
+    
+    def get_compression_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get compression counters and ratio per algorithm."""
+        return {name: compressor.get_stats() for name, compressor in self.compressors.items()}
+    
+    def _serialize(self, data: Dict[str, Any], codec: Optional[Codec],
+                   compressor: Optional[Compressor]) -> bytes:
+        plaintext = (codec or self.codec).dumps(data)
+        return compressor.compress(plaintext) if compressor else plaintext
     
-    def encrypt_data(self, data: Dict[str, Any]) -> str:
+    def _deserialize(self, plaintext: bytes, codec: Optional[Codec], compressed: bool) -> Any:
+        if compressed:
+            plaintext = decompress(plaintext)
+        return (codec or self.codec).loads(plaintext)
+    
+    def encrypt_data(self, data: Dict[str, Any], codec: Optional[Codec] = None,
+                     compressor: Optional[Compressor] = None) -> str:
         """Encrypt data dictionary."""
-        data_json = json.dumps(data, ensure_ascii=False)
-        encrypted = self._fernet.encrypt(data_json.encode('utf-8'))
+        encrypted = self._fernet.encrypt(self._serialize(data, codec, compressor))
         return base64.urlsafe_b64encode(encrypted).decode('utf-8')
     
-    def decrypt_data(self, encrypted_data: str) -> Dict[str, Any]:
+    def decrypt_data(self, encrypted_data: str, codec: Optional[Codec] = None,
+                     compressed: bool = False) -> Dict[str, Any]:
         """Decrypt encrypted data string."""
         encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode('utf-8'))
-        decrypted = self._fernet.decrypt(encrypted_bytes)
-        return json.loads(decrypted.decode('utf-8'))
+        decrypted = self._multi_fernet.decrypt(encrypted_bytes)
+        return self._deserialize(decrypted, codec, compressed)
+    
+    def encrypt_frame(self, data: Dict[str, Any], codec: Optional[Codec] = None,
+                      compressor: Optional[Compressor] = None) -> bytes:
+        """Encrypt data dictionary into a binary AES-GCM frame."""
+        entry = self._keyring[0]
+        header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, entry.key_id)
+        nonce = os.urandom(FRAME_NONCE_SIZE)
+        plaintext = self._serialize(data, codec, compressor)
+        return header + nonce + entry.aead.encrypt(nonce, plaintext, header)
+    
+    def decrypt_frame(self, frame: bytes, codec: Optional[Codec] = None,
+                      compressed: bool = False) -> Dict[str, Any]:
+        """Decrypt a binary frame; raises ValueError if it is not valid."""
+        header_size = FRAME_HEADER.size
+        if len(frame) < header_size + FRAME_NONCE_SIZE:
+            raise ValueError("Frame too short")
+        header = frame[:header_size]
+        magic, version, key_id = FRAME_HEADER.unpack(header)
+        if magic != FRAME_MAGIC or version != FRAME_VERSION:
+            raise ValueError("Unsupported frame format")
+        entry = self._entries_by_id.get(key_id)
+        if entry is None:
+            raise ValueError("Unknown key id")
+        nonce = frame[header_size:header_size + FRAME_NONCE_SIZE]
+        try:
+            plaintext = entry.aead.decrypt(nonce, frame[header_size + FRAME_NONCE_SIZE:], header)
+        except Exception:
+            raise ValueError("Frame authentication failed")
+        return self._deserialize(plaintext, codec, compressed)
     
-    def generate_signature(self, data: Dict[str, Any], timestamp: float) -> str:
+    def generate_signature(self, data: Dict[str, Any], timestamp: float,
+                           codec: Optional[Codec] = None) -> str:
         """Generate HMAC signature for request validation."""
-        message = json.dumps(data, sort_keys=True) + str(timestamp)
+        return self._sign(self.key, (codec or self.codec).dumps_canonical(data), timestamp)
+    
+    def validate_signature(self, data: Dict[str, Any], timestamp: float, signature: str,
+                           codec: Optional[Codec] = None) -> bool:
+        """Validate request signature."""
+        message = (codec or self.codec).dumps_canonical(data)
+        for key in self._keys:
+            if hmac.compare_digest(self._sign(key, message, timestamp), signature):
+                return True
+        return False
+    
+    @staticmethod
+    def _sign(key: bytes, message: bytes, timestamp: float) -> str:
+        """Compute HMAC signature of serialized data with a specific key."""
         signature = hmac.new(
-            self.key,
-            message.encode('utf-8'),
+            key,
+            message + str(timestamp).encode('utf-8'),
             hashlib.sha256
         ).hexdigest()
         return signature
-    
-    def validate_signature(self, data: Dict[str, Any], timestamp: float, signature: str) -> bool:
-        """Validate request signature."""
-        expected_signature = self.generate_signature(data, timestamp)
-        return hmac.compare_digest(expected_signature, signature)
-
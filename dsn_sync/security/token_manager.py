@@ -1,22 +1,55 @@
 """Authentication token management."""
 
 import time
-import json
+import base64
 import hashlib
 import hmac
-from typing import Dict, Any, Optional
-from ..config.settings import TOKEN_EXPIRY_HOURS
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from ..config.settings import (
+    TOKEN_EXPIRY_HOURS, TOKEN_FORMAT, TOKEN_CACHE_SIZE, SERIALIZATION_CODEC
+)
+from ..core.codecs import Codec, get_codec
+
+# Compact token: version | endpoint | issued | expiry | key id, followed by a
+# truncated HMAC-SHA256 of those bytes; base64url without padding (50 chars).
+COMPACT_TOKEN_VERSION = 1
+COMPACT_TOKEN = struct.Struct(">BIII8s")
+COMPACT_MAC_SIZE = 16
+COMPACT_TOKEN_SIZE = COMPACT_TOKEN.size + COMPACT_MAC_SIZE
 
 
 class TokenManager:
-    """Manages authentication tokens with endpoint information."""
-    
-    def __init__(self, key: bytes):
+    """
+    Manages authentication tokens with endpoint information.
+
+    Tokens are either a base64 payload serialized with ``codec`` (``"json"``
+    format, may carry extra fields) or a fixed-layout binary ``"compact"``
+    token; both are always accepted.
+    Verified tokens are remembered by digest until they expire, so repeat
+    requests skip decoding and the HMAC.
+    """
+
+    def __init__(self, key: bytes, token_format: str = TOKEN_FORMAT,
+                 cache_size: int = TOKEN_CACHE_SIZE, codec: Optional[Codec] = None):
         """Initialize with secret key."""
+        if token_format not in ("json", "compact"):
+            raise ValueError(f"Unknown token format: {token_format}")
         self.secret_key = key
-    
+        self.token_format = token_format
+        self.codec = codec or get_codec(SERIALIZATION_CODEC)
+        self.key_id = hashlib.sha256(key).digest()[:8]
+        self.cache_size = cache_size
+        self._verified: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()  # {digest: (expiry, endpoint)}
+        self._verified_lock = threading.Lock()
+
     def generate_token(self, endpoint_number: str, additional_data: Optional[Dict] = None) -> str:
         """Generate authentication token with endpoint number."""
+        if self.token_format == "compact" and not additional_data and endpoint_number.isdigit():
+            return self._generate_compact(int(endpoint_number))
+
         payload = {
             "endpoint_number": endpoint_number,
             "timestamp": time.time(),
@@ -24,68 +57,53 @@ class TokenManager:
         }
         if additional_data:
             payload.update(additional_data)
-        
+
         # Create signature
-        payload_json = json.dumps(payload, sort_keys=True)
         signature = hmac.new(
             self.secret_key,
-            payload_json.encode('utf-8'),
+            self.codec.dumps_canonical(payload),
             hashlib.sha256
         ).hexdigest()
-        
+
         token_data = {
             "payload": payload,
             "signature": signature
         }
-        
+
         # Encode token
-        import base64
-        token_json = json.dumps(token_data)
-        return base64.urlsafe_b64encode(token_json.encode('utf-8')).decode('utf-8')
-    
+        return base64.urlsafe_b64encode(self.codec.dumps(token_data)).decode('utf-8')
+
     def validate_token(self, token: str) -> bool:
         """Validate token signature and expiry."""
-        try:
-            import base64
-            token_json = base64.urlsafe_b64decode(token.encode('utf-8')).decode('utf-8')
-            token_data = json.loads(token_json)
-            
-            payload = token_data.get("payload", {})
-            signature = token_data.get("signature", "")
-            
-            # Check expiry
-            if time.time() > payload.get("expiry", 0):
-                return False
-            
-            # Validate signature
-            payload_json = json.dumps(payload, sort_keys=True)
-            expected_signature = hmac.new(
-                self.secret_key,
-                payload_json.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
-            
-            return hmac.compare_digest(expected_signature, signature)
-        except Exception:
+        digest = hashlib.sha256(token.encode('utf-8')).digest()
+        if self._get_verified(digest) is not None:
+            return True
+
+        verified = self._verify(token)
+        if verified is None:
             return False
-    
+        self._remember(digest, verified)
+        return True
+
     def get_endpoint_from_token(self, token: str) -> Optional[str]:
         """Extract endpoint number from token."""
         try:
-            import base64
-            token_json = base64.urlsafe_b64decode(token.encode('utf-8')).decode('utf-8')
-            token_data = json.loads(token_json)
+            raw = self._decode(token)
+            if self._is_compact(raw):
+                return self._format_endpoint(COMPACT_TOKEN.unpack_from(raw)[1])
+            token_data = self.codec.loads(raw)
             payload = token_data.get("payload", {})
             return payload.get("endpoint_number")
         except Exception:
             return None
-    
+
     def update_token(self, token: str, new_endpoint: str) -> str:
         """Update token with new endpoint number."""
         try:
-            import base64
-            token_json = base64.urlsafe_b64decode(token.encode('utf-8')).decode('utf-8')
-            token_data = json.loads(token_json)
+            raw = self._decode(token)
+            if self._is_compact(raw):
+                return self._generate_compact(int(new_endpoint))
+            token_data = self.codec.loads(raw)
             payload = token_data.get("payload", {})
             payload["endpoint_number"] = new_endpoint
             payload["timestamp"] = time.time()
@@ -94,3 +112,90 @@ class TokenManager:
         except Exception:
             return self.generate_token(new_endpoint)
 
+    def clear_cache(self) -> None:
+        """Forget verified tokens."""
+        with self._verified_lock:
+            self._verified.clear()
+
+    def _generate_compact(self, endpoint: int) -> str:
+        """Build a compact binary token."""
+        issued = int(time.time())
+        header = COMPACT_TOKEN.pack(
+            COMPACT_TOKEN_VERSION, endpoint, issued,
+            issued + TOKEN_EXPIRY_HOURS * 3600, self.key_id
+        )
+        raw = header + self._compact_mac(header)
+        return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+    def _compact_mac(self, header: bytes) -> bytes:
+        return hmac.new(self.secret_key, header, hashlib.sha256).digest()[:COMPACT_MAC_SIZE]
+
+    def _verify(self, token: str) -> Optional[Tuple[float, str]]:
+        """Fully check a token; return (expiry, endpoint) if valid."""
+        try:
+            raw = self._decode(token)
+            if self._is_compact(raw):
+                return self._verify_compact(raw)
+
+            token_data = self.codec.loads(raw)
+            payload = token_data.get("payload", {})
+            signature = token_data.get("signature", "")
+
+            # Check expiry
+            expiry = payload.get("expiry", 0)
+            if time.time() > expiry:
+                return None
+
+            # Validate signature
+            expected_signature = hmac.new(
+                self.secret_key,
+                self.codec.dumps_canonical(payload),
+                hashlib.sha256
+            ).hexdigest()
+
+            if not hmac.compare_digest(expected_signature, signature):
+                return None
+            return float(expiry), payload.get("endpoint_number")
+        except Exception:
+            return None
+
+    def _verify_compact(self, raw: bytes) -> Optional[Tuple[float, str]]:
+        header, mac = raw[:COMPACT_TOKEN.size], raw[COMPACT_TOKEN.size:]
+        _, endpoint, _, expiry, key_id = COMPACT_TOKEN.unpack(header)
+        if key_id != self.key_id or time.time() > expiry:
+            return None
+        if not hmac.compare_digest(self._compact_mac(header), mac):
+            return None
+        return float(expiry), self._format_endpoint(endpoint)
+
+    def _get_verified(self, digest: bytes) -> Optional[Tuple[float, str]]:
+        """Look up a verified token, dropping it once expired."""
+        with self._verified_lock:
+            entry = self._verified.get(digest)
+            if entry is None:
+                return None
+            if time.time() > entry[0]:
+                del self._verified[digest]
+                return None
+            self._verified.move_to_end(digest)
+            return entry
+
+    def _remember(self, digest: bytes, verified: Tuple[float, str]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._verified_lock:
+            self._verified[digest] = verified
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+    @staticmethod
+    def _decode(token: str) -> bytes:
+        return base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+
+    @staticmethod
+    def _is_compact(raw: bytes) -> bool:
+        return len(raw) == COMPACT_TOKEN_SIZE and raw[0] == COMPACT_TOKEN_VERSION
+
+    @staticmethod
+    def _format_endpoint(endpoint: int) -> str:
+        return f"{endpoint:03d}"
@@ -0,0 +1,278 @@
+"""Asyncio event-loop server engine."""
+
+import asyncio
+import io
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Tuple
+
+MAX_HEADER_BYTES = 65536
+WRITE_HIGH_WATER = 256 * 1024  # Bytes a worker may write before flush() waits for the client
+
+SERVICE_UNAVAILABLE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Length: 0\r\n"
+    b"Connection: close\r\n\r\n"
+)
+
+
+def set_reuse_port(sock: socket.socket) -> None:
+    """Let several processes bind the same port (kernel balances accepts)."""
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise OSError("SO_REUSEPORT is not supported on this platform")
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+
+class _TransportWriter:
+    """File-like object that writes handler output to an asyncio stream."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter,
+                 timeout: Optional[float] = None):
+        self._loop = loop
+        self._writer = writer
+        self._timeout = timeout
+        self._unflushed = 0
+
+    def write(self, data: bytes) -> int:
+        data = bytes(data)
+        if self._writer.is_closing():
+            raise ConnectionResetError("Connection closed by peer")
+        self._loop.call_soon_threadsafe(self._writer.write, data)
+        self._unflushed += len(data)
+        return len(data)
+
+    async def drain(self) -> None:
+        """Wait until buffered output is flushed (call on the event loop)."""
+        await self._writer.drain()
+
+    def flush(self) -> None:
+        """From a worker, wait for the client once ``WRITE_HIGH_WATER`` bytes are buffered."""
+        if self._unflushed < WRITE_HIGH_WATER:
+            return
+        self._unflushed = 0
+        try:
+            asyncio.get_running_loop()
+            return  # On the event loop: callers await drain() instead
+        except RuntimeError:
+            pass
+        future = asyncio.run_coroutine_threadsafe(self._writer.drain(), self._loop)
+        try:
+            future.result(self._timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError("Client is not reading the response")
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncioHTTPServer:
+    """
+    HTTP server driven by an asyncio event loop.
+
+    Connections are accepted and read on a single event loop, so idle
+    clients do not hold a thread. Complete requests are handed to a bounded
+    thread pool running the regular ``BaseHTTPRequestHandler`` class.
+    Exposes the ``serve_forever``/``shutdown``/``server_close`` interface of
+    ``socketserver.TCPServer`` so ``EmbeddedServer`` can drive either.
+
+    A handler may leave a coroutine in ``handler.deferred``; it is awaited
+    on the event loop to finish the response (long-polls and event streams
+    park there without holding a worker thread).
+    """
+
+    def __init__(self, server_address: Tuple[str, int], handler_class,
+                 max_workers: int, max_connections: int,
+                 keepalive_timeout: Optional[float] = None, reuse_port: bool = False):
+        """Bind listening socket and prepare the engine."""
+        self.handler_class = self._wrap_handler(handler_class)
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="dsn-sync-worker")
+        self._socket = self._bind(server_address, reuse_port)
+        self.server_address = self._socket.getsockname()[:2]
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._finished = threading.Event()
+        self._connections = set()
+
+    @staticmethod
+    def _bind(server_address: Tuple[str, int], reuse_port: bool) -> socket.socket:
+        """Create the listening socket."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if reuse_port:
+                set_reuse_port(sock)
+            sock.bind(server_address)
+            sock.listen(socket.SOMAXCONN)
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    @staticmethod
+    def _wrap_handler(handler_class):
+        """Adapt a stream request handler to in-memory request buffers."""
+        class AsyncRequestHandler(handler_class):
+            deferred_supported = True
+
+            def setup(self):
+                self.connection = None
+                self.rfile, self.wfile, self.requests_served = self.request
+
+            def handle(self):
+                self.close_connection = True
+                self.handle_one_request()
+
+            def _has_request_body(self):
+                return False  # Each request gets its own buffer
+
+            def finish(self):
+                self.wfile.flush()
+
+        return AsyncRequestHandler
+
+    def serve_forever(self) -> None:
+        """Run the event loop until ``shutdown`` is called."""
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._serve())
+            # Let closed connections unwind, then cancel whatever is left
+            pending = asyncio.all_tasks(loop)
+            if pending:
+                done, pending = loop.run_until_complete(asyncio.wait(pending, timeout=1))
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        finally:
+            loop.close()
+            self._finished.set()
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_server(self._handle_connection, sock=self._socket,
+                                            limit=MAX_HEADER_BYTES)
+        self._ready.set()
+        async with server:
+            await self._stopped.wait()
+            server.close()
+            for writer in list(self._connections):
+                writer.close()
+
+    def shutdown(self) -> None:
+        """Stop the event loop and wait for it to exit."""
+        if not self._ready.wait(timeout=5):
+            return
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._finished.wait()
+
+    async def run_in_worker(self, func, *args):
+        """Run blocking work on the worker pool from the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def server_close(self) -> None:
+        """Release the listening socket and worker threads."""
+        self._socket.close()
+        self._executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        """Serve requests from one client connection."""
+        if len(self._connections) >= self.max_connections:
+            writer.write(SERVICE_UNAVAILABLE)
+            await self._close(writer)
+            return
+
+        self._connections.add(writer)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            # Headers and body go out as separate writes; without this the
+            # body waits for the client's delayed ACK on keep-alive connections
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        requests_served = 0
+        try:
+            while True:
+                try:
+                    raw_request = await asyncio.wait_for(self._read_request(reader),
+                                                         self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    break  # Idle keep-alive connection
+                if raw_request is None:
+                    break
+                if not await self._dispatch(raw_request, writer, requests_served):
+                    break
+                requests_served += 1
+        except Exception:
+            pass  # Drop the connection; the client sees a reset
+        finally:
+            self._connections.discard(writer)
+            await self._close(writer)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """Read one complete request (head and body) from the stream."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+
+        content_length = 0
+        chunked = False
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                content_length = int(value.strip() or 0)
+            elif name == b"transfer-encoding":
+                chunked = b"chunked" in value.lower()
+
+        if chunked:
+            return head + await self._read_chunked_body(reader)
+        body = await reader.readexactly(content_length) if content_length else b""
+        return head + body
+
+    @staticmethod
+    async def _read_chunked_body(reader: asyncio.StreamReader) -> bytes:
+        """Read a chunked request body, keeping its framing intact."""
+        parts = []
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            parts.append(size_line)
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                while True:
+                    trailer = await reader.readuntil(b"\r\n")
+                    parts.append(trailer)
+                    if trailer == b"\r\n":
+                        return b"".join(parts)
+            parts.append(await reader.readexactly(size + 2))
+
+    async def _dispatch(self, raw_request: bytes, writer: asyncio.StreamWriter,
+                        requests_served: int) -> bool:
+        """Run the request handler on the worker pool; return keep-alive flag."""
+        loop = asyncio.get_running_loop()
+        rfile = io.BytesIO(raw_request)
+        wfile = _TransportWriter(loop, writer, self.keepalive_timeout)
+        peer = writer.get_extra_info("peername")
+
+        handler = await loop.run_in_executor(
+            self._executor, self.handler_class, (rfile, wfile, requests_served), peer, self
+        )
+        if handler.deferred is not None:
+            await handler.deferred
+        await writer.drain()
+        return not handler.close_connection
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter) -> None:
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
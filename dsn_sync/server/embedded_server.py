@@ -1,20 +1,302 @@
 """Lightweight embedded HTTPS server."""
 
+import selectors
+import socket
 import threading
+import time
 import http.server
 import socketserver
-from typing import Optional, Callable
-from ..config.settings import DEFAULT_PORT, SERVER_HOST
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, List
+from ..config.settings import (
+    DEFAULT_PORT, SERVER_HOST, SERVER_MODE, SERVER_MAX_WORKERS, SERVER_MAX_CONNECTIONS,
+    SERVER_KEEPALIVE_TIMEOUT, SERVER_MAX_KEEPALIVE_REQUESTS, METRICS_PATH
+)
+from ..core.metrics import Metrics, PROMETHEUS_CONTENT_TYPE
+from .async_server import AsyncioHTTPServer, SERVICE_UNAVAILABLE, set_reuse_port
+
+SERVER_MODES = ("serial", "threaded", "asyncio")
+
+
+class SerialTCPServer(socketserver.TCPServer):
+    """Single-threaded server: requests are handled one at a time."""
+    
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, handler_class, reuse_port: bool = False):
+        """Initialize server."""
+        self.reuse_port = reuse_port
+        super().__init__(server_address, handler_class)
+    
+    def server_bind(self):
+        if self.reuse_port:
+            set_reuse_port(self.socket)
+        super().server_bind()
+
+
+class ThreadPoolTCPServer(socketserver.TCPServer):
+    """
+    TCP server dispatching requests to a bounded worker pool.
+    
+    A worker holds a connection only while it reads and answers requests.
+    Connections waiting for a request (new ones and idle keep-alive ones)
+    are parked on a selector watched by one thread and handed back to the
+    pool once readable, so idle clients do not tie up workers. Parked
+    connections are closed after the handler's ``timeout``.
+    """
+    
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, handler_class, max_workers: int, max_connections: int,
+                 reuse_port: bool = False):
+        """Initialize worker pool, connection limit and idle connection watcher."""
+        self.reuse_port = reuse_port
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="dsn-sync-worker")
+        self._connection_slots = threading.BoundedSemaphore(max_connections)
+        self._selector = selectors.DefaultSelector()
+        self._waker, self._wake_socket = socket.socketpair()
+        self._waker.setblocking(False)
+        self._wake_socket.setblocking(False)
+        # epoll and kqueue see registrations made while another thread
+        # selects; select and poll only those made before the call
+        self._register_directly = not isinstance(
+            self._selector, (selectors.SelectSelector, selectors.PollSelector)
+        )
+        self._parking_lock = threading.Lock()  # Guards the selector map and _to_park
+        self._to_park: List[tuple] = []  # (request, client_address, handler, deadline)
+        self._closed = False
+        super().__init__(server_address, self._wrap_handler(handler_class))
+        self._watcher = threading.Thread(target=self._watch_parked,
+                                         name="dsn-sync-idle-watcher", daemon=True)
+        self._watcher.start()
+    
+    @staticmethod
+    def _wrap_handler(handler_class):
+        """Make handlers stop at an idle connection instead of waiting on it."""
+        class ParkingRequestHandler(handler_class):
+            def handle(self):
+                self.parked = False
+                self.close_connection = True
+                self.handle_one_request()
+                while not self.close_connection:
+                    if not self._input_pending():
+                        self.parked = True  # The server watches it for the next request
+                        return
+                    self.handle_one_request()
+            
+            def resume(self):
+                """Serve the next requests of a parked connection."""
+                try:
+                    self.handle()
+                finally:
+                    self.finish()
+            
+            def finish(self):
+                if self.parked:
+                    self.wfile.flush()  # Keep the connection's files for the next request
+                else:
+                    super().finish()
+            
+            def _input_pending(self) -> bool:
+                """Whether request bytes are buffered or readable without waiting."""
+                self.connection.settimeout(0)
+                try:
+                    return bool(self.rfile.peek(1))
+                except OSError:
+                    return True  # Let the next read report it
+                finally:
+                    self.connection.settimeout(self.timeout)
+        
+        return ParkingRequestHandler
+    
+    def server_bind(self):
+        if self.reuse_port:
+            set_reuse_port(self.socket)
+        super().server_bind()
+    
+    def process_request(self, request, client_address):
+        """Park a new connection until its first request, or reject it when over the limit."""
+        if not self._connection_slots.acquire(blocking=False):
+            try:
+                request.sendall(SERVICE_UNAVAILABLE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._park(request, client_address, None)
+    
+    def _process_request_worker(self, request, client_address, handler=None):
+        """Serve a connection's ready requests on a worker thread, then park or close it."""
+        try:
+            if handler is None:
+                handler = self.RequestHandlerClass(request, client_address, self)
+            else:
+                handler.resume()
+            if handler.parked:
+                self._park(request, client_address, handler)
+                return
+        except Exception:
+            self.handle_error(request, client_address)
+        self._close_connection(request)
+    
+    def _park(self, request, client_address, handler) -> None:
+        """Hand a connection to the watcher thread."""
+        timeout = self.RequestHandlerClass.timeout
+        entry = (request, client_address, handler,
+                 time.monotonic() + timeout if timeout is not None else None)
+        parked = False
+        with self._parking_lock:
+            if self._closed:
+                pass
+            elif not self._register_directly:
+                self._to_park.append(entry)
+                parked = True
+            else:
+                try:
+                    self._selector.register(request, selectors.EVENT_READ, entry)
+                    return
+                except (OSError, ValueError):
+                    pass
+        if not parked:
+            self._close_connection(request, handler)
+            return
+        try:
+            self._wake_socket.send(b"\0")
+        except OSError:
+            pass  # Already woken (buffer full) or closing
+    
+    def _watch_parked(self) -> None:
+        """Submit parked connections once readable; close the ones idle too long."""
+        selector = self._selector
+        with self._parking_lock:
+            selector.register(self._waker, selectors.EVENT_READ)
+        next_sweep = time.monotonic() + 1.0
+        while not self._closed:
+            ready = []
+            expired = []
+            events = selector.select(max(next_sweep - time.monotonic(), 0))
+            now = time.monotonic()
+            with self._parking_lock:
+                for key, _ in events:
+                    if key.fileobj is self._waker:
+                        self._drain_waker()
+                    elif selector.get_map().get(key.fileobj) is key:
+                        selector.unregister(key.fileobj)
+                        ready.append(key.data)
+                parked, self._to_park = self._to_park, []
+                for entry in parked:
+                    try:
+                        selector.register(entry[0], selectors.EVENT_READ, entry)
+                    except (OSError, ValueError):
+                        expired.append(entry)
+                if now >= next_sweep:  # Checking every parked connection is O(n); once a second
+                    next_sweep = now + 1.0
+                    for key in list(selector.get_map().values()):
+                        if key.data is not None and key.data[3] is not None and key.data[3] <= now:
+                            selector.unregister(key.fileobj)
+                            expired.append(key.data)
+            
+            for request, client_address, handler, _ in ready:
+                try:
+                    self._executor.submit(self._process_request_worker, request,
+                                          client_address, handler)
+                except RuntimeError:
+                    self._close_connection(request, handler)  # Pool shut down
+            for request, _, handler, _ in expired:
+                self._close_connection(request, handler)
+        
+        with self._parking_lock:
+            remaining = [key.data for key in selector.get_map().values() if key.data is not None]
+            selector.close()
+        for request, _, handler, _ in remaining:
+            self._close_connection(request, handler)
+    
+    def _drain_waker(self) -> None:
+        try:
+            while self._waker.recv(4096):
+                pass
+        except OSError:
+            pass
+    
+    def _close_connection(self, request, handler=None) -> None:
+        """Close a connection and free its slot."""
+        if handler is not None:
+            handler.parked = False
+            try:
+                handler.finish()
+            except Exception:
+                pass
+        self.shutdown_request(request)
+        self._connection_slots.release()
+    
+    def handle_error(self, request, client_address):
+        pass  # Suppress default traceback printing
+    
+    def server_close(self):
+        """Close listening socket, parked connections and release worker threads."""
+        super().server_close()
+        with self._parking_lock:
+            self._closed = True
+            parked, self._to_park = self._to_park, []
+        try:
+            self._wake_socket.send(b"\0")
+        except OSError:
+            pass
+        self._watcher.join()
+        for request, _, handler, _ in parked:
+            self._close_connection(request, handler)
+        self._waker.close()
+        self._wake_socket.close()
+        self._executor.shutdown(wait=False)
 
 
 class EmbeddedServer:
     """Lightweight embedded HTTP/HTTPS server."""
     
-    def __init__(self, port: int = DEFAULT_PORT, host: str = SERVER_HOST):
-        """Initialize embedded server."""
+    def __init__(self, port: int = DEFAULT_PORT, host: str = SERVER_HOST,
+                 mode: str = SERVER_MODE, max_workers: int = SERVER_MAX_WORKERS,
+                 max_connections: int = SERVER_MAX_CONNECTIONS,
+                 keepalive_timeout: float = SERVER_KEEPALIVE_TIMEOUT,
+                 max_keepalive_requests: int = SERVER_MAX_KEEPALIVE_REQUESTS,
+                 reuse_port: bool = False, metrics: Optional[Metrics] = None,
+                 metrics_path: str = METRICS_PATH):
+        """
+        Initialize embedded server.
+        
+        Args:
+            port: Port to listen on (0 picks a free port)
+            host: Interface to bind
+            mode: Server engine - "serial", "threaded" (bounded worker pool)
+                or "asyncio" (event loop accepting connections, worker pool
+                running handlers)
+            max_workers: Worker threads serving requests
+            max_connections: Open connections before new ones get 503
+            keepalive_timeout: Seconds an idle persistent connection stays open
+            max_keepalive_requests: Requests served on one connection before
+                it is closed
+            reuse_port: Bind with SO_REUSEPORT so several worker processes
+                can accept on the same port
+            metrics: Registry served as Prometheus text on GET
+                ``metrics_path`` (None: no metrics endpoint)
+            metrics_path: Path of the metrics endpoint
+        """
+        if mode not in SERVER_MODES:
+            raise ValueError(f"Server mode must be one of {SERVER_MODES}")
+        
         self.port = port
         self.host = host
-        self.server: Optional[socketserver.TCPServer] = None
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.max_keepalive_requests = max_keepalive_requests
+        self.reuse_port = reuse_port
+        self.metrics = metrics
+        self.metrics_path = metrics_path
+        self.server = None
         self.server_thread: Optional[threading.Thread] = None
         self._running = False
         self._request_handler: Optional[Callable] = None
@@ -28,8 +310,8 @@ class EmbeddedServer:
         
         try:
             handler = self._create_handler()
-            self.server = socketserver.TCPServer((self.host, self.port), handler)
-            self.server.allow_reuse_address = True
+            self.server = self._create_server(handler)
+            self.port = self.server.server_address[1]
             
             self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.server_thread.start()
@@ -38,26 +320,160 @@ class EmbeddedServer:
         except Exception:
             return False
     
+    def _create_server(self, handler):
+        """Create server for the configured engine."""
+        address = (self.host, self.port)
+        if self.mode == "asyncio":
+            return AsyncioHTTPServer(address, handler, self.max_workers, self.max_connections,
+                                     self.keepalive_timeout, self.reuse_port)
+        if self.mode == "threaded":
+            return ThreadPoolTCPServer(address, handler, self.max_workers, self.max_connections,
+                                       self.reuse_port)
+        return SerialTCPServer(address, handler, self.reuse_port)
+    
     def _create_handler(self):
         """Create HTTP request handler."""
         request_handler = self._request_handler
+        metrics, metrics_path = self.metrics, self.metrics_path
+        # A serial server would stall every other client behind an idle
+        # persistent connection, so it closes after each response
+        keepalive_requests = 1 if self.mode == "serial" else self.max_keepalive_requests
         
         class DSNRequestHandler(http.server.SimpleHTTPRequestHandler):
+            # HTTP/1.1 keeps connections open between requests (and lets
+            # clients pipeline them); idle connections are closed after
+            # ``timeout`` seconds and after ``max_keepalive_requests``.
+            protocol_version = "HTTP/1.1"
+            # Send small responses at once instead of waiting for the
+            # client's delayed ACK of the headers (about 40ms per request)
+            disable_nagle_algorithm = True
+            timeout = self.keepalive_timeout
+            max_keepalive_requests = keepalive_requests
+            # Engines that can finish a request on an event loop set this;
+            # request handlers may then park work in ``self.deferred``
+            deferred_supported = False
+            
+            def setup(self):
+                super().setup()
+                self.requests_served = 0
+            
+            def handle_one_request(self):
+                self.requests_served += 1
+                self._framed = False
+                self._connection_header = False
+                self._body = None
+                self.deferred = None
+                super().handle_one_request()
+                if self._body is None and self._has_request_body():
+                    # Unread request body would corrupt the next request
+                    self.close_connection = True
+            
+            def send_header(self, keyword, value):
+                if keyword.lower() in ("content-length", "transfer-encoding"):
+                    self._framed = True
+                elif keyword.lower() == "connection":
+                    self._connection_header = True
+                super().send_header(keyword, value)
+            
+            def end_headers(self):
+                last_request = self.requests_served >= self.max_keepalive_requests
+                if last_request or not self._framed or self.close_connection:
+                    # Without framing the body can only end at connection close
+                    self.close_connection = True
+                    if not self._connection_header:
+                        super().send_header("Connection", "close")
+                super().end_headers()
+            
+            def _has_request_body(self) -> bool:
+                headers = getattr(self, "headers", None)
+                if headers is None:
+                    return False
+                return (int(headers.get("Content-Length") or 0) > 0
+                        or "chunked" in headers.get("Transfer-Encoding", "").lower())
+            
+            def read_body(self) -> bytes:
+                """Read the request body (Content-Length or chunked)."""
+                if self._body is not None:
+                    return self._body
+                if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                        if size == 0:
+                            # Skip trailers up to the terminating blank line
+                            while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                                pass
+                            break
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                    self._body = b"".join(chunks)
+                else:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    self._body = self.rfile.read(length) if length else b""
+                return self._body
+            
+            def send_body(self, body: bytes, status: int = 200,
+                          content_type: str = "application/json") -> None:
+                """Send a complete response framed with Content-Length."""
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+            
+            def send_chunked(self, chunks, status: int = 200,
+                             content_type: str = "application/json",
+                             headers: Optional[dict] = None) -> None:
+                """Stream a response from an iterable of byte chunks."""
+                self.start_chunked(status, content_type, headers)
+                for chunk in chunks:
+                    self.write_chunk(chunk)
+                    self.wfile.flush()  # Backpressure: wait for a slow client
+                self.end_chunked()
+            
+            def start_chunked(self, status: int = 200, content_type: str = "application/json",
+                              headers: Optional[dict] = None) -> None:
+                """Send headers for a response streamed with ``write_chunk``."""
+                self._chunked = self.request_version != "HTTP/1.0"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if self._chunked:
+                    self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+            
+            def write_chunk(self, chunk: bytes) -> None:
+                """Write one chunk of a streamed response."""
+                if not chunk:
+                    return
+                if self._chunked:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                else:
+                    # HTTP/1.0 client: body ends when the connection closes
+                    self.wfile.write(chunk)
+            
+            def end_chunked(self) -> None:
+                """Terminate a streamed response."""
+                if self._chunked:
+                    self.wfile.write(b"0\r\n\r\n")
+            
             def do_GET(self):
-                if request_handler:
+                if metrics is not None and self.path.split("?", 1)[0] == metrics_path:
+                    body = metrics.render_prometheus().encode("utf-8")
+                    self.send_body(body, content_type=PROMETHEUS_CONTENT_TYPE)
+                elif request_handler:
                     request_handler(self, 'GET')
                 else:
-                    self.send_response(200)
-                    self.end_headers()
-                    self.wfile.write(b'DSN Sync Server Running')
+                    self.send_body(b'DSN Sync Server Running', content_type="text/plain")
             
             def do_POST(self):
                 if request_handler:
                     request_handler(self, 'POST')
                 else:
-                    self.send_response(200)
-                    self.end_headers()
-                    self.wfile.write(b'DSN Sync Server Running')
+                    self.read_body()
+                    self.send_body(b'DSN Sync Server Running', content_type="text/plain")
             
             def log_message(self, format, *args):
                 pass  # Suppress default logging
@@ -71,6 +487,7 @@ class EmbeddedServer:
         
         try:
             self.server.shutdown()
+            self.server.server_close()
             self._running = False
             return True
         except Exception:
@@ -1,58 +1,75 @@
 """Dynamic endpoint rotation management."""
 
 import threading
+import multiprocessing
 from ..config.settings import ENDPOINT_ROTATION_COUNT
 
+MAX_ENDPOINT = 999  # Endpoints are three digits; rotation wraps 999 -> 001
+
 
 class EndpointManager:
     """Manages dynamic endpoint rotation."""
     
     def __init__(self):
         """Initialize endpoint manager."""
-        self._current_endpoint = "001"
-        self._request_count = 0
-        self._lock = threading.Lock()
+        self._state = [1, 0]  # [current endpoint number, request count]
+        self._lock = threading.RLock()
+    
+    def enable_sharing(self, context=None) -> None:
+        """
+        Move endpoint state into shared memory.
+        
+        Worker processes forked afterwards share one endpoint number and
+        request counter with the parent.
+        """
+        context = context or multiprocessing.get_context()
+        with self._lock:
+            state = context.RawArray('i', list(self._state))
+        self._lock = context.RLock()
+        self._state = state
     
     def get_current_endpoint(self) -> str:
         """Get current endpoint number."""
         with self._lock:
-            return self._current_endpoint
+            return f"{self._state[0]:03d}"  # Format as 001, 002, etc.
     
     def increment_counter(self) -> str:
         """Increment request counter and rotate if needed."""
         with self._lock:
-            self._request_count += 1
+            self._state[1] += 1
             
             # Check if rotation needed
-            if self._request_count >= ENDPOINT_ROTATION_COUNT:
+            if self._state[1] >= ENDPOINT_ROTATION_COUNT:
                 self.rotate_endpoint()
-                self._request_count = 0
+                self._state[1] = 0
             
-            return self._current_endpoint
+            return self.get_current_endpoint()
     
     def rotate_endpoint(self) -> str:
         """Rotate to next endpoint."""
         with self._lock:
-            current_num = int(self._current_endpoint)
-            next_num = current_num + 1
-            self._current_endpoint = f"{next_num:03d}"  # Format as 001, 002, etc.
-            return self._current_endpoint
+            self._state[0] = self._state[0] % MAX_ENDPOINT + 1
+            return self.get_current_endpoint()
+    
+    def get_previous_endpoint(self) -> str:
+        """Get the endpoint before the current one (999 before 001)."""
+        with self._lock:
+            return f"{(self._state[0] - 2) % MAX_ENDPOINT + 1:03d}"
     
     def validate_endpoint(self, endpoint: str) -> bool:
         """Validate endpoint number format."""
         try:
             num = int(endpoint)
-            return 1 <= num <= 999
+            return 1 <= num <= MAX_ENDPOINT
         except ValueError:
             return False
     
     def get_request_count(self) -> int:
         """Get current request count."""
         with self._lock:
-            return self._request_count
+            return self._state[1]
     
     def reset_counter(self) -> None:
         """Reset request counter."""
         with self._lock:
-            self._request_count = 0
-
+            self._state[1] = 0
@@ -0,0 +1,101 @@
+"""Cache of encoded (serialized and encrypted) responses."""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+from ..config.settings import RESPONSE_CACHE_MAX_BYTES
+from ..core.memory_store import MemoryStore
+
+
+class ResponseCache:
+    """
+    Memory-bounded LRU cache of encoded response bodies.
+
+    Keys are tuples starting with the table name and including the table
+    version and key id, e.g. ``(table, version, key_id, format, kind)``, so
+    an entry can never be served for data it was not built from. Attached
+    to a ``MemoryStore``, writes drop the table's entries to free memory
+    early; entries are tracked per table so this touches only the written
+    table's entries. ``max_bytes=0`` disables caching.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        """Initialize cache."""
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._size = 0
+        self._tables: Dict[Any, set] = {}  # {table: keys of its entries}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def attach(self, memory_store: MemoryStore) -> None:
+        """Invalidate entries whenever the store is written."""
+        memory_store.add_listener(self._on_write)
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        """Get cached body, or None."""
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return body
+
+    def put(self, key: Tuple, body: bytes) -> None:
+        """Cache a body, evicting least recently used entries over budget."""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            self._tables.setdefault(key[0], set()).add(key)
+            while self._size > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._forget(evicted_key)
+
+    def get_or_create(self, key: Tuple, factory: Callable[[], bytes]) -> bytes:
+        """Get cached body or build it with ``factory`` and cache it."""
+        body = self.get(key)
+        if body is None:
+            body = factory()
+            self.put(key, body)
+        return body
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """Drop entries for a table (all entries if None)."""
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+                self._tables.clear()
+                self._size = 0
+                return
+            for key in self._tables.pop(table_name, ()):
+                self._size -= len(self._entries.pop(key))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and memory use."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    def _forget(self, key: Tuple) -> None:
+        keys = self._tables[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._tables[key[0]]
+
+    def _on_write(self, operation: str, table_name: Optional[str], key, data) -> None:
+        if table_name in self._tables or (table_name is None and self._entries):
+            self.invalidate(table_name)
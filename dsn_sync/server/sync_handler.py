@@ -0,0 +1,592 @@
+"""HTTP protocol between the embedded server and frontend clients."""
+
+import json
+import struct
+import time
+from typing import Dict, Any, Optional, List
+from urllib.parse import urlsplit, parse_qs
+from ..config.settings import (
+    SIGNATURE_MAX_AGE, LONG_POLL_MAX_WAIT, SSE_HEARTBEAT_INTERVAL, PAGE_SIZE, MAX_PAGE_SIZE
+)
+from ..security.encryption import FRAME_CONTENT_TYPE
+from ..core.codecs import Codec, negotiate_codec
+from ..core.compression import Compressor
+
+WRITE_OPERATIONS = ("create", "update", "delete")
+QUERY_PARAMS = ("where", "order", "limit")
+PAGE_PARAMS = ("after", "page_size")
+STREAM_CONTENT_TYPE = "application/x-ndjson"
+
+
+class SyncRequestHandler:
+    """
+    Serves the dsn-sync protocol for ``EmbeddedServer``.
+
+    Every request carries ``Authorization: Bearer <token>`` and targets the
+    current (or previous) rotating endpoint. Response bodies are
+    ``{"data": <encrypted payload>}``.
+
+    READ:
+        GET /sync/<endpoint>/<table>              -> {"version", "data"}
+        GET /sync/<endpoint>/<table>?since=<ver>  -> changes since <ver>
+        GET /sync/<endpoint>/<table>/<key>        -> {"version", "data"}
+        GET /sync/<endpoint>/<table>?where=<json>&order=<fields>&limit=<n>
+            -> {"version", "keys", "data"}: rows matching ``where`` (JSON
+            filters, see ``MemoryStore.query``), ``keys`` in the requested
+            order of comma-separated fields ("-field": descending)
+        GET /sync/<endpoint>/<table>?page_size=<n>&after=<cursor>
+            -> {"version", "data", "next"}: up to <n> rows in key order
+            after <cursor>; pass ``next`` back to get the following page
+            (None on the last one)
+        GET /sync/<endpoint>/<table>?stream=1[&page_size=<n>]
+            -> the whole table as a chunked stream of pages, all from one
+            snapshot, each encrypted on its own: newline-delimited
+            ``{"data": <encrypted page>}`` lines, or binary frames each
+            preceded by a 4-byte big-endian length when the client accepts
+            ``application/octet-stream``
+
+    PUSH:
+        GET /sync/<endpoint>/<table>?since=<ver>&wait=<seconds>
+            long-poll: parked until the table moves past <ver> or timeout
+        GET /sync/<endpoint>/<table> with ``Accept: text/event-stream``
+            Server-Sent Events; each frame is ``id: <version>`` plus an
+            encrypted changes payload. Resumes from ``?since=`` or
+            ``Last-Event-ID``; starts with a full snapshot otherwise.
+
+    Parked long-polls and event streams wait on the event loop, so they
+    need the asyncio engine; the serial and threaded engines answer them
+    with 501 instead of holding a worker thread per client.
+
+    WRITE:
+        POST /sync/<endpoint> with body
+        {"data": <encrypted packet>, "timestamp": ts, "signature": sig},
+        packet = {"operation", "table", "key", "data"}, or a batch
+        {"batch": [packet, ...]} applied in order -> {"results": [bool]}
+
+    When the endpoint rotates, responses carry ``X-DSN-Endpoint`` and a
+    refreshed ``X-DSN-Token``.
+
+    BINARY FRAMES:
+        Clients sending ``Accept: application/octet-stream`` get the payload
+        as a binary AES-GCM frame (``EncryptionManager.encrypt_frame``)
+        instead of base64 JSON. WRITE bodies sent with
+        ``Content-Type: application/octet-stream`` are one frame holding
+        ``{"data": packet, "timestamp": ts, "signature": sig}``.
+
+    CODECS:
+        Encrypted payloads and signed packets are serialized with the
+        instance codec; ``X-DSN-Codec: json|msgpack`` on a request picks the
+        wire format for that request, echoed back in the response header.
+
+    COMPRESSION:
+        ``X-DSN-Compression: zlib, lzma, bz2`` lists algorithms the client
+        accepts; the chosen one is named in the response header and every
+        payload plaintext then starts with an algorithm byte (0: stored,
+        1: zlib, 2: bz2, 3: lzma). WRITE requests carrying the header send
+        their packet plaintext in the same layout.
+
+    METRICS:
+        Stages are timed into ``dsn.metrics`` (no-ops unless enabled):
+        ``token``, ``read`` and ``encrypt`` on reads; ``decrypt``,
+        ``signature``, ``handler``, ``apply`` (timed within ``handler``
+        when it runs in the handler's per-row slot) and ``encrypt`` on
+        writes; whole responses as ``request.read`` / ``request.write``.
+        Error responses count into ``errors{status}``.
+    """
+
+    def __init__(self, dsn):
+        """Initialize with the owning ``DSNSync`` instance."""
+        self.dsn = dsn
+
+    def __call__(self, handler, method: str) -> None:
+        """Handle one HTTP request."""
+        metrics = self.dsn.metrics
+        started = time.perf_counter()
+        try:
+            route = self._parse_route(handler)
+            if route is None:
+                self._send_error(handler, 404, "Not found")
+                return
+
+            with metrics.timer("token"):
+                token = self._authenticate(handler, route["endpoint"])
+            if token is None:
+                self._send_error(handler, 401, "Unauthorized")
+                return
+
+            if method == "GET" and route["table"]:
+                events = "text/event-stream" in handler.headers.get("Accept", "")
+                long_poll = bool(route["query"].get("wait") and route["query"].get("since"))
+                if (events or long_poll) and not handler.deferred_supported:
+                    self._send_error(handler, 501, "Push requires the asyncio server")
+                    return
+                if events:
+                    self._stream_events(handler, route, self._rotate(token))
+                    return
+                if long_poll:
+                    self._long_poll(handler, route, self._rotate(token))
+                    return
+                if route["query"].get("stream"):
+                    self._stream_table(handler, route, self._rotate(token))
+                    return
+                with metrics.timer("read"):
+                    payload = self._handle_read(route)
+            elif method == "POST" and not route["table"]:
+                payload = self._handle_write(handler)
+            else:
+                self._send_error(handler, 405, "Method not allowed")
+                return
+
+            if payload is None:
+                self._send_error(handler, 400, "Bad request")
+                return
+            cache_tag = self._cache_tag(route) if method == "GET" else None
+            self._send_payload(handler, payload, self._rotate(token), cache_tag)
+            metrics.observe("request." + ("read" if method == "GET" else "write"),
+                            time.perf_counter() - started)
+        except Exception:
+            self._send_error(handler, 500, "Internal server error")
+
+    def _parse_route(self, handler) -> Optional[Dict[str, Any]]:
+        """Split ``/sync/<endpoint>[/<table>[/<key>]]`` and query string."""
+        url = urlsplit(handler.path)
+        parts: List[str] = [part for part in url.path.split("/") if part]
+        if len(parts) < 2 or len(parts) > 4 or parts[0] != "sync":
+            return None
+        return {
+            "endpoint": parts[1],
+            "table": parts[2] if len(parts) > 2 else None,
+            "key": parts[3] if len(parts) > 3 else None,
+            "query": parse_qs(url.query),
+        }
+
+    def _authenticate(self, handler, endpoint: str) -> Optional[str]:
+        """Validate bearer token and endpoint; return the token if valid."""
+        auth = handler.headers.get("Authorization", "")
+        if not auth.startswith("Bearer "):
+            return None
+        token = auth[len("Bearer "):].strip()
+        if not self.dsn.token_manager.validate_token(token):
+            return None
+
+        endpoint_manager = self.dsn.endpoint_manager
+        if not endpoint_manager.validate_endpoint(endpoint):
+            return None
+        # Accept the previous endpoint too, for requests in flight during rotation
+        accepted = (endpoint_manager.get_current_endpoint(),
+                    endpoint_manager.get_previous_endpoint())
+        if int(endpoint) not in [int(number) for number in accepted]:
+            return None
+        return token
+
+    def _rotate(self, token: str) -> Dict[str, str]:
+        """Count the request; return headers announcing a rotated endpoint."""
+        endpoint_manager = self.dsn.endpoint_manager
+        before = endpoint_manager.get_current_endpoint()
+        after = endpoint_manager.increment_counter()
+        if after == before:
+            return {}
+        return {
+            "X-DSN-Endpoint": after,
+            "X-DSN-Token": self.dsn.token_manager.update_token(token, after),
+        }
+
+    def _handle_read(self, route: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build READ response payload."""
+        data_manager = self.dsn.data_manager
+        table = route["table"]
+
+        if route["key"]:
+            return {
+                "version": data_manager.get_version(table),
+                "data": data_manager.get_data(table, route["key"]),
+            }
+
+        if any(name in route["query"] for name in QUERY_PARAMS):
+            return self._handle_query(route)
+
+        if any(name in route["query"] for name in PAGE_PARAMS):
+            try:
+                return data_manager.get_page(table, self._after(route), self._page_size(route))
+            except ValueError:
+                return None
+
+        since = route["query"].get("since")
+        if since:
+            try:
+                version = int(since[0])
+            except ValueError:
+                return None
+            return data_manager.get_changes_since(table, version)
+
+        snapshot = data_manager.get_all_data(table)
+        return {"version": getattr(snapshot, "version", 0), "data": snapshot}
+
+    def _handle_query(self, route: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a filtered query response payload."""
+        query = route["query"]
+        data_manager = self.dsn.data_manager
+        table = route["table"]
+        try:
+            filters = json.loads(query["where"][0]) if "where" in query else None
+            order = query["order"][0].split(",") if "order" in query else None
+            limit = int(query["limit"][0]) if "limit" in query else None
+            # Version first: a client resuming from it may see a change twice, never miss one
+            version = data_manager.get_version(table)
+            rows = data_manager.query(table, filters, order, limit)
+        except ValueError:
+            return None
+        return {
+            "version": version,
+            "keys": [key for key, _ in rows],
+            "data": dict(rows),
+        }
+
+    @staticmethod
+    def _page_size(route: Dict[str, Any]) -> int:
+        """Requested ``page_size`` (capped at ``MAX_PAGE_SIZE``); ValueError if invalid."""
+        page_size = int(route["query"]["page_size"][0]) if "page_size" in route["query"] else PAGE_SIZE
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        return min(page_size, MAX_PAGE_SIZE)
+
+    @staticmethod
+    def _after(route: Dict[str, Any]) -> Optional[str]:
+        """Keyset cursor of a paginated read (None: first page)."""
+        return route["query"].get("after", [None])[0]
+
+    def _stream_table(self, handler, route: Dict[str, Any], headers: Dict[str, str]) -> None:
+        """Stream a table as independently encrypted pages with chunked transfer."""
+        try:
+            page_size = self._page_size(route)
+        except ValueError:
+            self._send_error(handler, 400, "Bad request")
+            return
+
+        pages = self.dsn.data_manager.iter_pages(route["table"], self._after(route), page_size)
+        encryption_manager = self.dsn.encryption_manager
+        codec = self._codec(handler)
+        compressor = self._compressor(handler)
+        if FRAME_CONTENT_TYPE in handler.headers.get("Accept", ""):
+            content_type = FRAME_CONTENT_TYPE
+
+            def encode(page: Dict[str, Any]) -> bytes:
+                frame = encryption_manager.encrypt_frame(page, codec, compressor)
+                return struct.pack(">I", len(frame)) + frame
+        else:
+            content_type = STREAM_CONTENT_TYPE
+
+            def encode(page: Dict[str, Any]) -> bytes:
+                encrypted = encryption_manager.encrypt_data(page, codec, compressor)
+                return json.dumps({"data": encrypted}).encode("utf-8") + b"\n"
+
+        stream_headers = self._format_headers(handler)
+        stream_headers.update(headers)
+        try:
+            handler.send_chunked((encode(page) for page in pages), 200, content_type,
+                                 stream_headers)
+        except Exception:
+            # Headers are out; an unterminated stream tells the client it failed
+            handler.close_connection = True
+
+    def _cache_tag(self, route: Dict[str, Any]) -> Optional[tuple]:
+        """Identify cacheable table reads (full snapshot, delta, query or page)."""
+        if route["key"]:
+            return None
+        if any(name in route["query"] for name in QUERY_PARAMS):
+            params = {name: route["query"].get(name) for name in QUERY_PARAMS}
+            return (route["table"], "query:" + json.dumps(params, sort_keys=True))
+        if any(name in route["query"] for name in PAGE_PARAMS):
+            params = {name: route["query"].get(name) for name in PAGE_PARAMS}
+            return (route["table"], "page:" + json.dumps(params, sort_keys=True))
+        since = route["query"].get("since")
+        return (route["table"], "since:" + since[0] if since else "full")
+
+    def _long_poll(self, handler, route: Dict[str, Any], headers: Dict[str, str]) -> None:
+        """Answer once the table moves past ``since`` or ``wait`` expires."""
+        try:
+            version = int(route["query"]["since"][0])
+            wait = float(route["query"]["wait"][0])
+        except ValueError:
+            wait = -1.0
+        if not wait >= 0:  # Also rejects NaN
+            self._send_error(handler, 400, "Bad request")
+            return
+        wait = min(wait, LONG_POLL_MAX_WAIT)
+
+        data_manager = self.dsn.data_manager
+        table = route["table"]
+        if not data_manager.notifier.has_changed(table, version):
+            handler.deferred = self._long_poll_async(handler, table, version, wait, headers)
+            return
+        payload = data_manager.get_changes_since(table, version)
+        self._send_payload(handler, payload, headers, (table, f"since:{version}"))
+
+    async def _long_poll_async(self, handler, table: str, version: int, wait: float,
+                               headers: Dict[str, str]) -> None:
+        """Park a long-poll on the event loop."""
+        data_manager = self.dsn.data_manager
+        await data_manager.wait_for_changes_async(table, version, wait)
+        payload = data_manager.get_changes_since(table, version)
+        await handler.server.run_in_worker(self._send_payload, handler, payload, headers,
+                                           (table, f"since:{version}"))
+
+    def _stream_events(self, handler, route: Dict[str, Any], headers: Dict[str, str]) -> None:
+        """Serve a Server-Sent Events stream of table changes."""
+        since = route["query"].get("since", [handler.headers.get("Last-Event-ID")])[0]
+        try:
+            version = int(since) if since is not None else -1  # -1: full snapshot first
+        except ValueError:
+            self._send_error(handler, 400, "Bad request")
+            return
+
+        stream_headers = {"Cache-Control": "no-cache"}
+        stream_headers.update(self._format_headers(handler))
+        stream_headers.update(headers)
+        handler.start_chunked(200, "text/event-stream", stream_headers)
+        handler.deferred = self._stream_events_async(handler, route["table"], version)
+
+    async def _stream_events_async(self, handler, table: str, version: int) -> None:
+        """Serve an event stream from the event loop."""
+        notifier = self.dsn.data_manager.notifier
+        run_in_worker = handler.server.run_in_worker
+        try:
+            version = await run_in_worker(self._send_event, handler, table, version)
+            while not notifier.is_closed():
+                if await notifier.wait_async(table, version, SSE_HEARTBEAT_INTERVAL):
+                    version = await run_in_worker(self._send_event, handler, table, version)
+                else:
+                    handler.write_chunk(b": ping\n\n")
+                await handler.wfile.drain()
+            handler.end_chunked()
+        except OSError:
+            handler.close_connection = True
+
+    def _send_event(self, handler, table: str, version: int) -> int:
+        """Send changes since ``version`` as one event; return the new version."""
+        payload = self.dsn.data_manager.get_changes_since(table, version)
+        if payload["full"] or payload["changes"]:
+            codec = self._codec(handler)
+            compressor = self._compressor(handler)
+
+            def encode() -> bytes:
+                encrypted = self.dsn.encryption_manager.encrypt_data(payload, codec, compressor)
+                return f"id: {payload['version']}\ndata: {encrypted}\n\n".encode("utf-8")
+
+            body_format = ("sse", codec.name, compressor.name if compressor else None)
+            handler.write_chunk(self._cached(payload, (table, f"since:{version}"),
+                                             body_format, encode))
+        return payload["version"]
+
+    def _handle_write(self, handler) -> Optional[Dict[str, Any]]:
+        """Decrypt, verify and apply a WRITE packet."""
+        binary = FRAME_CONTENT_TYPE in handler.headers.get("Content-Type", "")
+        compressed = "X-DSN-Compression" in handler.headers
+        packet = self._open_packet(handler.read_body(), binary, self._codec(handler), compressed)
+        if packet is None:
+            return None
+        if "batch" in packet:
+            return self._handle_batch(packet["batch"])
+
+        operation = str(packet.get("operation", "")).lower()
+        table = packet.get("table")
+        key = packet.get("key")
+        data = packet.get("data") or {}
+        if operation not in WRITE_OPERATIONS or not table or not key:
+            return None
+
+        with self.dsn.metrics.timer("handler"):
+            success = self.dsn.receiver.process_incoming(
+                operation, table, key, data, lambda: self._apply_operation(packet)
+            )
+        return {"success": success, "version": self.dsn.data_manager.get_version(table)}
+
+    def _handle_batch(self, operations: Any) -> Optional[Dict[str, Any]]:
+        """Run a batch through the receiver and apply accepted writes."""
+        if not isinstance(operations, list):
+            return None
+
+        valid = []
+        for op in operations:
+            valid.append(
+                isinstance(op, dict)
+                and str(op.get("operation", "")).lower() in WRITE_OPERATIONS
+                and bool(op.get("table")) and bool(op.get("key"))
+            )
+        metrics = self.dsn.metrics
+        receiver = self.dsn.receiver
+        # Dispatched handlers apply each write in their row's slot, keeping
+        # writes to a row in order; inline ones leave grouped stores to us
+        inline = receiver.dispatcher.mode == "inline"
+        with metrics.timer("handler"):
+            results = receiver.process_batch(
+                [op if ok else None for op, ok in zip(operations, valid)],
+                None if inline else self._apply_operation
+            )
+        accepted = [op for op, ok in zip(operations, results) if ok]
+        if inline:
+            with metrics.timer("apply"):
+                self._apply_batch_to_memory(accepted)
+            self._queue_for_database(accepted)
+        tables = list(dict.fromkeys(op["table"] for op in accepted))
+
+        data_manager = self.dsn.data_manager
+        return {
+            "results": results,
+            "versions": {table: data_manager.get_version(table) for table in tables},
+        }
+
+    def _apply_operation(self, op: Dict[str, Any]) -> None:
+        """Apply one accepted write to memory and queue it for the database."""
+        with self.dsn.metrics.timer("apply"):
+            applied = self._apply_to_memory(str(op["operation"]).lower(), op["table"], op["key"],
+                                            op.get("data") or {})
+        if not applied:
+            raise RuntimeError("Accepted write could not be stored")  # The write is rejected
+        self._queue_for_database([op])
+
+    def _apply_batch_to_memory(self, operations: List[Dict[str, Any]]) -> None:
+        """Apply accepted batch writes with one store call per table."""
+        data_manager = self.dsn.data_manager
+        pending: Dict[str, Dict[str, Any]] = {}  # {table: {key: row or None}}
+        for op in operations:
+            table, key = op["table"], op["key"]
+            rows = pending.setdefault(table, {})
+            operation = op["operation"].lower()
+            data = op.get("data") or {}
+            if operation == "delete":
+                rows[key] = None
+            elif operation == "update":
+                current = rows[key] if key in rows else data_manager.get_data(table, key)
+                row = dict(current) if current else {}
+                row.update(data)
+                rows[key] = row
+            else:
+                rows[key] = data
+
+        for table, rows in pending.items():
+            deleted = [key for key, row in rows.items() if row is None]
+            stored = {key: row for key, row in rows.items() if row is not None}
+            if stored:
+                data_manager.sync_many(table, stored)
+            if deleted:
+                data_manager.delete_many(table, deleted)
+
+    def _queue_for_database(self, operations: List[Dict[str, Any]]) -> None:
+        """Hand accepted writes to the write-behind queue (after memory is updated)."""
+        write_behind = self.dsn.write_behind
+        if write_behind is None:
+            return
+        read_through = self.dsn.data_manager.read_through
+        for op in operations:
+            operation = str(op["operation"]).lower()
+            queued = write_behind.enqueue(operation, op["table"], op["key"], op.get("data") or {})
+            if queued and read_through is not None and operation != "delete":
+                read_through.mark_persisted(op["table"], op["key"])
+
+    def _open_packet(self, body: bytes, binary: bool = False,
+                     codec: Optional[Codec] = None,
+                     compressed: bool = False) -> Optional[Dict[str, Any]]:
+        """Decrypt packet and check signature and timestamp."""
+        encryption_manager = self.dsn.encryption_manager
+        metrics = self.dsn.metrics
+        try:
+            with metrics.timer("decrypt"):
+                if binary:
+                    envelope = encryption_manager.decrypt_frame(body, codec, compressed)
+                    packet = envelope["data"]
+                else:
+                    envelope = json.loads(body.decode("utf-8"))
+                    packet = encryption_manager.decrypt_data(envelope["data"], codec, compressed)
+            timestamp = float(envelope["timestamp"])
+            signature = envelope["signature"]
+        except Exception:
+            return None
+
+        if abs(time.time() - timestamp) > SIGNATURE_MAX_AGE:
+            return None
+        with metrics.timer("signature"):
+            valid = encryption_manager.validate_signature(packet, timestamp, signature, codec)
+        return packet if valid else None
+
+    def _apply_to_memory(self, operation: str, table: str, key: str,
+                         data: Dict[str, Any]) -> bool:
+        """Mirror an accepted write into the in-memory registry; False if storing failed."""
+        data_manager = self.dsn.data_manager
+        if operation == "delete":
+            data_manager.delete_data(table, key)
+        elif operation == "update" and data_manager.update_memory(table, key, data):
+            return True
+        else:
+            return data_manager.sync(table, key, data)
+        return True
+
+    def _send_payload(self, handler, payload: Dict[str, Any], headers: Dict[str, str],
+                      cache_tag: Optional[tuple] = None) -> None:
+        """
+        Encrypt payload and send it in the format the client accepts.
+
+        Table reads pass ``cache_tag`` (table, read kind) so the encoded body
+        is reused until the table version or the active key changes.
+        """
+        encryption_manager = self.dsn.encryption_manager
+        codec = self._codec(handler)
+        compressor = self._compressor(handler)
+        if FRAME_CONTENT_TYPE in handler.headers.get("Accept", ""):
+            content_type = FRAME_CONTENT_TYPE
+
+            def encode() -> bytes:
+                return encryption_manager.encrypt_frame(payload, codec, compressor)
+        else:
+            content_type = "application/json"
+
+            def encode() -> bytes:
+                encrypted = encryption_manager.encrypt_data(payload, codec, compressor)
+                return json.dumps({"data": encrypted}).encode("utf-8")
+
+        body_format = (content_type, codec.name, compressor.name if compressor else None)
+        with self.dsn.metrics.timer("encrypt"):
+            body = self._cached(payload, cache_tag, body_format, encode)
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        for name, value in self._format_headers(handler).items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _codec(self, handler) -> Codec:
+        """Codec for this request (``X-DSN-Codec`` or the instance default)."""
+        return negotiate_codec(handler.headers.get("X-DSN-Codec"), self.dsn.codec)
+
+    def _compressor(self, handler) -> Optional[Compressor]:
+        """Compressor negotiated with ``X-DSN-Compression``, if any."""
+        return self.dsn.encryption_manager.negotiate_compression(
+            handler.headers.get("X-DSN-Compression")
+        )
+
+    def _format_headers(self, handler) -> Dict[str, str]:
+        """Response headers naming the codec and compression in use."""
+        headers = {"X-DSN-Codec": self._codec(handler).wire}
+        compressor = self._compressor(handler)
+        if compressor is not None:
+            headers["X-DSN-Compression"] = compressor.name
+        return headers
+
+    def _cached(self, payload: Dict[str, Any], cache_tag: Optional[tuple],
+                body_format: tuple, encode) -> bytes:
+        """Encode through the response cache when the read is cacheable."""
+        if cache_tag is None:
+            return encode()
+        table, kind = cache_tag
+        cache_key = (table, payload["version"], self.dsn.encryption_manager.get_key_id(),
+                     body_format, kind)
+        return self.dsn.response_cache.get_or_create(cache_key, encode)
+
+    def _send_error(self, handler, status: int, message: str) -> None:
+        """Send an unencrypted error response."""
+        self.dsn.metrics.increment("errors", status=str(status))
+        body = json.dumps({"error": message}).encode("utf-8")
+        handler.send_body(body, status=status)
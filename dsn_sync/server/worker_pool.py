@@ -0,0 +1,202 @@
+"""Multi-process worker mode sharing one port."""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+from ..config.settings import WORKER_WRITE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    Runs the embedded server in several forked worker processes.
+
+    Every worker binds the same port with SO_REUSEPORT, so the kernel spreads
+    connections across processes and reads/encryption use all cores. The
+    parent process is the single writer for ``MemoryStore``: writes made in a
+    worker are forwarded to the parent, applied there, and broadcast back to
+    every worker. The parent then acknowledges the write to the worker that
+    made it, through the same queue as the broadcast, so the write returns
+    the parent's result only once the worker's own copy has it too. The
+    endpoint counter lives in shared memory.
+
+    Workers are forked, and a thread holding a lock at fork time leaves it
+    held forever in the child. dsn-sync stops its own background threads
+    while forking; start the pool before the application spawns threads of
+    its own. (The "spawn" context would need handlers to be picklable.)
+    """
+
+    def __init__(self, dsn, workers: int):
+        """Initialize worker pool for a ``DSNSync`` instance."""
+        if workers < 1:
+            raise ValueError("Worker count must be at least 1")
+        self.dsn = dsn
+        self.workers = workers
+        self._context = multiprocessing.get_context("fork")
+        self._processes: List[multiprocessing.Process] = []
+        self._inboxes: List = []
+        self._outbox = None
+        self._pump_thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self) -> bool:
+        """Fork workers and start replicating writes."""
+        if self._running:
+            return False
+
+        self.dsn.endpoint_manager.enable_sharing(self._context)
+        self.dsn.server.reuse_port = True
+        self._outbox = self._context.Queue()
+        self._inboxes = [self._context.Queue() for _ in range(self.workers)]
+
+        # Register before forking so no write slips between fork and broadcast
+        self.dsn.memory_store.add_listener(self._broadcast)
+        self._pause_threads()
+        try:
+            for index, inbox in enumerate(self._inboxes):
+                process = self._context.Process(target=self._worker_main, args=(index, inbox),
+                                                daemon=True)
+                process.start()
+                self._processes.append(process)
+        finally:
+            self._resume_threads()
+
+        self._pump_thread = threading.Thread(target=self._pump_writes, daemon=True)
+        self._pump_thread.start()
+        self._running = True
+        return True
+
+    def stop(self, timeout: float = 5.0) -> bool:
+        """Stop workers and the write pump."""
+        if not self._running:
+            return False
+
+        self.dsn.memory_store.remove_listener(self._broadcast)
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+        self._outbox.put(None)
+        self._pump_thread.join(timeout)
+        self._processes = []
+        self._inboxes = []
+        self._running = False
+        return True
+
+    def is_running(self) -> bool:
+        """Check if workers are running."""
+        return self._running
+
+    def get_worker_pids(self) -> List[int]:
+        """Get process ids of running workers."""
+        return [process.pid for process in self._processes]
+
+    def _pause_threads(self) -> None:
+        """Stop background threads so none holds a lock while forking."""
+        self.dsn.receiver.close()  # Handler pool; recreated on demand
+        if self.dsn.persistence is not None:
+            self.dsn.persistence.pause()
+        if self.dsn.write_behind is not None:
+            self.dsn.write_behind.close()
+
+    def _resume_threads(self) -> None:
+        """Restart the threads stopped by ``_pause_threads`` (runs in the parent)."""
+        if self.dsn.persistence is not None:
+            self.dsn.persistence.resume()
+        if self.dsn.write_behind is not None:
+            self.dsn.write_behind.open()
+
+    def _broadcast(self, operation, table_name, key, data) -> None:
+        """Send an applied write to every worker (runs in the parent)."""
+        for inbox in self._inboxes:
+            inbox.put(("change", operation, table_name, key, data))
+
+    def _pump_writes(self) -> None:
+        """Apply writes forwarded by workers and acknowledge them (runs in the parent)."""
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                break
+            worker, request_id, operation, table_name, key, data = message
+            error = None
+            try:
+                result = self.dsn.memory_store.apply_change(operation, table_name, key, data)
+            except Exception as e:
+                # A bad write from one worker must not stop replication
+                logger.exception("Write forwarded by worker %d failed: %s %s/%s",
+                                 worker, operation, table_name, key)
+                self.dsn.metrics.increment("forwarded_write_errors", operation=operation)
+                result, error = None, f"{type(e).__name__}: {e}"
+            self._inboxes[worker].put(("ack", request_id, result, error))
+
+    def _worker_main(self, index: int, inbox) -> None:
+        """Serve requests and apply broadcast writes (runs in a worker)."""
+        signal.signal(signal.SIGTERM, lambda *args: os._exit(0))
+        store = self.dsn.memory_store
+        store.remove_listener(self._broadcast)
+        if self.dsn.persistence is not None:
+            self.dsn.persistence.detach()  # The parent owns the log
+        if self.dsn.write_behind is not None:
+            self.dsn.write_behind.open()  # Threads do not survive fork
+        forwarder = _WriteForwarder(index, self._outbox)
+        store.set_forwarder(forwarder)
+        self.dsn.metrics.reset()  # Each worker reports its own requests
+
+        if not self.dsn._start_local_server():
+            return
+        try:
+            while True:
+                message = inbox.get()
+                if message is None:
+                    break
+                if message[0] == "ack":
+                    forwarder.settle(*message[1:])
+                else:
+                    store.apply_change(*message[1:])
+        finally:
+            self.dsn._stop_local_server()
+
+
+class _WriteForwarder:
+    """Sends a worker's writes to the parent and waits for each acknowledgement."""
+
+    def __init__(self, worker: int, outbox, timeout: float = WORKER_WRITE_TIMEOUT):
+        self.worker = worker
+        self.outbox = outbox
+        self.timeout = timeout
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, operation: str, table_name: Optional[str], key, data) -> Any:
+        """Forward a write; return the parent's ``apply_change`` result."""
+        future: Future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        try:
+            self.outbox.put((self.worker, request_id, operation, table_name, key, data))
+            return future.result(self.timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def settle(self, request_id: int, result: Any, error: Optional[str]) -> None:
+        """Deliver the parent's acknowledgement (inbox thread)."""
+        with self._lock:
+            future = self._pending.pop(request_id, None)
+        if future is None:
+            return  # Its writer gave up waiting
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(RuntimeError(f"Write rejected by the writer process: {error}"))
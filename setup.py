@@ -30,6 +30,10 @@ setup(
         "cryptography>=41.0.0",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.6.0",
+            "msgpack>=1.0.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "black>=22.0.0",
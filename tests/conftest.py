@@ -0,0 +1,89 @@
+"""Fixtures for tests that talk to a running embedded server."""
+
+import http.client
+import json
+import time
+
+import pytest
+
+from dsn_sync import DSNSync
+
+
+class Client:
+    """Minimal dsn-sync HTTP client on one keep-alive connection."""
+
+    def __init__(self, dsn: DSNSync, timeout: float = 10):
+        self.dsn = dsn
+        self.connection = http.client.HTTPConnection("127.0.0.1", dsn.server.port,
+                                                     timeout=timeout)
+        self.token = dsn.get_token()
+        self.endpoint = dsn.endpoint_manager.get_current_endpoint()
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        """Send a request under the current endpoint; return (response, raw body)."""
+        all_headers = {"Authorization": "Bearer " + self.token}
+        all_headers.update(headers or {})
+        self.connection.request(method, f"/sync/{self.endpoint}{path}", body=body,
+                                headers=all_headers)
+        response = self.connection.getresponse()
+        raw = response.read()
+        if response.getheader("X-DSN-Endpoint"):
+            self.endpoint = response.getheader("X-DSN-Endpoint")
+            self.token = response.getheader("X-DSN-Token")
+        return response, raw
+
+    def get(self, path: str, **kwargs):
+        """GET and decrypt; (status, payload), or (status, raw body) on errors."""
+        response, raw = self.request("GET", path, **kwargs)
+        if response.status != 200:
+            return response.status, raw
+        return 200, self.dsn.encryption_manager.decrypt_data(json.loads(raw)["data"])
+
+    def write(self, operation: str, table: str, key: str, data: dict):
+        """Send one signed WRITE packet; (status, payload)."""
+        encryption = self.dsn.encryption_manager
+        packet = {"operation": operation, "table": table, "key": key, "data": data}
+        timestamp = time.time()
+        body = json.dumps({
+            "data": encryption.encrypt_data(packet),
+            "timestamp": timestamp,
+            "signature": encryption.generate_signature(packet, timestamp),
+        }).encode("utf-8")
+        response, raw = self.request("POST", "", body=body)
+        if response.status != 200:
+            return response.status, raw
+        return 200, encryption.decrypt_data(json.loads(raw)["data"])
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+@pytest.fixture
+def serve():
+    """Start a DSNSync server on a free local port: ``serve(**kwargs)``."""
+    started = []
+
+    def start(**kwargs) -> DSNSync:
+        dsn = DSNSync(port=0, **kwargs)
+        dsn.server.host = "127.0.0.1"
+        assert dsn.start()
+        started.append(dsn)
+        return dsn
+
+    yield start
+    for dsn in started:
+        dsn.stop()
+
+
+@pytest.fixture
+def client():
+    """Open ``Client`` connections to a server: ``client(dsn)``."""
+    clients = []
+
+    def connect(dsn: DSNSync, **kwargs) -> Client:
+        clients.append(Client(dsn, **kwargs))
+        return clients[-1]
+
+    yield connect
+    for opened in clients:
+        opened.close()
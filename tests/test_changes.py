@@ -0,0 +1,56 @@
+"""Delta sync from the per-table change log."""
+
+import pytest
+
+from dsn_sync.core.memory_store import MemoryStore
+
+
+@pytest.fixture
+def store():
+    return MemoryStore(change_log_size=4)
+
+
+def test_changes_since_a_version_include_tombstones(store):
+    store.store_data("users", "1", {"name": "a"})
+    store.store_data("users", "2", {"name": "b"})
+    version = store.get_version("users")
+    store.update_data("users", "1", {"age": 3})
+    store.delete_data("users", "2")
+
+    result = store.get_changes_since("users", version)
+    assert result == {"version": version + 2, "full": False,
+                      "changes": {"1": {"name": "a", "age": 3}, "2": None}}
+    assert store.get_changes_since("users", version + 2)["changes"] == {}
+
+
+def test_bulk_writes_publish_one_version(store):
+    store.store_many("users", {"1": {}, "2": {}})
+    store.delete_many("users", ["1"])
+    assert store.get_version("users") == 2
+    assert store.get_changes_since("users", 1)["changes"] == {"1": None}
+
+
+def test_unknown_versions_get_a_full_resync(store):
+    store.store_data("users", "1", {"name": "a"})
+    result = store.get_changes_since("users", 5)
+    assert result["full"] and result["version"] == 1
+    assert dict(result["data"]) == {"1": {"name": "a"}}
+    assert store.get_changes_since("missing", 0) == {"version": 0, "full": False, "changes": {}}
+
+
+def test_versions_below_the_log_floor_get_a_full_resync(store):
+    for i in range(6):
+        store.store_data("users", str(i), {"i": i})  # Versions 1-6; the log keeps 3-6
+
+    assert store.get_changes_since("users", 1)["full"]
+    result = store.get_changes_since("users", 2)
+    assert not result["full"] and set(result["changes"]) == {"2", "3", "4", "5"}
+    assert store.get_changes_since("users", 0)["full"]
+
+
+def test_clear_forces_clients_to_resync(store):
+    store.store_data("users", "1", {"name": "a"})
+    version = store.get_version("users")
+    store.clear_data("users")
+    result = store.get_changes_since("users", version)
+    assert result["full"] and result["version"] > version and dict(result["data"]) == {}
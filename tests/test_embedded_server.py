@@ -0,0 +1,118 @@
+"""Embedded server engines: keep-alive, pipelining and idle connections."""
+
+import http.client
+import socket
+import time
+
+import pytest
+
+from dsn_sync.server.embedded_server import EmbeddedServer
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(**kwargs) -> EmbeddedServer:
+        kwargs.setdefault("mode", "threaded")
+        server = EmbeddedServer(port=0, host="127.0.0.1", **kwargs)
+        assert server.start_server()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop_server()
+
+
+def get(connection: http.client.HTTPConnection):
+    connection.request("GET", "/")
+    response = connection.getresponse()
+    return response, response.read()
+
+
+@pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+def test_requests_reuse_the_connection(start_server, mode):
+    server = start_server(mode=mode)
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    response, body = get(connection)
+    sock = connection.sock
+    assert response.status == 200 and body == b"DSN Sync Server Running"
+    for _ in range(3):
+        assert get(connection)[0].status == 200
+    assert connection.sock is sock
+    connection.close()
+
+
+def test_idle_keepalive_clients_do_not_hold_workers(start_server):
+    server = start_server(max_workers=2)
+    idle = [http.client.HTTPConnection("127.0.0.1", server.port, timeout=5) for _ in range(4)]
+    for connection in idle:
+        assert get(connection)[0].status == 200  # Then stays open, idle
+
+    fresh = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    started = time.monotonic()
+    assert get(fresh)[0].status == 200
+    assert time.monotonic() - started < 1
+    for connection in idle + [fresh]:
+        assert get(connection)[0].status == 200  # Parked connections are served again
+        connection.close()
+
+
+def test_connections_that_never_send_do_not_hold_workers(start_server):
+    server = start_server(max_workers=1)
+    silent = socket.create_connection(("127.0.0.1", server.port))
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=2)
+    assert get(connection)[0].status == 200
+    connection.close()
+    silent.close()
+
+
+def test_pipelined_requests_are_answered_in_order(start_server):
+    server = start_server(max_workers=1)
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+        sock.sendall(b"GET /a HTTP/1.1\r\nHost: x\r\n\r\nGET /b HTTP/1.1\r\nHost: x\r\n\r\n")
+        received = b""
+        while received.count(b"DSN Sync Server Running") < 2:
+            chunk = sock.recv(4096)
+            assert chunk
+            received += chunk
+    assert received.count(b"HTTP/1.1 200") == 2
+
+
+def test_idle_connections_are_closed_after_the_keepalive_timeout(start_server):
+    server = start_server(keepalive_timeout=0.3)
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+        sock.sendall(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+        received = b""
+        while b"Running" not in received:
+            received += sock.recv(4096)
+        started = time.monotonic()
+        assert sock.recv(4096) == b""  # Server closed the idle connection
+        assert time.monotonic() - started < 3
+
+
+def test_connection_closes_after_max_keepalive_requests(start_server):
+    server = start_server(max_keepalive_requests=2)
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    assert get(connection)[0].getheader("Connection") is None
+    assert get(connection)[0].getheader("Connection") == "close"
+    connection.close()
+
+
+def test_serial_engine_closes_after_each_response(start_server):
+    server = start_server(mode="serial")
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    assert get(connection)[0].getheader("Connection") == "close"
+    assert get(connection)[0].status == 200  # http.client reconnects
+    connection.close()
+
+
+def test_connection_limit_rejects_with_503(start_server):
+    server = start_server(max_connections=1)
+    held = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    assert get(held)[0].status == 200
+    rejected = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    assert get(rejected)[0].status == 503
+    held.close()
+    rejected.close()
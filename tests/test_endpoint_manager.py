@@ -0,0 +1,74 @@
+"""Endpoint rotation and validation."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from dsn_sync import DSNSync
+from dsn_sync.config.settings import ENDPOINT_ROTATION_COUNT
+from dsn_sync.server.endpoint_manager import EndpointManager, MAX_ENDPOINT
+
+
+def test_rotation_wraps_after_max_endpoint():
+    manager = EndpointManager()
+    for _ in range(MAX_ENDPOINT - 1):
+        manager.rotate_endpoint()
+    assert manager.get_current_endpoint() == "999"
+    assert manager.get_previous_endpoint() == "998"
+
+    assert manager.rotate_endpoint() == "001"
+    assert manager.get_previous_endpoint() == "999"
+    assert manager.rotate_endpoint() == "002"
+
+
+def test_counter_rotates_every_rotation_count_requests():
+    manager = EndpointManager()
+    for _ in range(ENDPOINT_ROTATION_COUNT - 1):
+        assert manager.increment_counter() == "001"
+    assert manager.increment_counter() == "002"
+    assert manager.get_request_count() == 0
+
+
+@pytest.mark.parametrize("endpoint, valid", [
+    ("001", True), ("999", True), ("1", True), ("000", False), ("1000", False), ("abc", False),
+])
+def test_validate_endpoint(endpoint, valid):
+    assert EndpointManager().validate_endpoint(endpoint) is valid
+
+
+@pytest.fixture
+def dsn():
+    return DSNSync(port=0)
+
+
+def authenticate(dsn, endpoint):
+    handler = SimpleNamespace(headers={"Authorization": "Bearer " + dsn.get_token()})
+    return dsn.request_handler._authenticate(handler, endpoint) is not None
+
+
+def test_requests_keep_working_across_the_wrap(dsn):
+    manager = dsn.endpoint_manager
+    for _ in range(MAX_ENDPOINT - 1):
+        manager.rotate_endpoint()
+    assert authenticate(dsn, "999")
+
+    manager.rotate_endpoint()
+    assert manager.get_current_endpoint() == "001"
+    assert authenticate(dsn, "001")
+    assert authenticate(dsn, "999")  # Previous endpoint, in flight during rotation
+    assert not authenticate(dsn, "998")
+    assert not authenticate(dsn, "1000")
+
+
+def test_only_current_and_previous_endpoints_are_accepted(dsn):
+    dsn.endpoint_manager.rotate_endpoint()
+    dsn.endpoint_manager.rotate_endpoint()
+    assert authenticate(dsn, "003")
+    assert authenticate(dsn, "002")
+    assert not authenticate(dsn, "001")
+    assert not authenticate(dsn, "004")
+
+
+def test_invalid_token_is_rejected(dsn):
+    handler = SimpleNamespace(headers={"Authorization": "Bearer nonsense"})
+    assert dsn.request_handler._authenticate(handler, "001") is None
@@ -0,0 +1,83 @@
+"""MemoryStore layouts, indexes on lazily restored tables and snapshot versions."""
+
+import pytest
+
+from dsn_sync.core.memory_store import MemoryStore
+from dsn_sync.core.persistence import StorePersistence
+
+ROWS = {str(i): {"name": f"user {i}", "group": i % 3} for i in range(100)}
+
+
+@pytest.fixture
+def restored(tmp_path):
+    """A store reopened from a snapshot, its table not decoded yet."""
+    store = MemoryStore()
+    persistence = StorePersistence(store, str(tmp_path))
+    persistence.open()
+    store.store_many("users", ROWS)
+    persistence.snapshot()
+    persistence.close()
+
+    store = MemoryStore()
+    persistence = StorePersistence(store, str(tmp_path))
+    persistence.open()
+    assert list(store._lazy) == ["users"]
+    yield store
+    persistence.close()
+
+
+def test_set_indexes_without_definitions_keeps_table_lazy(restored):
+    restored.set_indexes("users", {})
+    restored.set_indexes("users", None)
+    assert list(restored._lazy) == ["users"]
+
+
+def test_indexes_are_built_when_lazy_table_is_decoded(restored):
+    restored.set_indexes("users", {"group": "hash"})
+    assert list(restored._lazy) == ["users"]
+
+    result = restored.query("users", {"group": 1})
+    assert restored._lazy == {}
+    assert {key for key, row in result} == {key for key, row in ROWS.items() if row["group"] == 1}
+
+
+def test_layout_is_applied_when_lazy_table_is_decoded(restored):
+    restored.set_layout("users", ["name", "group"])
+    assert list(restored._lazy) == ["users"]
+
+    assert restored.get_data("users") == ROWS
+    assert isinstance(dict.__getitem__(restored._data["users"], "7"), tuple)
+    assert restored.get_data("users", "7") == ROWS["7"]
+
+
+def test_indexes_on_decoded_table_are_rebuilt():
+    store = MemoryStore()
+    store.store_many("users", ROWS)
+    store.set_indexes("users", {"group": "sorted"})
+    assert len(store.query("users", {"group": 2})) == len([r for r in ROWS.values() if r["group"] == 2])
+    store.set_indexes("users", None)
+    assert "users" not in store._indexes
+
+
+def test_local_writes_to_a_shared_table_keep_its_version():
+    store = MemoryStore()
+    store.store_many("users", {"1": {"name": "a"}, "2": {"name": "b"}})
+    store.store_data("users", "3", {"name": "c"})  # Versions 1-2
+    store.get_data("users")  # Hands the table out, so the next write copies it
+    assert store.cache_row("users", "4", {"name": "d"}, 2)
+    assert store.get_data("users").version == 2
+
+    store.get_data("users")
+    assert store.evict("users", ["1"]) == 1
+    assert store.get_data("users").version == store.get_version("users") == 2
+    assert store.get_page("users", None, 10)["version"] == 2
+
+
+def test_cached_row_in_a_new_table_gets_the_published_version():
+    store = MemoryStore()
+    store.store_data("users", "1", {"name": "a"})
+    store.clear_data("users")  # Publishes a version and drops the table
+    version = store.get_version("users")
+    assert version and "users" not in store._data
+    assert store.cache_row("users", "1", {"name": "a"}, version)
+    assert store.get_data("users").version == version
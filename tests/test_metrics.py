@@ -0,0 +1,61 @@
+"""Stage histograms, counters and the Prometheus text output."""
+
+import threading
+
+from dsn_sync.core.metrics import Metrics
+
+
+def test_prometheus_output():
+    metrics = Metrics(enabled=True, buckets=(0.001, 0.01))
+    metrics.observe("decrypt", 0.0005)
+    metrics.observe("decrypt", 0.005)
+    metrics.observe("decrypt", 0.5)
+    metrics.increment("errors", status="401")
+    metrics.increment("errors", 2, status="401")
+    metrics.gauge("handler_pending", lambda: 3)
+    metrics.gauge("broken", lambda: 1 / 0)
+
+    assert metrics.render_prometheus().splitlines() == [
+        "# HELP dsn_sync_stage_seconds Time spent in each request stage.",
+        "# TYPE dsn_sync_stage_seconds histogram",
+        'dsn_sync_stage_seconds_bucket{stage="decrypt",le="0.001"} 1',
+        'dsn_sync_stage_seconds_bucket{stage="decrypt",le="0.01"} 2',
+        'dsn_sync_stage_seconds_bucket{stage="decrypt",le="+Inf"} 3',
+        'dsn_sync_stage_seconds_sum{stage="decrypt"} 0.5055',
+        'dsn_sync_stage_seconds_count{stage="decrypt"} 3',
+        "# TYPE dsn_sync_errors_total counter",
+        'dsn_sync_errors_total{status="401"} 3',
+        "# TYPE dsn_sync_handler_pending gauge",
+        "dsn_sync_handler_pending 3",
+    ]
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    with metrics.timer("read"):
+        pass
+    metrics.increment("errors", status="500")
+    assert metrics.snapshot() == {"enabled": False, "stages": {}, "counters": {}, "gauges": {}}
+    assert metrics.render_prometheus() == "\n"
+
+
+def test_scrapes_while_new_stages_and_counters_appear():
+    metrics = Metrics(enabled=True)
+    stop = threading.Event()
+
+    def record():
+        for n in range(20000):  # Each name is new, so the dicts keep growing
+            if stop.is_set():
+                return
+            metrics.observe(f"stage{n}", 0.001)
+            metrics.increment(f"counter{n}")
+
+    writer = threading.Thread(target=record)
+    writer.start()
+    try:
+        while writer.is_alive():
+            metrics.render_prometheus()
+            metrics.snapshot()
+    finally:
+        stop.set()
+        writer.join()
@@ -0,0 +1,122 @@
+"""Write-ahead log, snapshots and recovery."""
+
+import os
+import time
+
+import pytest
+
+from dsn_sync import DSNSync
+from dsn_sync.core.memory_store import MemoryStore
+from dsn_sync.core.persistence import StorePersistence
+
+
+def reopen(data_dir):
+    store = MemoryStore()
+    persistence = StorePersistence(store, str(data_dir))
+    replayed = persistence.open()
+    return store, persistence, replayed
+
+
+def test_writes_are_replayed_from_the_log(tmp_path):
+    store, persistence, _ = reopen(tmp_path)
+    store.store_data("users", "1", {"name": "a"})
+    store.update_data("users", "1", {"age": 3})
+    store.store_many("users", {"2": {"name": "b"}, "3": {"name": "c"}})
+    store.delete_data("users", "3")
+    version = store.get_version("users")
+    persistence.close()
+
+    store, persistence, replayed = reopen(tmp_path)
+    assert replayed == 4
+    assert store.get_data("users") == {"1": {"name": "a", "age": 3}, "2": {"name": "b"}}
+    assert store.get_version("users") == version
+    persistence.close()
+
+
+def test_snapshot_compacts_the_log(tmp_path):
+    store, persistence, _ = reopen(tmp_path)
+    store.store_many("users", {str(i): {"i": i} for i in range(50)})
+    persistence.snapshot()
+    store.store_data("users", "new", {"i": -1})
+    persistence.close()
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("snapshot-")]) == 1
+
+    store, persistence, replayed = reopen(tmp_path)
+    assert replayed == 1
+    assert len(store.get_data("users")) == 51
+    persistence.close()
+
+
+def test_torn_record_at_the_end_is_discarded(tmp_path):
+    store, persistence, _ = reopen(tmp_path)
+    store.store_data("users", "1", {"name": "a"})
+    store.store_data("users", "2", {"name": "b"})
+    persistence.close()
+    segment = max(name for name in os.listdir(tmp_path) if name.startswith("wal-"))
+    path = os.path.join(tmp_path, segment)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)  # Crash mid-append
+
+    store, persistence, replayed = reopen(tmp_path)
+    assert replayed == 1
+    assert store.get_data("users") == {"1": {"name": "a"}}
+    persistence.close()
+
+
+def test_reopen_without_restore_keeps_writes_made_while_closed(tmp_path):
+    store, persistence, _ = reopen(tmp_path)
+    store.store_data("users", "1", {"name": "a"})
+    persistence.close()
+    store.store_data("users", "2", {"name": "b"})  # Not logged
+    persistence.open(restore=False)
+    store.store_data("users", "3", {"name": "c"})
+    persistence.close()
+
+    store, persistence, _ = reopen(tmp_path)
+    assert set(store.get_data("users")) == {"1", "2", "3"}
+    persistence.close()
+
+
+@pytest.fixture
+def in_tmp_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # DSNSync persists under DATA_DIR
+    return tmp_path
+
+
+def test_stop_closes_the_log_and_start_reopens_it(in_tmp_dir):
+    dsn = DSNSync(port=0, persistence=True)
+    thread = dsn.persistence._thread
+    assert dsn.start()
+    dsn.sync("users", "1", {"name": "a"})
+    assert dsn.stop()
+    assert not dsn.persistence.is_open() and not thread.is_alive()
+
+    dsn.sync("users", "2", {"name": "b"})
+    assert dsn.start()
+    assert dsn.persistence.is_open()
+    dsn.sync("users", "3", {"name": "c"})
+    assert dsn.stop()
+
+    restored = DSNSync(port=0, persistence=True)
+    assert set(restored.data_manager.get_data("users")) == {"1", "2", "3"}
+    restored.stop()
+
+
+def test_quiet_log_is_compacted_on_the_snapshot_interval(tmp_path):
+    store = MemoryStore()
+    persistence = StorePersistence(store, str(tmp_path), fsync_interval=0.01,
+                                   snapshot_interval=0.05)
+    persistence.open()
+    time.sleep(0.2)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("snapshot-")]
+
+    store.store_data("users", "1", {"name": "a"})
+    deadline = time.monotonic() + 5
+    while not [name for name in os.listdir(tmp_path) if name.startswith("snapshot-")]:
+        assert time.monotonic() < deadline, "no periodic snapshot"
+        time.sleep(0.01)
+    persistence.close()
+
+    store, persistence, replayed = reopen(tmp_path)
+    assert replayed == 0 and store.get_data("users", "1") == {"name": "a"}
+    persistence.close()
@@ -0,0 +1,72 @@
+"""Long-polls and Server-Sent Events."""
+
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def async_dsn(serve):
+    dsn = serve(server_mode="asyncio")
+    dsn.sync("users", "1", {"name": "a"})
+    return dsn
+
+
+def test_long_poll_wakes_on_write(async_dsn, client):
+    version = async_dsn.data_manager.get_version("users")
+    threading.Timer(0.2, async_dsn.sync, ("users", "2", {"name": "b"})).start()
+
+    started = time.monotonic()
+    status, payload = client(async_dsn).get(f"/users?since={version}&wait=5")
+    assert status == 200 and 0.1 < time.monotonic() - started < 4
+    assert payload["changes"] == {"2": {"name": "b"}}
+
+
+def test_long_poll_times_out_without_changes(async_dsn, client):
+    version = async_dsn.data_manager.get_version("users")
+    started = time.monotonic()
+    status, payload = client(async_dsn).get(f"/users?since={version}&wait=0.3")
+    assert status == 200 and time.monotonic() - started >= 0.3
+    assert payload == {"version": version, "full": False, "changes": {}}
+
+
+def test_long_poll_answers_at_once_when_already_behind(async_dsn, client):
+    started = time.monotonic()
+    status, payload = client(async_dsn).get("/users?since=0&wait=5")
+    assert status == 200 and time.monotonic() - started < 2
+    assert payload["changes"] == {"1": {"name": "a"}}
+
+
+@pytest.mark.parametrize("wait", ["-1", "nan", "soon"])
+def test_invalid_wait_is_rejected(async_dsn, client, wait):
+    assert client(async_dsn).get(f"/users?since=1&wait={wait}")[0] == 400
+
+
+def test_event_stream_sends_changes(async_dsn, client):
+    connection = client(async_dsn)
+    connection.connection.request("GET", f"/sync/{connection.endpoint}/users?since=1", headers={
+        "Authorization": "Bearer " + connection.token, "Accept": "text/event-stream",
+    })
+    response = connection.connection.getresponse()
+    assert response.status == 200
+    assert response.getheader("Content-Type").startswith("text/event-stream")
+    async_dsn.sync("users", "2", {"name": "b"})
+
+    lines = []
+    while not lines or lines[-1] != b"\n":
+        lines.append(response.fp.readline())
+    event = [line for line in lines if line.startswith(b"id: ") or line.startswith(b"data: ")]
+    version = async_dsn.data_manager.get_version("users")
+    assert event[0] == f"id: {version}\n".encode()
+    payload = async_dsn.encryption_manager.decrypt_data(event[1][6:].strip().decode())
+    assert payload["changes"] == {"2": {"name": "b"}}
+
+
+@pytest.mark.parametrize("mode", ["serial", "threaded"])
+def test_push_needs_the_asyncio_engine(serve, client, mode):
+    dsn = serve(server_mode=mode)
+    connection = client(dsn)
+    assert connection.get("/users?since=0&wait=5")[0] == 501
+    assert connection.get("/users", headers={"Accept": "text/event-stream"})[0] == 501
+    assert connection.get("/users?since=0")[0] == 200
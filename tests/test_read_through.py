@@ -0,0 +1,87 @@
+"""Read-through caching: eviction and whole-table reads of partial tables."""
+
+import pytest
+
+from dsn_sync import DSNSync
+
+ROWS = {str(i): {"name": f"n{i}"} for i in range(50)}
+
+
+@pytest.fixture
+def dsn(tmp_path):
+    dsn = DSNSync(port=0, db_connection_string=f"sqlite:///{tmp_path}/app.db",
+                  read_through=True, write_behind=True)
+    db = dsn.db_connector
+    db.execute_query("CREATE TABLE users (id TEXT PRIMARY KEY, name TEXT)")
+    db.upsert_many("users", "id", ROWS)
+    dsn.define_table("users", {"key": "id", "fields": ["name"]})
+    dsn.data_manager.read_through.max_rows = 10
+    yield dsn
+    dsn.write_behind.close()
+
+
+def full_rows(table):
+    return {key: {"name": row["name"]} for key, row in table.items()}
+
+
+def load(dsn, keys):
+    for key in keys:
+        assert dsn.data_manager.get_data("users", key)["name"] == ROWS[key]["name"]
+
+
+def test_whole_table_reads_include_evicted_rows(dsn):
+    load(dsn, list(ROWS)[:30])
+    memory = dsn.memory_store
+    assert memory.is_partial("users") and len(memory.get_data("users")) == 10
+
+    data_manager = dsn.data_manager
+    version = data_manager.get_version("users")
+    assert full_rows(data_manager.get_all_data("users")) == ROWS
+    resync = data_manager.get_changes_since("users", version + 100)
+    assert resync["full"] and resync["version"] == version
+    assert full_rows(resync["data"]) == ROWS
+    assert data_manager.get_changes_since("users", version)["changes"] == {}
+
+    pages = list(data_manager.iter_pages("users", page_size=20))
+    assert [len(page["data"]) for page in pages] == [20, 20, 10]
+    assert [key for key, _ in data_manager.query("users", {"name": "n42"})] == ["42"]
+
+
+def test_memory_writes_overlay_database_rows(dsn):
+    load(dsn, ["1"])
+    dsn.sync("users", "1", {"name": "changed"})
+    dsn.sync("users", "new", {"name": "backend only"})
+    table = dsn.data_manager.get_all_data("users")
+    assert table["1"] == {"name": "changed"}
+    assert table["new"] == {"name": "backend only"}
+    assert len(table) == len(ROWS) + 1
+
+
+def test_rows_not_in_the_database_are_never_evicted(dsn):
+    dsn.sync("users", "backend", {"name": "memory only"})
+    load(dsn, list(ROWS)[:30])
+    assert dsn.memory_store.get_data("users", "backend") == {"name": "memory only"}
+    assert ("users", "backend") not in dsn.data_manager.read_through._rows
+
+    load(dsn, ["0"])
+    dsn.sync("users", "0", {"name": "rewritten"})  # A loaded row changed in memory only
+    load(dsn, list(ROWS)[30:])
+    assert dsn.memory_store.get_data("users", "0") == {"name": "rewritten"}
+
+
+def test_written_through_rows_become_evictable(dsn):
+    read_through = dsn.data_manager.read_through
+    dsn.sync("users", "w", {"name": "w"})
+    dsn.write_behind.enqueue("create", "users", "w", {"name": "w"})
+    read_through.mark_persisted("users", "w")
+    dsn.write_behind.flush()
+
+    load(dsn, list(ROWS)[:30])
+    assert dsn.memory_store.get_data("users", "w") is None
+    assert dsn.data_manager.get_data("users", "w")["name"] == "w"
+
+
+def test_tables_without_database_rows_are_served_from_memory(dsn):
+    dsn.sync("events", "1", {"kind": "login"})
+    assert not dsn.memory_store.is_partial("events")
+    assert dsn.data_manager.get_all_data("events") == {"1": {"kind": "login"}}
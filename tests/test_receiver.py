@@ -0,0 +1,118 @@
+"""Handler dispatch: per-row ordering, accepted-write callbacks and timeouts."""
+
+import threading
+import time
+
+import pytest
+
+from dsn_sync.core.receiver import Receiver
+
+MODES = ["threads", "asyncio"]
+
+
+@pytest.fixture(params=MODES)
+def receiver(request):
+    receiver = Receiver(dispatch=request.param, timeout=5)
+    yield receiver
+    receiver.close()
+
+
+def test_writes_to_a_row_are_applied_in_handler_order(receiver):
+    events = []
+    first_started = threading.Event()
+
+    @receiver.on_update("users")
+    def handle(data):
+        events.append(("handler", data["n"]))
+        first_started.set()
+
+    def apply(n):
+        if n == 1:
+            time.sleep(0.1)  # The next write's handler must wait for this
+        events.append(("apply", n))
+
+    first = threading.Thread(target=receiver.process_incoming,
+                             args=("update", "users", "1", {"n": 1}, lambda: apply(1)))
+    first.start()
+    first_started.wait(5)
+    assert receiver.process_incoming("update", "users", "1", {"n": 2}, lambda: apply(2))
+    first.join()
+    assert events == [("handler", 1), ("apply", 1), ("handler", 2), ("apply", 2)]
+
+
+def test_rejected_writes_are_not_applied(receiver):
+    applied = []
+    receiver.on_create("users")(lambda data: data["ok"])
+
+    assert not receiver.process_incoming("create", "users", "1", {"ok": False},
+                                         lambda: applied.append(1))
+    assert receiver.process_incoming("create", "users", "2", {"ok": True},
+                                     lambda: applied.append(2))
+    assert not receiver.process_incoming("create", "events", "3", {}, lambda: applied.append(3))
+    assert applied == [2]
+
+
+def test_batch_applies_each_accepted_operation(receiver):
+    applied = []
+    receiver.on_create("users")(lambda data: data["ok"])
+    batch = [
+        {"operation": "create", "table": "users", "key": "1", "data": {"ok": True}},
+        {"operation": "create", "table": "users", "key": "2", "data": {"ok": False}},
+        None,
+        {"operation": "create", "table": "users", "key": "1", "data": {"ok": True, "n": 2}},
+    ]
+    assert receiver.process_batch(batch, applied.append) == [True, False, False, True]
+    assert [op["data"] for op in applied] == [{"ok": True}, {"ok": True, "n": 2}]
+
+
+def test_write_timed_out_by_its_caller_is_not_applied(receiver):
+    applied = []
+    release = threading.Event()
+    receiver.timeout = 0.05
+    receiver.on_create("users")(lambda data: release.wait(5))
+
+    assert not receiver.process_incoming("create", "users", "1", {}, lambda: applied.append(1))
+    release.set()
+    receiver.timeout = 5
+    assert receiver.process_incoming("create", "users", "1", {}, lambda: applied.append(2))
+    assert applied == [2]
+
+
+def test_inline_dispatch_applies_on_the_calling_thread():
+    receiver = Receiver(dispatch="inline")
+    threads = []
+    receiver.on_delete("users")(lambda data: None)
+    assert receiver.process_incoming("delete", "users", "1", {},
+                                     lambda: threads.append(threading.current_thread()))
+    assert threads == [threading.current_thread()]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_close_gives_up_on_a_hung_handler(mode):
+    receiver = Receiver(dispatch=mode, timeout=0.2)
+    release = threading.Event()
+    receiver.on_create("users")(lambda data: release.wait(10))
+    hung = receiver.submit("create", "users", "1", {})
+    queued = receiver.submit("create", "users", "1", {})  # Behind the hung call
+
+    started = time.monotonic()
+    assert receiver.close() is False
+    assert time.monotonic() - started < 2
+    assert not receiver.process_incoming("create", "users", "1", {})  # Hangs too; rejected after the timeout
+    release.set()
+    assert hung.cancelled() or hung.result(5) is True  # Loop tasks are cancelled
+    assert queued.cancelled()
+
+    receiver.timeout = 5
+    assert receiver.process_incoming("create", "users", "2", {})  # Dispatch restarts
+    assert receiver.close() is True
+
+
+def test_close_waits_for_handlers_that_finish_in_time():
+    receiver = Receiver(dispatch="threads", timeout=5)
+    done = []
+    receiver.on_create("users")(lambda data: time.sleep(0.1) or done.append(data["n"]))
+    for n in range(3):
+        receiver.submit("create", "users", str(n), {"n": n})
+    assert receiver.close() is True
+    assert sorted(done) == [0, 1, 2]
@@ -0,0 +1,42 @@
+"""Response cache eviction and per-table invalidation."""
+
+from dsn_sync.core.memory_store import MemoryStore
+from dsn_sync.server.response_cache import ResponseCache
+
+
+def test_write_drops_only_the_written_tables_entries():
+    store = MemoryStore()
+    cache = ResponseCache(max_bytes=1024)
+    cache.attach(store)
+    cache.put(("a", 1, "k", "json", "full"), b"a1")
+    cache.put(("a", 1, "k", "json", "changes"), b"a1c")
+    cache.put(("b", 1, "k", "json", "full"), b"b1")
+
+    store.store_data("a", "x", {"v": 1})
+    assert cache.get(("a", 1, "k", "json", "full")) is None
+    assert cache.get(("b", 1, "k", "json", "full")) == b"b1"
+    assert cache.get_stats()["bytes"] == 2
+    assert set(cache._tables) == {"b"}
+
+    store.clear_data()
+    assert cache.get_stats()["entries"] == 0 and cache._tables == {}
+
+
+def test_lru_eviction_keeps_table_tracking_in_step():
+    cache = ResponseCache(max_bytes=10)
+    cache.put(("a", 1), b"12345")
+    cache.put(("b", 1), b"12345")
+    cache.get(("a", 1))
+    cache.put(("c", 1), b"12345")  # Evicts b, the least recently used
+
+    assert cache.get(("b", 1)) is None
+    assert set(cache._tables) == {"a", "c"}
+    cache.invalidate("a")
+    assert cache.get_stats() == {"entries": 1, "bytes": 5, "max_bytes": 10,
+                                 "hits": 1, "misses": 1}
+
+
+def test_oversized_bodies_are_not_cached():
+    cache = ResponseCache(max_bytes=4)
+    assert cache.get_or_create(("a", 1), lambda: b"12345") == b"12345"
+    assert cache.get_stats()["entries"] == 0 and cache._tables == {}
@@ -0,0 +1,113 @@
+"""Multi-process workers: writes forwarded to the parent and replicated back."""
+
+import multiprocessing.context
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+from dsn_sync import DSNSync
+from dsn_sync.config.settings import DATA_DIR
+from dsn_sync.core.memory_store import MemoryStore
+from dsn_sync.core.persistence import StorePersistence
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="workers need fork")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_workers(dsn: DSNSync) -> None:
+    dsn.server.host = "127.0.0.1"
+    assert dsn.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", dsn.server.port), timeout=1).close()
+            return
+        except OSError:
+            assert time.monotonic() < deadline, "workers did not start"
+            time.sleep(0.05)
+
+
+@pytest.fixture
+def dsn():
+    dsn = DSNSync(port=free_port(), workers=2, metrics=True)
+    dsn.sync("users", "1", {"name": "a"})
+
+    @dsn.on_create("users")
+    def accept(data):
+        return True
+
+    @dsn.on_create("probe")
+    def update_user(data):
+        # Runs in a worker; returns what the parent's store answered
+        return dsn.memory_store.update_data("users", data["key"], {"seen": True})
+
+    @dsn.on_create("broken")
+    def accept_broken(data):
+        return True
+
+    def fail(operation, table_name, key, data):
+        if table_name == "broken" and os.getpid() == parent:
+            raise ValueError("disk full")
+
+    parent = os.getpid()
+    dsn.memory_store.add_listener(fail)
+    start_workers(dsn)
+    yield dsn
+    dsn.stop()
+
+
+def test_worker_reads_its_own_writes(dsn, client):
+    for n in range(20):
+        connection = client(dsn)  # New connections spread across workers
+        status, payload = connection.write("create", "users", f"k{n}", {"n": n})
+        assert status == 200 and payload["success"]
+        status, payload = connection.get(f"/users/k{n}")
+        assert status == 200 and payload["data"] == {"n": n}
+    assert len(dsn.memory_store.get_data("users")) == 21
+
+
+def test_forwarded_write_returns_the_parents_result(dsn, client):
+    connection = client(dsn)
+    assert connection.write("create", "probe", "p1", {"key": "1"})[1]["success"] is True
+    assert connection.write("create", "probe", "p2", {"key": "missing"})[1]["success"] is False
+    assert dsn.memory_store.get_data("users", "1") == {"name": "a", "seen": True}
+
+
+def test_failed_forwarded_write_is_reported_to_the_worker(dsn, client):
+    status, payload = client(dsn).write("create", "broken", "1", {"x": 1})
+    assert status == 200 and payload["success"] is False
+    counters = dsn.get_metrics()["counters"]
+    assert counters == {'forwarded_write_errors{operation="store"}': 1}
+
+
+def test_background_threads_are_stopped_while_forking(tmp_path, monkeypatch, client):
+    monkeypatch.chdir(tmp_path)
+    dsn = DSNSync(port=free_port(), workers=2, persistence=True)
+    dsn.on_create("users")(lambda data: True)
+    at_fork = []
+    fork = multiprocessing.context.ForkProcess.start
+
+    def start(process):
+        at_fork.append(dsn.persistence._thread)
+        fork(process)
+
+    monkeypatch.setattr(multiprocessing.context.ForkProcess, "start", start)
+    start_workers(dsn)
+    try:
+        assert at_fork == [None, None]
+        assert dsn.persistence._thread.is_alive()
+        assert client(dsn).write("create", "users", "1", {"n": 1})[1]["success"]
+    finally:
+        dsn.stop()
+
+    store = MemoryStore()
+    StorePersistence(store, str(tmp_path / DATA_DIR / "store")).open()
+    assert store.get_data("users", "1") == {"n": 1}